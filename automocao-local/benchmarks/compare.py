@@ -0,0 +1,61 @@
+import argparse
+import json
+import sys
+
+# --- COMPARAÇÃO DE BENCHMARKS ---
+# Compara dois resultados de benchmarks/run.py etapa a etapa e sai com código 1 se
+# alguma etapa ficou mais lenta (ou usou mais memória) do que a tolerância permite.
+#
+# Uso: python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/novo.json
+
+DEFAULT_THRESHOLD = 0.15  # 15% de tolerância
+MIN_SECONDS = 0.05  # Etapas mais rápidas que isso são ruído de medição
+
+
+def compare(base: dict, new: dict, threshold: float, min_seconds: float):
+    """Lista de (tamanho, etapa, base, novo, variação, regressão?) para as etapas em comum."""
+    rows = []
+    for size_name, new_result in new['results'].items():
+        base_result = base['results'].get(size_name)
+        if base_result is None:
+            continue
+        for stage, new_metrics in new_result['stages'].items():
+            base_metrics = base_result['stages'].get(stage)
+            if base_metrics is None:
+                continue
+            for metric, floor in (('seconds', min_seconds), ('peak_rss_mb', 1.0)):
+                before, after = base_metrics[metric], new_metrics[metric]
+                change = (after - before) / before if before else 0.0
+                regression = before >= floor and change > threshold
+                rows.append((size_name, stage, metric, before, after, change, regression))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Variação máxima aceita (0.15 = 15%%).")
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS)
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding='utf-8') as handle:
+        base = json.load(handle)
+    with open(args.new, encoding='utf-8') as handle:
+        new = json.load(handle)
+
+    rows = compare(base, new, args.threshold, args.min_seconds)
+    print(f"Base: {base['meta'].get('git_commit')} ({base['meta']['timestamp']})  |  Novo: {new['meta'].get('git_commit')} ({new['meta']['timestamp']})")
+    for size_name, stage, metric, before, after, change, regression in rows:
+        flag = '  <-- REGRESSÃO' if regression else ''
+        print(f"{size_name:<8} {stage:<28} {metric:<12} {before:>10.3f} -> {after:>10.3f}  {change:+7.1%}{flag}")
+
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from src.automacao.ec2.factory import EC2Report
+from src.automacao.iam.factory import IAMReport
+from src.automacao.security_analyzer import analyze_sgs
+from src.automacao.utils import formatters
+from src.automacao.utils.cache import configure_cache
+from src.automacao.utils.dashboard import PerformanceDashboard
+from src.automacao.utils.discovery import find_active_vpc_regions
+from src.automacao.utils.memo import get_rule_set_memo
+from src.automacao.vpc.factory import VPCReport
+
+from .synthetic import PRESETS, SyntheticAWS, SyntheticSize
+
+# --- BENCHMARK OFFLINE ---
+# Roda o pipeline completo (e as funções mais pesadas isoladamente) contra inventários
+# sintéticos, mede tempo e memória de cada etapa e grava um JSON comparável entre
+# execuções (ver benchmarks/compare.py).
+#
+# Uso (a partir da pasta automocao-local):
+#   python -m benchmarks.run --preset small --preset medium --repeat 3
+#   python -m benchmarks.run --regions 4 --vpcs 5 --sgs 300 --rules 12 --users 2000
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIME_TO_MENU_TARGET_MS = 200  # Meta do tempo até o menu do main.py
+
+
+class StageRecorder:
+    """Mede cada etapa com o PerformanceDashboard e, opcionalmente, o pico de alocação Python (tracemalloc)."""
+
+    def __init__(self, dashboard: PerformanceDashboard, trace_memory: bool):
+        self.dashboard = dashboard
+        self.trace_memory = trace_memory
+        self.python_peaks = {}
+
+    def run(self, name, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        with self.dashboard.stage(name):
+            result = func(*args, **kwargs)
+        if self.trace_memory:
+            self.python_peaks[name] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        return result
+
+
+def run_once(aws: SyntheticAWS, output_dir: str, trace_memory: bool, iam_modes: list) -> dict:
+    """Uma rodada completa; devolve {etapa: métricas}."""
+    # Toda rodada parte do memo de regras vazio, como uma execução nova
+    get_rule_set_memo().clear()
+    dashboard = PerformanceDashboard(interval=0.05, live=False).start()
+    recorder = StageRecorder(dashboard, trace_memory)
+    try:
+        # Relatório de VPC: descoberta, coleta, análise e geração
+        session = dashboard.instrument(aws.session())
+        discovery = recorder.run('vpc.discover_regions', find_active_vpc_regions, session)
+        vpc_report = VPCReport(regions_to_scan=discovery.active_regions, prefetched_vpcs=discovery.vpcs_by_region, session=session)
+        recorder.run('vpc.collect_data', vpc_report.collect_data)
+        recorder.run('vpc.analyze_security', vpc_report.analyze_security)
+        recorder.run('vpc.generate_report', vpc_report.generate_report, os.path.join(output_dir, 'vpc.xlsx'))
+
+        # Inventário de EC2 (streaming para tabelas em disco), nas mesmas regiões
+        if aws.size.instances:
+            ec2_report = EC2Report(regions_to_scan=discovery.active_regions, session=session)
+            recorder.run('ec2.collect_data', ec2_report.collect_data)
+            recorder.run('ec2.analyze_security', ec2_report.analyze_security)
+            recorder.run('ec2.generate_report', ec2_report.generate_report, os.path.join(output_dir, 'ec2.xlsx'))
+
+        # Funções isoladas, sobre os mesmos Security Groups
+        all_sgs = [sg for vpc in vpc_report.vpcs for sg in vpc.security_groups]
+        recorder.run('analyze_sgs', analyze_sgs, all_sgs)
+        recorder.run('format_rules', lambda: [
+            (formatters.format_rules(sg.inbound), formatters.format_rules(sg.outbound))
+            for sg in all_sgs
+        ])
+
+        # Relatório de IAM, em cada modo de coleta pedido
+        for mode in iam_modes:
+            iam_report = IAMReport(collection_mode=mode, session=dashboard.instrument(aws.session()))
+            recorder.run(f'iam_{mode}.collect_data', iam_report.collect_data)
+            recorder.run(f'iam_{mode}.analyze_security', iam_report.analyze_security)
+            recorder.run(f'iam_{mode}.generate_report', iam_report.generate_report, os.path.join(output_dir, f'iam_{mode}.xlsx'))
+    finally:
+        dashboard.stop()
+
+    stages = dashboard.metrics()['stages']
+    for name, peak in recorder.python_peaks.items():
+        stages[name]['python_peak_mb'] = peak
+    return stages
+
+
+def summarize(rounds: list) -> dict:
+    """Combina as rodadas: mediana e mínimo do tempo, maior pico de memória."""
+    summary = {}
+    for name in rounds[0]:
+        samples = [r[name] for r in rounds]
+        durations = [s['duration_seconds'] for s in samples]
+        summary[name] = {
+            'seconds': round(statistics.median(durations), 4),
+            'seconds_min': round(min(durations), 4),
+            'peak_rss_mb': max(s['peak_rss_mb'] for s in samples),
+            'api_calls': samples[0]['api_calls'],
+        }
+        if 'python_peak_mb' in samples[0]:
+            summary[name]['python_peak_mb'] = max(s['python_peak_mb'] for s in samples)
+    return summary
+
+
+def benchmark(name: str, size: SyntheticSize, repeat: int, trace_memory: bool, iam_modes: list) -> dict:
+    logging.warning(f"Gerando inventário '{name}': {size.as_dict()}")
+    aws = SyntheticAWS(size)
+    counts = {
+        'vpcs': sum(len(r['Vpcs']) for r in aws.ec2.values()),
+        'security_groups': sum(len(r['SecurityGroups']) for r in aws.ec2.values()),
+        'sg_rules': sum(len(sg['IpPermissions']) for r in aws.ec2.values() for sg in r['SecurityGroups']),
+        'instances': sum(len(r['Instances']) for r in aws.ec2.values()),
+        'users': len(aws.iam['users']),
+        'access_keys': sum(len(keys) for keys in aws.iam['access_keys'].values()),
+    }
+    rounds = []
+    for attempt in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            rounds.append(run_once(aws, output_dir, trace_memory, iam_modes))
+        logging.warning(f"  rodada {attempt + 1}/{repeat}: " + ", ".join(f"{k}={v['duration_seconds']:.2f}s" for k, v in rounds[-1].items()))
+    return {'size': size.as_dict(), 'counts': counts, 'stages': summarize(rounds)}
+
+
+def measure_startup(repeat: int) -> dict:
+    """
+    Inicialização do main.py em processos novos (`--startup-metrics`): importações e tempo
+    até o menu medidos pelo próprio main.py, mais o tempo total do processo (com o interpretador).
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, 'main.py', '--startup-metrics'], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        process_ms = (time.perf_counter() - started) * 1000
+        samples.append({**json.loads(completed.stdout.strip().splitlines()[-1]), 'process_ms': process_ms})
+    return {metric: round(statistics.median(s[metric] for s in samples), 1) for metric in ('imports_ms', 'menu_ms', 'process_ms')}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline com inventários sintéticos.")
+    parser.add_argument('--preset', action='append', choices=sorted(PRESETS), help="Tamanho pré-definido (pode repetir).")
+    parser.add_argument('--regions', type=int)
+    parser.add_argument('--vpcs', type=int, help="VPCs por região.")
+    parser.add_argument('--sgs', type=int, help="Security Groups por VPC.")
+    parser.add_argument('--rules', type=int, help="Regras de entrada por Security Group.")
+    parser.add_argument('--instances', type=int, help="Instâncias EC2 por VPC.")
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--keys', type=int, help="Máximo de chaves de acesso por usuário.")
+    parser.add_argument('--policies', type=int, help="Máximo de políticas atreladas por usuário.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help="Rodadas por tamanho (o tempo reportado é a mediana).")
+    parser.add_argument('--iam-modes', default='bulk,per_user', help="Modos de coleta do IAM a medir.")
+    parser.add_argument('--tracemalloc', action='store_true', help="Mede também o pico de alocação Python (mais lento).")
+    parser.add_argument('--output', help="Arquivo JSON de resultado (padrão: benchmarks/results/<data>.json).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Logs dos módulos só a partir de WARNING, para não medir a escrita no terminal
+    logging.basicConfig(level=logging.WARNING, format='%(message)s', stream=sys.stdout)
+    # Sem cache: toda rodada passa pela coleta completa
+    configure_cache(enabled=False)
+
+    sizes = {name: PRESETS[name] for name in (args.preset or [])}
+    custom = {k: getattr(args, k) for k in ('regions', 'vpcs', 'sgs', 'rules', 'instances', 'users', 'keys', 'policies') if getattr(args, k) is not None}
+    if custom or not sizes:
+        size = SyntheticSize(seed=args.seed, **custom)
+        sizes['custom' if custom else 'small'] = size if custom else PRESETS['small']
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    iam_modes = [mode.strip() for mode in args.iam_modes.split(',') if mode.strip()]
+    results = {name: benchmark(name, size, args.repeat, args.tracemalloc, iam_modes) for name, size in sizes.items()}
+    startup = measure_startup(args.repeat)
+
+    payload = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'tracemalloc': args.tracemalloc,
+        },
+        'results': results,
+        'startup': startup,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump(payload, handle, ensure_ascii=False, indent=2)
+
+    for name, result in results.items():
+        print(f"\n== {name} ({result['counts']['security_groups']} SGs, {result['counts']['sg_rules']} regras, {result['counts']['users']} usuários)")
+        for stage, metrics in result['stages'].items():
+            print(f"  {stage:<28} {metrics['seconds']:>9.3f}s  pico {metrics['peak_rss_mb']:>8.1f} MB  API {metrics['api_calls']:>6}")
+    flag = '' if startup['menu_ms'] <= TIME_TO_MENU_TARGET_MS else f'  <-- acima da meta de {TIME_TO_MENU_TARGET_MS} ms'
+    print(f"\n== inicialização do main.py: importações {startup['imports_ms']:.0f} ms, menu {startup['menu_ms']:.0f} ms, processo {startup['process_ms']:.0f} ms{flag}")
+    print(f"\nResultado salvo em: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,390 @@
+import csv  # Montagem do Credential Report sintético
+import io
+import json  # Documentos de política (codificados em URL, como na API)
+import pickle  # Cópia rápida das respostas (o botocore e as fábricas alteram os dicts recebidos)
+import random  # Inventários reprodutíveis a partir de uma semente
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+import boto3  # Clientes reais do botocore, com respostas servidas localmente
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+
+# --- INVENTÁRIOS SINTÉTICOS ---
+# Gera contas AWS falsas de tamanho configurável e as serve para as fábricas sem rede:
+# os clientes são clientes boto3 normais (paginadores, eventos e hooks continuam valendo),
+# mas um hook 'before-call' responde cada operação a partir do inventário em memória,
+# do mesmo jeito que o Stubber do botocore faz.
+
+ALL_REGIONS = [
+    'us-east-1', 'us-east-2', 'us-west-1', 'us-west-2', 'sa-east-1', 'eu-west-1', 'eu-west-2', 'eu-west-3',
+    'eu-central-1', 'eu-north-1', 'ap-south-1', 'ap-northeast-1', 'ap-northeast-2', 'ap-southeast-1',
+    'ap-southeast-2', 'ca-central-1',
+]
+ACCOUNT_ID = '000000000000'
+ADMIN_POLICY_ARN = 'arn:aws:iam::aws:policy/AdministratorAccess'
+POLICY_POOL = [ADMIN_POLICY_ARN] + [f'arn:aws:iam::aws:policy/BenchPolicy{i}' for i in range(49)]
+
+# Portas e faixas usadas nas regras: portas comuns, portas de alto risco e faixas largas
+PORT_CHOICES = [(22, 22), (80, 80), (443, 443), (3389, 3389), (5432, 5432), (8080, 8090), (1024, 65535), (0, 65535), (20, 3400)]
+CIDR_CHOICES = ['0.0.0.0/0', '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16', '203.0.113.7/32']
+
+
+
+def _encode_document(document: dict) -> str:
+    """Documentos de política trafegam como JSON codificado em URL (o botocore decodifica)."""
+    return quote(json.dumps(document))
+
+
+def policy_document(index: int) -> str:
+    """Documento da BenchPolicy{index}: a maioria só de leitura, algumas com curingas e caminhos de escalonamento."""
+    if index % 25 == 5:
+        statements = [{'Effect': 'Allow', 'Action': '*', 'Resource': '*'}]
+    elif index % 10 == 2:
+        statements = [{'Effect': 'Allow', 'Action': ['iam:*', 'sts:AssumeRole'], 'Resource': '*'}]
+    elif index % 10 == 1:
+        statements = [{'Effect': 'Allow', 'Action': ['iam:PassRole', 'ec2:RunInstances'], 'Resource': '*'}]
+    else:
+        statements = [{'Effect': 'Allow', 'Action': ['s3:Get*', 's3:List*', 'ec2:Describe*'], 'Resource': '*'}]
+    return _encode_document({'Version': '2012-10-17', 'Statement': statements})
+
+
+EC2_PAGE_SIZE = 1000  # Máximo da API DescribeSecurityGroups
+IAM_PAGE_SIZE = 100
+
+
+class SyntheticSize:
+    """Dimensões do inventário: regiões x VPCs x SGs x regras (e instâncias), usuários x chaves x políticas."""
+
+    def __init__(self, regions=2, vpcs=2, sgs=50, rules=5, users=100, keys=2, policies=3, sg_reference_ratio=0.2, instances=0, seed=42):
+        self.regions = regions
+        self.vpcs = vpcs  # Por região
+        self.sgs = sgs  # Por VPC
+        self.rules = rules  # Regras de entrada por SG
+        self.users = users
+        self.keys = keys  # Máximo de chaves por usuário
+        self.policies = policies  # Máximo de políticas atreladas por usuário
+        self.sg_reference_ratio = sg_reference_ratio  # Fração das regras que referenciam outro SG
+        self.instances = instances  # Instâncias EC2 por VPC
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+PRESETS = {
+    'small': SyntheticSize(regions=2, vpcs=2, sgs=50, rules=5, users=100, instances=200),
+    'medium': SyntheticSize(regions=4, vpcs=5, sgs=200, rules=8, users=1000, instances=1000),
+    'large': SyntheticSize(regions=8, vpcs=10, sgs=500, rules=10, users=5000, instances=1250),
+}
+
+
+def _sg_rule(rng, size, vpc_sg_ids):
+    """Uma regra de entrada: faixa de portas, CIDRs e, às vezes, referência a outro SG."""
+    protocol = rng.choices(['tcp', 'udp', '-1', 'icmp'], weights=[70, 15, 10, 5])[0]
+    rule = {'IpProtocol': protocol, 'IpRanges': [], 'Ipv6Ranges': [], 'PrefixListIds': [], 'UserIdGroupPairs': []}
+    if protocol in ('tcp', 'udp'):
+        rule['FromPort'], rule['ToPort'] = rng.choice(PORT_CHOICES)
+    elif protocol == 'icmp':
+        rule['FromPort'], rule['ToPort'] = -1, -1
+    if vpc_sg_ids and rng.random() < size.sg_reference_ratio:
+        rule['UserIdGroupPairs'].append({'GroupId': rng.choice(vpc_sg_ids), 'UserId': ACCOUNT_ID})
+    else:
+        rule['IpRanges'] = [{'CidrIp': cidr} for cidr in rng.sample(CIDR_CHOICES, rng.randint(1, 2))]
+    return rule
+
+
+def build_ec2_inventory(size: SyntheticSize) -> dict:
+    """{região: {'Vpcs': [...], 'SecurityGroups': [...], 'Instances': [...], 'NetworkInterfaces': [...]}} no formato das respostas da API."""
+    rng = random.Random(size.seed)
+    # Gerador próprio para as instâncias: os SGs continuam iguais com ou sem instâncias
+    instance_rng = random.Random(size.seed + 2)
+    inventory = {}
+    for region in ALL_REGIONS[:size.regions]:
+        vpcs, sgs, instances = [], [], []
+        for v in range(size.vpcs):
+            vpc_id = f"vpc-{region}-{v:04d}"
+            vpcs.append({
+                'VpcId': vpc_id, 'IsDefault': False, 'CidrBlock': f'10.{v % 256}.0.0/16', 'State': 'available',
+                'Tags': [{'Key': 'Name', 'Value': f'bench-{region}-{v}'}],
+            })
+            sg_ids = [f"sg-{region}-{v:04d}-{s:05d}" for s in range(size.sgs)]
+            for s, sg_id in enumerate(sg_ids):
+                sgs.append({
+                    'GroupId': sg_id,
+                    'GroupName': f'bench-sg-{v}-{s}',
+                    'Description': 'Security Group sintético',
+                    'VpcId': vpc_id,
+                    'OwnerId': ACCOUNT_ID,
+                    'IpPermissions': [_sg_rule(rng, size, sg_ids[:s]) for _ in range(size.rules)],
+                    'IpPermissionsEgress': [{'IpProtocol': '-1', 'IpRanges': [{'CidrIp': '0.0.0.0/0'}], 'Ipv6Ranges': [], 'PrefixListIds': [], 'UserIdGroupPairs': []}],
+                })
+            for i in range(size.instances):
+                instance = {
+                    'InstanceId': f"i-{region}-{v:04d}-{i:07d}",
+                    'InstanceType': instance_rng.choice(['t3.micro', 't3.large', 'm5.xlarge', 'c5.2xlarge']),
+                    'State': {'Code': 16, 'Name': instance_rng.choice(['running', 'running', 'running', 'stopped'])},
+                    'VpcId': vpc_id,
+                    'SubnetId': f"subnet-{region}-{v:04d}-{i % 4}",
+                    'PrivateIpAddress': f"10.{v % 256}.{(i // 250) % 256}.{i % 250 + 1}",
+                    'LaunchTime': datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=i),
+                    'SecurityGroups': [{'GroupId': sg_id, 'GroupName': sg_id} for sg_id in instance_rng.sample(sg_ids, min(len(sg_ids), instance_rng.randint(1, 3)))],
+                    'Tags': [{'Key': 'Name', 'Value': f'bench-instance-{v}-{i}'}],
+                }
+                if instance_rng.random() < 0.3:
+                    instance['PublicIpAddress'] = f"198.51.{(i // 250) % 256}.{i % 250 + 1}"
+                instances.append(instance)
+        # Uma interface de rede (ENI) principal por instância, com os mesmos grupos e IPs
+        interfaces = [
+            {
+                'NetworkInterfaceId': f"eni-{instance['InstanceId'][2:]}", 'InterfaceType': 'interface', 'Status': 'in-use',
+                'VpcId': instance['VpcId'], 'SubnetId': instance['SubnetId'], 'PrivateIpAddress': instance['PrivateIpAddress'],
+                'Attachment': {'InstanceId': instance['InstanceId'], 'DeviceIndex': 0},
+                'Groups': instance['SecurityGroups'],
+                **({'Association': {'PublicIp': instance['PublicIpAddress']}} if 'PublicIpAddress' in instance else {}),
+            }
+            for instance in instances
+        ]
+        inventory[region] = {'Vpcs': vpcs, 'SecurityGroups': sgs, 'Instances': instances, 'NetworkInterfaces': interfaces}
+    return inventory
+
+
+def build_iam_inventory(size: SyntheticSize) -> dict:
+    """Usuários com grupos, políticas e chaves, mais o Credential Report correspondente."""
+    rng = random.Random(size.seed + 1)
+    now = datetime.now(timezone.utc)
+    groups = [f'bench-group-{g}' for g in range(max(1, size.users // 50))]
+    users, access_keys, report_rows = [], {}, []
+    for u in range(size.users):
+        name = f'bench-user-{u:06d}'
+        created = now - timedelta(days=rng.randint(1, 1500))
+        attached = rng.sample(POLICY_POOL, rng.randint(0, size.policies))
+        mfa = rng.random() < 0.6
+        keys = []
+        for k in range(rng.randint(0, size.keys)):
+            keys.append({
+                'AccessKeyId': f'AKIABENCH{u:06d}{k}', 'Status': rng.choice(['Active', 'Active', 'Inactive']),
+                'CreateDate': now - timedelta(days=rng.randint(1, 400)), 'UserName': name,
+            })
+        access_keys[name] = keys
+        users.append({
+            'UserName': name, 'UserId': f'AIDABENCH{u:06d}', 'Arn': f'arn:aws:iam::{ACCOUNT_ID}:user/{name}',
+            'Path': '/', 'CreateDate': created,
+            'GroupList': rng.sample(groups, rng.randint(0, min(2, len(groups)))),
+            'AttachedManagedPolicies': [{'PolicyArn': arn, 'PolicyName': arn.rsplit('/', 1)[-1]} for arn in attached],
+            'UserPolicyList': [{'PolicyName': f'inline-{u}-{i}', 'PolicyDocument': '%7B%7D'} for i in range(rng.randint(0, 1))],
+            'MFADevices': [{'SerialNumber': f'arn:aws:iam::{ACCOUNT_ID}:mfa/{name}'}] if mfa else [],
+        })
+        row = {
+            'user': name, 'arn': users[-1]['Arn'], 'user_creation_time': created.isoformat(),
+            'password_enabled': 'true', 'password_last_used': (now - timedelta(days=rng.randint(0, 90))).isoformat(),
+            'mfa_active': 'true' if mfa else 'false',
+        }
+        for slot in (1, 2):
+            key = keys[slot - 1] if len(keys) >= slot else None
+            row[f'access_key_{slot}_active'] = 'true' if key and key['Status'] == 'Active' else 'false'
+            row[f'access_key_{slot}_last_rotated'] = key['CreateDate'].isoformat() if key else 'N/A'
+            row[f'access_key_{slot}_last_used_date'] = (now - timedelta(days=rng.randint(0, 30))).isoformat() if key else 'N/A'
+            row[f'access_key_{slot}_last_used_service'] = 'ec2' if key else 'N/A'
+        report_rows.append(row)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(report_rows[0]) if report_rows else ['user'])
+    writer.writeheader()
+    writer.writerows(report_rows)
+    return {
+        'users': users,
+        'groups': [{'GroupName': g, 'GroupId': f'AGPA{i:08d}', 'Arn': f'arn:aws:iam::{ACCOUNT_ID}:group/{g}',
+                    'GroupPolicyList': [
+                        {'PolicyName': f'{g}-keys', 'PolicyDocument': _encode_document({'Version': '2012-10-17', 'Statement': [
+                            {'Effect': 'Allow', 'Action': 'iam:CreateAccessKey', 'Resource': f'arn:aws:iam::{ACCOUNT_ID}:user/*'}]})}
+                    ] if i % 4 == 3 else [],
+                    'AttachedManagedPolicies': [{'PolicyArn': POLICY_POOL[1 + i % 10], 'PolicyName': POLICY_POOL[1 + i % 10].rsplit('/', 1)[-1]}]}
+                   for i, g in enumerate(groups)],
+        'policies': [{'PolicyName': arn.rsplit('/', 1)[-1], 'Arn': arn, 'DefaultVersionId': 'v1',
+                      'PolicyVersionList': [] if pos == 0 else [{'VersionId': 'v1', 'IsDefaultVersion': True, 'Document': policy_document(pos - 1)}]}
+                     for pos, arn in enumerate(POLICY_POOL)],
+        'access_keys': access_keys,
+        'credential_report': buffer.getvalue().encode('utf-8'),
+    }
+
+
+def _filtered(items, params, fields: dict):
+    """Aplica os filtros suportados ({nome do filtro: campo do item}) de uma chamada Describe*."""
+    for item_filter in params.get('Filters') or []:
+        field = fields.get(item_filter['Name'])
+        if field:
+            values = set(item_filter['Values'])
+            items = [item for item in items if item.get(field) in values]
+    return items
+
+
+def _not_found(operation: str, message: str):
+    return ClientError({'Error': {'Code': 'NoSuchEntity', 'Message': message}}, operation)
+
+
+def _page(items, token, page_size, result_key, token_out='NextToken'):
+    """Uma página de `items` a partir do token (o token é o deslocamento)."""
+    start = int(token or 0)
+    page = {result_key: items[start:start + page_size]}
+    if start + page_size < len(items):
+        page[token_out] = str(start + page_size)
+        if token_out == 'Marker':
+            page['IsTruncated'] = True
+    elif token_out == 'Marker':
+        page['IsTruncated'] = False
+    return page
+
+
+class SyntheticAWS:
+    """
+    Serve um inventário sintético por meio de clientes boto3 reais.
+    `session()` devolve uma boto3.Session cujas chamadas nunca saem da máquina;
+    `calls` conta as operações atendidas.
+    """
+
+    def __init__(self, size: SyntheticSize):
+        self.size = size
+        self.ec2 = build_ec2_inventory(size)
+        self.iam = build_iam_inventory(size)
+        self._users_by_name = {user['UserName']: user for user in self.iam['users']}
+        self._groups_by_name = {group['GroupName']: group for group in self.iam['groups']}
+        self._policies_by_arn = {policy['Arn']: policy for policy in self.iam['policies']}
+        self.calls = 0
+
+    def session(self) -> boto3.Session:
+        session = boto3.Session(aws_access_key_id='bench', aws_secret_access_key='bench', region_name='us-east-1')
+        session.events.register('before-parameter-build.*.*', self._capture_params)
+        # Registrado por último: outros hooks de before-call (ex.: contagem de chamadas) rodam antes da resposta
+        session.events.register_last('before-call.*.*', self._respond)
+        return session
+
+    @staticmethod
+    def _capture_params(params, context, **kwargs):
+        # Os parâmetros da chamada (antes da serialização) ficam no contexto da requisição
+        context['synthetic_params'] = dict(params)
+
+    def _respond(self, model, context, **kwargs):
+        params = context.get('synthetic_params', {})
+        region = context.get('client_region') or 'us-east-1'
+        handler = getattr(self, f"_{model.service_model.service_name}_{model.name}", None)
+        if handler is None:
+            raise NotImplementedError(f"Operação sem resposta sintética: {model.service_model.service_name}.{model.name}")
+        self.calls += 1
+        parsed = pickle.loads(pickle.dumps(handler(params, region), protocol=pickle.HIGHEST_PROTOCOL))
+        parsed.setdefault('ResponseMetadata', {'HTTPStatusCode': 200, 'RequestId': 'synthetic'})
+        return AWSResponse(None, 200, {}, None), parsed
+
+    # --- STS ---
+
+    def _sts_GetCallerIdentity(self, params, region):
+        return {'Account': ACCOUNT_ID, 'UserId': 'AIDABENCH', 'Arn': f'arn:aws:iam::{ACCOUNT_ID}:user/bench'}
+
+    # --- EC2 ---
+
+    def _ec2_DescribeRegions(self, params, region):
+        return {'Regions': [{'RegionName': name, 'Endpoint': f'ec2.{name}.amazonaws.com'} for name in ALL_REGIONS]}
+
+    def _ec2_DescribeVpcs(self, params, region):
+        vpcs = _filtered(self.ec2.get(region, {}).get('Vpcs', []), params, {'vpc-id': 'VpcId'})
+        return _page(vpcs, params.get('NextToken'), EC2_PAGE_SIZE, 'Vpcs')
+
+    def _ec2_DescribeSecurityGroups(self, params, region):
+        sgs = _filtered(self.ec2.get(region, {}).get('SecurityGroups', []), params, {'group-id': 'GroupId'})
+        return _page(sgs, params.get('NextToken'), EC2_PAGE_SIZE, 'SecurityGroups')
+
+    def _ec2_DescribeNetworkInterfaces(self, params, region):
+        return _page(self.ec2.get(region, {}).get('NetworkInterfaces', []), params.get('NextToken'), EC2_PAGE_SIZE, 'NetworkInterfaces')
+
+    def _ec2_DescribeInstances(self, params, region):
+        # Uma reserva por instância; MaxResults vem do PageSize do paginador
+        instances = self.ec2.get(region, {}).get('Instances', [])
+        page = _page(instances, params.get('NextToken'), params.get('MaxResults') or EC2_PAGE_SIZE, 'Instances')
+        page['Reservations'] = [{'ReservationId': f"r-{item['InstanceId']}", 'Instances': [item]} for item in page.pop('Instances')]
+        return page
+
+    # --- IAM ---
+
+    def _iam_GetAccountAuthorizationDetails(self, params, region):
+        start = int(params.get('Marker') or 0)
+        page = _page(self.iam['users'], start, IAM_PAGE_SIZE, 'UserDetailList', token_out='Marker')
+        # Grupos e políticas vêm na primeira página
+        page['GroupDetailList'] = self.iam['groups'] if start == 0 else []
+        page['Policies'] = self.iam['policies'] if start == 0 else []
+        return page
+
+    def _iam_GenerateCredentialReport(self, params, region):
+        return {'State': 'COMPLETE'}
+
+    def _iam_GetCredentialReport(self, params, region):
+        return {'Content': self.iam['credential_report'], 'ReportFormat': 'text/csv', 'GeneratedTime': datetime.now(timezone.utc)}
+
+    def _iam_ListUsers(self, params, region):
+        return _page(self.iam['users'], params.get('Marker'), IAM_PAGE_SIZE, 'Users', token_out='Marker')
+
+    def _iam_ListMFADevices(self, params, region):
+        return {'MFADevices': self._users_by_name[params['UserName']]['MFADevices'], 'IsTruncated': False}
+
+    def _iam_ListAccessKeys(self, params, region):
+        keys = [{k: v for k, v in key.items()} for key in self.iam['access_keys'].get(params['UserName'], [])]
+        return {'AccessKeyMetadata': keys, 'IsTruncated': False}
+
+    def _iam_ListAttachedUserPolicies(self, params, region):
+        return {'AttachedPolicies': self._users_by_name[params['UserName']]['AttachedManagedPolicies'], 'IsTruncated': False}
+
+    def _iam_ListUserPolicies(self, params, region):
+        return {'PolicyNames': [p['PolicyName'] for p in self._users_by_name[params['UserName']]['UserPolicyList']], 'IsTruncated': False}
+
+    def _iam_ListGroupsForUser(self, params, region):
+        return {'Groups': [{'GroupName': g} for g in self._users_by_name[params['UserName']]['GroupList']], 'IsTruncated': False}
+
+    # Chamadas usadas pela atualização por eventos (um usuário, grupo ou política por vez)
+
+    def _user(self, operation, params):
+        user = self._users_by_name.get(params['UserName'])
+        if user is None:
+            raise _not_found(operation, f"The user with name {params['UserName']} cannot be found.")
+        return user
+
+    def _iam_GetUser(self, params, region):
+        user = self._user('GetUser', params)
+        return {'User': {key: user[key] for key in ('UserName', 'UserId', 'Arn', 'Path', 'CreateDate')}}
+
+    def _iam_GetUserPolicy(self, params, region):
+        user = self._user('GetUserPolicy', params)
+        policy = next(p for p in user['UserPolicyList'] if p['PolicyName'] == params['PolicyName'])
+        return {'UserName': user['UserName'], **policy}
+
+    def _group(self, operation, params):
+        group = self._groups_by_name.get(params['GroupName'])
+        if group is None:
+            raise _not_found(operation, f"The group with name {params['GroupName']} cannot be found.")
+        return group
+
+    def _iam_ListAttachedGroupPolicies(self, params, region):
+        return {'AttachedPolicies': self._group('ListAttachedGroupPolicies', params)['AttachedManagedPolicies'], 'IsTruncated': False}
+
+    def _iam_ListGroupPolicies(self, params, region):
+        return {'PolicyNames': [p['PolicyName'] for p in self._group('ListGroupPolicies', params)['GroupPolicyList']], 'IsTruncated': False}
+
+    def _iam_GetGroupPolicy(self, params, region):
+        group = self._group('GetGroupPolicy', params)
+        policy = next(p for p in group['GroupPolicyList'] if p['PolicyName'] == params['PolicyName'])
+        return {'GroupName': group['GroupName'], **policy}
+
+    def _policy(self, operation, params):
+        policy = self._policies_by_arn.get(params['PolicyArn'])
+        if policy is None:
+            raise _not_found(operation, f"Policy {params['PolicyArn']} was not found.")
+        return policy
+
+    def _iam_GetPolicy(self, params, region):
+        policy = self._policy('GetPolicy', params)
+        return {'Policy': {key: policy[key] for key in ('PolicyName', 'Arn', 'DefaultVersionId')}}
+
+    def _iam_GetPolicyVersion(self, params, region):
+        policy = self._policy('GetPolicyVersion', params)
+        version = next((v for v in policy['PolicyVersionList'] if v['VersionId'] == params['VersionId']), None)
+        if version is None:
+            raise _not_found('GetPolicyVersion', f"Policy {params['PolicyArn']} version {params['VersionId']} does not exist.")
+        return {'PolicyVersion': version}
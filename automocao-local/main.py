@@ -1,38 +1,40 @@
+import time
+
+# Início do processo (após a carga do interpretador), para medir o tempo até o menu
+_STARTED = time.perf_counter()
+
 import logging
 import os
 import re
-import importlib
-import boto3
+import sys
+import json
+import argparse
+import threading
 from datetime import datetime
 
-# Importa as funções de utilidade e as "Fábricas" de Relatório
+# Só módulos leves no topo: boto3, pandas, openpyxl e as fábricas são importados quando
+# um relatório é executado (ver src/automacao/registry.py)
 from src.automacao.utils.logger import setup_logging
-from src.automacao.utils.config import load_environment
-from src.automacao.utils.credentials import validate_aws_credentials
-from src.automacao.vpc.factory import VPCReport
-from src.automacao.iam.factory import IAMReport
+from src.automacao.utils.config import load_environment, get_config
+from src.automacao.utils.cache import configure_cache
+from src.automacao.registry import get_report_registry, load_factory
 
 # --- CONSTANTES GLOBAIS ---
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
+# Códigos de saída (para agendadores como o cron)
+EXIT_OK = 0
+EXIT_FAILED = 1  # Algum relatório falhou (total ou parcialmente)
+EXIT_USAGE = 2  # Opções inválidas
+EXIT_CREDENTIALS = 3  # Credenciais AWS inválidas
+
 # --- DICIONÁRIO DE RELATÓRIOS ---
-# Mapeia a escolha do usuário para a fábrica correta e suas configurações
-REPORTS = {
-    "1": {
-        "name": "VPC e Recursos Associados", 
-        "factory": VPCReport, 
-        "scope": "regional",
-        "output_dir_name": "vpc",
-        "output_prefix": "RELATORIO_VPC"
-    },
-    "2": {
-        "name": "Análise de Segurança do IAM", 
-        "factory": IAMReport,
-        "scope": "global",
-        "output_dir_name": "iam",
-        "output_prefix": "RELATORIO_IAM"
-    },
-}
+# Registro preguiçoso: chave do menu -> configuração do relatório (nome, fábrica por
+# caminho de módulo, escopo e saídas). Novos relatórios entram por plugins, sem editar este arquivo.
+REPORTS = get_report_registry()
+
+# Tempos de inicialização (ms), expostos no log e em --startup-metrics
+STARTUP_METRICS = {'imports_ms': round((time.perf_counter() - _STARTED) * 1000, 1)}
 
 # --- FUNÇÕES DE AJUDA ---
 
@@ -47,7 +49,10 @@ def display_menu():
     print("+-------------------------------------------------------------+")
 
 def get_next_run_number(output_dir: str, report_prefix: str) -> int:
-    """Escaneia um diretório e retorna o próximo número de execução sequencial."""
+    """
+    Escaneia um diretório e retorna o próximo número de execução sequencial. Usado só na
+    primeira execução de cada relatório com o histórico, para a numeração continuar.
+    """
     os.makedirs(output_dir, exist_ok=True)
     max_run_num = 0
     pattern = re.compile(f"^{report_prefix}_(\\d+)_.*")
@@ -59,79 +64,401 @@ def get_next_run_number(output_dir: str, report_prefix: str) -> int:
                 max_run_num = run_num
     return max_run_num + 1
 
-def find_active_vpc_regions(session):
-    """Varre todas as regiões para encontrar aquelas que têm VPCs em uso."""
-    logging.info("Iniciando varredura em todas as regiões para encontrar VPCs ativas...")
-    active_regions = []
+def get_run_history():
+    """Histórico de execuções (SQLite) em output/history.sqlite ou no caminho de HISTORY_DB."""
+    from src.automacao.history import RunHistory
+    return RunHistory(get_config('HISTORY_DB', os.path.join(PROJECT_ROOT, "output", "history.sqlite")))
+
+def build_output_path(report_key: str, history, status: str = 'running') -> tuple:
+    """
+    Reserva o número da próxima execução no histórico e devolve (caminho do relatório,
+    número da execução, id da execução no histórico).
+    """
+    report_config = REPORTS[report_key]
+    output_dir = os.path.join(PROJECT_ROOT, "output", report_config["output_dir_name"])
+    run_id, run_number = history.begin_run(
+        report_config["output_prefix"], status=status,
+        legacy_last_run=lambda: get_next_run_number(output_dir, report_config["output_prefix"]) - 1
+    )
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, f"{report_config['output_prefix']}_{run_number}_{timestamp}.xlsx"), run_number, run_id
+
+def record_history(history, run_id: int, report_config: dict, findings):
+    """
+    Grava os achados da execução (recurso, região, risco, detalhe) no histórico e devolve
+    a tabela de tendência montada a partir das consultas (None se o histórico falhar).
+    """
     try:
-        ec2_global = session.client('ec2', region_name='us-east-1')
-        all_regions = [region['RegionName'] for region in ec2_global.describe_regions(AllRegions=False)['Regions']]
-        
-        for region_name in all_regions:
-            logging.info(f"Sondando região: {region_name}...")
-            try:
-                ec2_regional = session.client('ec2', region_name=region_name)
-                custom_vpcs = ec2_regional.describe_vpcs(Filters=[{'Name': 'is-default', 'Values': ['false']}]).get('Vpcs', [])
-                if custom_vpcs:
-                    logging.info(f"-> Região ATIVA encontrada (VPC customizada): {region_name}")
-                    active_regions.append(region_name)
-            except Exception as e:
-                logging.warning(f"Não foi possível sondar a região {region_name}. Erro: {e}.")
+        if findings is not None:
+            recorded = history.record_findings(run_id, findings)
+            logging.info(f"Histórico: {recorded} achado(s) gravados na execução.")
+        return history.risk_trend(report_config["output_prefix"], current_run_id=run_id)
     except Exception as e:
-        logging.error(f"Não foi possível buscar a lista de regiões da AWS: {e}.")
-        
-    logging.info(f"Análise concluída. Regiões com VPCs em uso: {active_regions}")
-    return active_regions
+        logging.warning(f"Não foi possível gravar o histórico da execução: {e}")
+        return None
+
+def parse_args(argv=None):
+    """Lê as opções de linha de comando."""
+    parser = argparse.ArgumentParser(description="Gerador de relatórios de segurança AWS.")
+    parser.add_argument('--refresh', action='store_true', help="Ignora o cache local e busca tudo novamente na AWS (o cache é atualizado).")
+    parser.add_argument('--no-cache', action='store_true', help="Desativa o cache local de respostas da AWS.")
+    parser.add_argument('--incremental', action='store_true', help="Reanalisa só os recursos alterados desde a última execução e gera a aba Delta.")
+    parser.add_argument('--events', help="Atualiza o inventário persistido a partir de eventos do CloudTrail/EventBridge (arquivos .json/.json.gz ou diretórios, separados por vírgula) em vez de recoletar tudo.")
+    parser.add_argument('--accounts', help="Modo multi-conta: IDs separados por vírgula ou @arquivo (um ID por linha).")
+    parser.add_argument('--role-name', help="Role assumida em cada conta no modo multi-conta (padrão: MULTI_ACCOUNT_ROLE_NAME ou OrganizationAccountAccessRole).")
+    parser.add_argument('--reports', help="Modo não interativo: chaves de REPORTS separadas por vírgula (ex.: 1,2) ou 'all'.")
+    parser.add_argument('--summary', help="Arquivo JSON com o resumo do modo não interativo (padrão: output/batch_summary_<data>.json).")
+    parser.add_argument('--serve', action='store_true', help="Modo serviço: mantém os inventários em memória, recoleta periodicamente e expõe uma API HTTP local.")
+    parser.add_argument('--host', help="Endereço da API no modo serviço (padrão: SERVICE_HOST ou 127.0.0.1).")
+    parser.add_argument('--port', type=int, help="Porta da API no modo serviço (padrão: SERVICE_PORT ou 8765).")
+    parser.add_argument('--startup-metrics', action='store_true', help="Mostra o menu, imprime os tempos de inicialização em JSON e sai (sem validar credenciais).")
+    return parser.parse_args(argv)
+
+def load_event_inventory(factory_class, scope: str, session, factory_options: dict):
+    """
+    Modo por eventos: fábrica com o inventário da execução anterior já carregado, pronta
+    para aplicar os eventos. None quando é preciso coletar tudo (relatório sem suporte a
+    eventos ou ainda sem inventário persistido).
+    """
+    if not hasattr(factory_class, 'apply_events'):
+        logging.warning(f"{factory_class.__name__} não suporta atualização por eventos: coleta completa.")
+        return None
+    # As regiões (relatórios regionais) vêm do inventário: a descoberta de regiões é dispensada
+    regional = {'regions_to_scan': []} if scope == "regional" else {}
+    factory = factory_class(session=session, **regional, **factory_options)
+    if not factory.load_inventory():
+        logging.warning("Nenhum inventário persistido para este relatório: coleta completa (o inventário fica gravado para as próximas execuções).")
+        return None
+    return factory
+
+def run_report(report_key: str, args, cache_options: dict, session=None, discovery=None, live_dashboard=None) -> dict:
+    """
+    Executa um relatório de REPORTS do início ao fim e devolve o resumo da execução.
+    `session` e `discovery` podem vir prontos (modo não interativo) para não repetir
+    a resolução de credenciais e a varredura de regiões a cada relatório.
+    As métricas de performance de cada etapa são gravadas ao lado do relatório.
+    """
+    import boto3
+    from src.automacao.utils.sinks import resolve_formats, OutputError
+    from src.automacao.utils.dashboard import PerformanceDashboard
+    from src.automacao.utils.discovery import find_active_vpc_regions
+
+    from src.automacao.utils.cache import get_cache
+
+    report_config = REPORTS[report_key]
+    output_dir = os.path.join(PROJECT_ROOT, "output", report_config["output_dir_name"])
+    history = get_run_history()
+    path_final, run_number, run_id = build_output_path(report_key, history)
+
+    logging.info(f"Gerando Relatório: '{report_config['name']}' (Execução #{run_number})")
+    summary = {
+        "report": report_key,
+        "name": report_config["name"],
+        "run_number": run_number,
+        "status": "success",
+        "output_files": [],
+        "error": None,
+    }
+    started_at = time.monotonic()
+    dashboard = PerformanceDashboard(live=live_dashboard)
+
+    # No modo incremental (e no modo por eventos, que o pressupõe), o estado e o inventário
+    # da execução anterior ficam junto dos relatórios
+    factory_options = {}
+    if args.incremental or args.events:
+        factory_options["state_path"] = os.path.join(output_dir, ".incremental_state.pkl")
+
+    try:
+        report_factory = None
+        factory_class = load_factory(report_config)
+        if factory_options and hasattr(factory_class, 'apply_events'):
+            factory_options["inventory_path"] = os.path.join(output_dir, ".inventory.pkl")
+        output_formats = resolve_formats(report_config.get("output_formats"))
+        dashboard.start()
+
+        # Modo MULTI-CONTA: cada conta roda em um processo, com a role assumida, e o relatório é consolidado
+        if args.accounts:
+            from src.automacao.multi_account import run_multi_account, parse_accounts, DEFAULT_ROLE_NAME
+            role_name = args.role_name or get_config('MULTI_ACCOUNT_ROLE_NAME', DEFAULT_ROLE_NAME)
+            with dashboard.stage('multi_account'):
+                errors, summary["output_files"] = run_multi_account(
+                    factory_class, report_config.get("scope"), parse_accounts(args.accounts), role_name,
+                    path_final, formats=output_formats, factory_options=factory_options, cache_options=cache_options,
+                    record_history=lambda findings: record_history(history, run_id, report_config, findings)
+                )
+            failed = [account_id for account_id, error in errors.items() if error]
+            summary["failed_accounts"] = failed
+            if failed:
+                summary["status"] = "partial" if len(failed) < len(errors) else "failed"
+            logging.info(f"Relatório consolidado salvo em: {path_final} ({len(errors) - len(failed)} conta(s) com sucesso, {len(failed)} com falha)")
+        else:
+            # As chamadas de API feitas pelos clientes desta sessão entram nas métricas
+            session = dashboard.instrument(session or boto3.Session())
+
+            # Modo por eventos: parte do inventário persistido em vez de coletar e descobrir regiões
+            if args.events:
+                report_factory = load_event_inventory(factory_class, report_config.get("scope"), session, factory_options)
+            from_inventory = report_factory is not None
+
+            # Lógica para serviços REGIONAIS
+            if not from_inventory and report_config.get("scope") == "regional":
+                if discovery is None:
+                    with dashboard.stage('discover_regions'):
+                        discovery = find_active_vpc_regions(session)
+                # Sem a lista de regiões nada foi varrido: não é o mesmo que "nenhuma região ativa"
+                if discovery.error:
+                    raise RuntimeError(f"Falha na descoberta de regiões: {discovery.error}")
+                # Regiões que não responderam à descoberta ficam fora do relatório: a execução é parcial
+                unscanned = discovery.timed_out_regions + discovery.failed_regions
+                if unscanned:
+                    logging.warning(f"Regiões sem resposta na descoberta ficam fora do relatório: {unscanned}")
+                    summary["unscanned_regions"] = unscanned
+                    summary["status"] = "partial"
+                if not discovery.active_regions:
+                    if unscanned:
+                        raise RuntimeError(f"Nenhuma região ativa encontrada e {len(unscanned)} região(ões) sem resposta na descoberta.")
+                    logging.warning("Nenhuma região ativa para escanear. Encerrando execução.")
+                    summary["status"] = "skipped"
+                    return summary
+                report_factory = factory_class(
+                    regions_to_scan=discovery.active_regions, prefetched_vpcs=discovery.vpcs_by_region,
+                    session=session, **factory_options
+                )
+
+            # Lógica para serviços GLOBAIS
+            elif not from_inventory:
+                report_factory = factory_class(session=session, **factory_options)
+
+            # Executa o pipeline em memória e gera o relatório final, medindo cada etapa
+            if from_inventory:
+                # Inventário carregado: só os recursos afetados pelos eventos são rebuscados
+                from src.automacao.events import read_events
+                with dashboard.stage('apply_events'):
+                    events = read_events(args.events.split(','), since=report_factory.collected_at)
+                    report_factory.apply_events(events)
+                summary["applied_events"] = len(events)
+            else:
+                with dashboard.stage('collect_data'):
+                    report_factory.collect_data()
+            with dashboard.stage('analyze_security'):
+                report_factory.analyze_security()
+            # Usuários IAM cujos detalhes não puderam ser coletados: o relatório sai, mas a execução é parcial
+            unevaluated = sorted(getattr(report_factory, 'unevaluated_users', ()))
+            if unevaluated:
+                summary["unevaluated_users"] = unevaluated
+                summary["status"] = "partial"
+            with dashboard.stage('history'):
+                findings = report_factory.history_findings() if hasattr(report_factory, 'history_findings') else None
+                report_factory.trend_df = record_history(history, run_id, report_config, findings)
+            with dashboard.stage('generate_report'):
+                report_factory.generate_report(output_path=path_final, formats=output_formats)
+            summary["output_files"] = report_factory.output_files
+
+            logging.info(f"SUCESSO! Relatório final salvo em: {path_final}")
+    except OutputError as e:
+        # Relatório analisado, mas a gravação falhou: parcial se algum formato foi gerado
+        logging.error(f"Falha na gravação do relatório: {e}")
+        summary["status"] = "partial" if e.written else "failed"
+        summary["output_files"] = e.written
+        summary["error"] = f"{type(e).__name__}: {e}"
+    except Exception as e:
+        logging.critical(f"A automação foi interrompida por um erro: {e}", exc_info=True)
+        summary["status"] = "failed"
+        summary["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        dashboard.stop()
+        summary["duration_seconds"] = round(time.monotonic() - started_at, 2)
+        if summary["status"] != "skipped":
+            summary["metrics_file"] = dashboard.write_metrics(path_final)
+        try:
+            # A conta vem da validação das credenciais (chave do cache); no multi-conta fica em branco
+            account = get_cache().account
+            history.finish_run(
+                run_id, summary["status"],
+                account=None if args.accounts or account == 'default' else account,
+                regions=getattr(report_factory, 'regions_to_scan', None) if report_config.get("scope") == "regional" else None,
+                durations={name: stage['duration_seconds'] for name, stage in dashboard.stages.items()},
+                output_files=summary["output_files"],
+            )
+        except Exception as e:
+            logging.warning(f"Não foi possível fechar a execução no histórico: {e}")
+    return summary
+
+def run_batch(args, cache_options: dict) -> int:
+    """
+    Modo não interativo (ex.: cron): roda os relatórios pedidos em um único processo.
+    Sessão, identidade e regiões ativas são resolvidas uma única vez e compartilhadas;
+    os relatórios rodam em paralelo (em sequência no modo multi-conta, que já usa processos).
+    Grava um resumo em JSON e devolve o código de saída.
+    """
+    import boto3
+    from concurrent.futures import ThreadPoolExecutor
+    from src.automacao.utils.credentials import validate_aws_credentials, clone_session
+    from src.automacao.utils.discovery import find_active_vpc_regions
+
+    started_at = datetime.now()
+    keys = list(REPORTS) if args.reports.strip().lower() == 'all' else []
+    for key in (item.strip() for item in args.reports.split(',')):
+        if key and key.lower() != 'all' and key not in keys:
+            keys.append(key)
+    unknown = [key for key in keys if key not in REPORTS]
+    if unknown or not keys:
+        logging.error(f"Relatório(s) desconhecido(s): {unknown or args.reports}. Opções: {', '.join(REPORTS)} ou 'all'.")
+        return EXIT_USAGE
+
+    session = boto3.Session()
+    identity = validate_aws_credentials(session)
+    if not identity:
+        return EXIT_CREDENTIALS
+
+    # A varredura de regiões é feita uma vez e reaproveitada por todos os relatórios regionais
+    discovery = None
+    # (no modo por eventos as regiões vêm do inventário persistido de cada relatório)
+    if not args.accounts and not args.events and any(REPORTS[key].get("scope") == "regional" for key in keys):
+        discovery = find_active_vpc_regions(session)
+
+    if args.accounts:
+        results = [run_report(key, args, cache_options, live_dashboard=False) for key in keys]
+    else:
+        # Cada relatório usa um clone da sessão (mesmas credenciais), criado aqui na thread principal
+        sessions = {key: clone_session(session) for key in keys}
+        with ThreadPoolExecutor(max_workers=len(keys), thread_name_prefix='report') as executor:
+            futures = [executor.submit(run_report, key, args, cache_options, sessions[key], discovery, False) for key in keys]
+            results = [future.result() for future in futures]
+
+    exit_code = EXIT_OK if all(result["status"] in ("success", "skipped") for result in results) else EXIT_FAILED
+    run_summary = {
+        "started_at": started_at.isoformat(timespec='seconds'),
+        "finished_at": datetime.now().isoformat(timespec='seconds'),
+        "account": identity.get("Account"),
+        "exit_code": exit_code,
+        "reports": results,
+    }
+    if discovery is not None:
+        run_summary["regions"] = {
+            "active": discovery.active_regions,
+            "timed_out": discovery.timed_out_regions,
+            "failed": discovery.failed_regions,
+            "error": discovery.error,
+        }
+
+    summary_path = args.summary or os.path.join(PROJECT_ROOT, "output", f"batch_summary_{started_at.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as handle:
+        json.dump(run_summary, handle, ensure_ascii=False, indent=2)
+    logging.info(f"Resumo da execução salvo em: {summary_path} (código de saída {exit_code})")
+    return exit_code
+
+def run_service(args) -> int:
+    """
+    Modo serviço: a sessão, os clientes e o último inventário de cada relatório ficam em
+    memória; o agendador recoleta em segundo plano e a API responde a partir desse estado.
+    Roda até Ctrl+C.
+    """
+    from src.automacao.service import ReportService, create_server
+
+    keys = list(REPORTS)
+    if args.reports and args.reports.strip().lower() != 'all':
+        keys = [key.strip() for key in args.reports.split(',') if key.strip()]
+        unknown = [key for key in keys if key not in REPORTS]
+        if unknown or not keys:
+            logging.error(f"Relatório(s) desconhecido(s): {unknown or args.reports}. Opções: {', '.join(REPORTS)} ou 'all'.")
+            return EXIT_USAGE
+    if args.accounts or args.incremental or args.events:
+        logging.warning("O modo serviço atende uma única conta e sempre analisa o inventário completo: --accounts, --incremental e --events são ignorados.")
+
+    # Os arquivos gerados pela API também recebem o número da execução pelo histórico
+    history = get_run_history()
+    service = ReportService(REPORTS, lambda key: build_output_path(key, history, status='service')[0], report_keys=keys)
+    if not service.start():
+        return EXIT_CREDENTIALS
+    server = create_server(service, host=args.host, port=args.port)
+    host, port = server.server_address[:2]
+    logging.info(f"Serviço ativo em http://{host}:{port} (relatórios: {', '.join(keys)}; recoleta a cada {service.refresh_seconds:.0f}s). Ctrl+C encerra.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Encerrando o serviço.")
+    finally:
+        server.server_close()
+        service.stop()
+    return EXIT_OK
+
+def validate_in_background():
+    """
+    Valida as credenciais (chamada ao STS) em uma thread enquanto o usuário escolhe no menu
+    e, em seguida, adianta a importação das fábricas (boto3, pandas, openpyxl). Devolve uma
+    função que espera o fim da validação e retorna a identidade (ou False).
+    """
+    result = {}
+
+    def run():
+        from src.automacao.utils.credentials import validate_aws_credentials
+        result['identity'] = validate_aws_credentials()
+        if result['identity']:
+            for report_config in list(REPORTS.values()):
+                try:
+                    load_factory(report_config)
+                except Exception as e:
+                    logging.debug(f"Pré-carga da fábrica '{report_config['name']}' falhou: {e}")
+
+    thread = threading.Thread(target=run, name='credentials', daemon=True)
+    thread.start()
+
+    def wait():
+        thread.join()
+        return result.get('identity', False)
+    return wait
 
 # --- FUNÇÃO PRINCIPAL (O ORQUESTRADOR) ---
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
     setup_logging()
     load_environment()
-    if not validate_aws_credentials(): return
+    # No modo por eventos os recursos rebuscados precisam refletir o estado atual: sem respostas do cache
+    cache_options = {'refresh': args.refresh or bool(args.events), 'enabled': False if args.no_cache else None}
+    configure_cache(**cache_options)
+
+    if args.events and args.accounts:
+        logging.error("O modo por eventos atende uma única conta: --events não pode ser usado com --accounts.")
+        return EXIT_USAGE
+
+    # Modo serviço: o estado em memória substitui o cache em disco e cada recoleta busca dados atuais
+    if args.serve:
+        configure_cache(**{**cache_options, 'refresh': True})
+        return run_service(args)
+
+    # Modo não interativo: sem menu, com código de saída e resumo em JSON
+    if args.reports:
+        return run_batch(args, cache_options)
+
+    # Medição do tempo até o menu (usada pelos benchmarks), sem tocar na AWS
+    if args.startup_metrics:
+        display_menu()
+        STARTUP_METRICS['menu_ms'] = round((time.perf_counter() - _STARTED) * 1000, 1)
+        print(json.dumps(STARTUP_METRICS))
+        return EXIT_OK
+
+    # As credenciais são validadas em segundo plano enquanto o menu está na tela
+    wait_credentials = validate_in_background()
 
     while True:
         display_menu()
+        if 'menu_ms' not in STARTUP_METRICS:
+            STARTUP_METRICS['menu_ms'] = round((time.perf_counter() - _STARTED) * 1000, 1)
+            logging.info(f"Menu pronto em {STARTUP_METRICS['menu_ms']:.0f} ms (importações: {STARTUP_METRICS['imports_ms']:.0f} ms).")
         choice = input("Por favor, escolha uma opção e pressione Enter: ").strip()
 
         if choice.lower() == 'q':
-            logging.info("Encerrando o programa."); break
+            logging.info("Encerrando o programa."); return EXIT_OK
         
         if choice in REPORTS:
-            report_config = REPORTS[choice]
-            
-            output_dir = os.path.join(PROJECT_ROOT, "output", report_config["output_dir_name"])
-            run_number = get_next_run_number(output_dir, report_config["output_prefix"])
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            path_final = os.path.join(output_dir, f"{report_config['output_prefix']}_{run_number}_{timestamp}.xlsx")
-
-            logging.info(f"Gerando Relatório: '{report_config['name']}' (Execução #{run_number})")
-            
-            try:
-                report_factory = None
-                
-                # Lógica para serviços REGIONAIS
-                if report_config.get("scope") == "regional":
-                    active_regions = find_active_vpc_regions(boto3.Session())
-                    if not active_regions:
-                        logging.warning("Nenhuma região ativa para escanear. Encerrando execução.")
-                        break
-                    report_factory = report_config["factory"](regions_to_scan=active_regions)
-                
-                # Lógica para serviços GLOBAIS
-                else:
-                    report_factory = report_config["factory"]()
-                
-                # Executa o pipeline em memória e gera o relatório final
-                report_factory.collect_data().analyze_security().generate_report(output_path=path_final)
-                
-                logging.info(f"SUCESSO! Relatório final salvo em: {path_final}")
-            except Exception as e:
-                logging.critical(f"A automação foi interrompida por um erro: {e}", exc_info=True)
-            
-            break
+            if not wait_credentials(): return EXIT_CREDENTIALS
+            summary = run_report(choice, args, cache_options)
+            return EXIT_OK if summary["status"] in ("success", "skipped") else EXIT_FAILED
         else:
             print("\nOpção inválida!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
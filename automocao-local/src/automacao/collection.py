@@ -0,0 +1,217 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+import queue  # Fila limitada entre as threads de coleta e o consumidor (modo streaming)
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed  # Pool de threads para coleta paralela
+from functools import lru_cache
+from typing import Callable, NamedTuple
+
+import jmespath  # Expressões de extração dos itens de cada página (já vem com o botocore)
+
+from .utils.cache import cached_call, cached_pages
+from .utils.clients import get_client
+from .utils.config import get_config
+
+# --- MOTOR DE COLETA DECLARATIVO ---
+# Cada tipo de recurso é descrito por um ResourceSpec (serviço, operação, chave do resultado,
+# escopo, filtros e construtor do modelo). O motor executa qualquer conjunto de specs em
+# paralelo (spec x região), com paginação e cache, marca cada item com a região de origem,
+# converte os itens no modelo página a página e isola as falhas: uma região ou operação que
+# falha é registrada em `errors` sem derrubar o restante da coleta.
+#
+# Specs que usam a mesma chamada (mesmo serviço, operação, escopo e parâmetros) são
+# atendidas por uma única paginação, cada uma extraindo a sua parte das páginas.
+
+DEFAULT_MAX_WORKERS = 8  # Chamadas simultâneas (spec x região)
+DEFAULT_QUEUE_PAGES = 16  # Páginas aguardando o consumidor no modo streaming
+_DONE = object()
+
+
+class ResourceSpec(NamedTuple):
+    """
+    Descrição de um tipo de recurso a coletar.
+
+    `result_key` é uma expressão JMESPath aplicada a cada página (ex.: 'Vpcs' ou
+    'Reservations[].Instances[]'). `scope` é 'regional' (uma chamada por região) ou
+    'global' (uma única chamada). `model` recebe cada item (já com 'Region' nos recursos
+    regionais) e devolve o objeto guardado no resultado; sem `model`, o próprio dicionário.
+    """
+    name: str
+    service: str
+    operation: str
+    result_key: str
+    scope: str = 'regional'
+    paginated: bool = True
+    filters: tuple = ()
+    params: dict = None
+    model: Callable = None
+
+    def call_params(self) -> dict:
+        params = dict(self.params or {})
+        if self.filters:
+            params['Filters'] = [dict(f) for f in self.filters]
+        return params
+
+    def call_key(self) -> tuple:
+        """Identifica a chamada à API: specs com a mesma chave compartilham a paginação."""
+        return (self.service, self.operation, self.scope, self.paginated, repr(sorted(self.call_params().items())))
+
+
+class CollectionError(NamedTuple):
+    spec: str
+    region: str
+    error: Exception
+
+
+class CollectionResult:
+    """Itens coletados por spec (na ordem das specs e das regiões) e as falhas isoladas."""
+
+    def __init__(self, specs: list):
+        self.items = {spec.name: [] for spec in specs}
+        self.errors: list[CollectionError] = []
+
+    def __getitem__(self, name):
+        return self.items[name]
+
+    def raise_first_error(self):
+        """Para quem não pode seguir com dados parciais (ex.: fallback por falta de permissão)."""
+        if self.errors:
+            raise self.errors[0].error
+
+
+@lru_cache(maxsize=None)
+def _compile(expression: str):
+    return jmespath.compile(expression)
+
+
+def _fetch(session, specs: list, region: str) -> dict:
+    """Executa a chamada comum a `specs` em uma região e devolve {spec: [itens convertidos]}."""
+    first = specs[0]
+    logging.info(f"Coletando '{first.operation}' da região: {region or 'global'}...")
+    client = get_client(session, first.service, region)
+    params = first.call_params()
+    pages = cached_pages(client, first.operation, **params) if first.paginated else [cached_call(client, first.operation, **params)]
+    return {spec.name: _convert(spec, pages, region) for spec in specs}
+
+
+def _convert(spec: ResourceSpec, pages, region: str) -> list:
+    """Extrai os itens de cada página e os converte página a página."""
+    expression = _compile(spec.result_key)
+    items = []
+    for page in pages:
+        items.extend(_convert_items(spec, expression.search(page) or (), region))
+    return items
+
+
+def _convert_items(spec: ResourceSpec, raw_items, region: str) -> list:
+    """Marca cada item com a região de origem e o converte no modelo da spec."""
+    items = []
+    for item in raw_items:
+        if region is not None and isinstance(item, dict):
+            item['Region'] = region
+        items.append(spec.model(item) if spec.model else item)
+    return items
+
+
+def collect(specs: list, session=None, regions: list = None, max_workers: int = None, prefetched: dict = None) -> CollectionResult:
+    """
+    Coleta todas as `specs` em paralelo e devolve um CollectionResult.
+
+    As specs regionais rodam em cada uma de `regions`; as globais, uma única vez.
+    `prefetched` ({nome da spec: {região: [itens brutos]}}) evita chamadas já feitas em
+    outra etapa (ex.: as VPCs obtidas na descoberta de regiões): os itens passam pela
+    mesma marcação de região e conversão para o modelo.
+    """
+    max_workers = int(max_workers or get_config('COLLECT_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    regions = list(regions or [])
+    prefetched = prefetched or {}
+    result = CollectionResult(specs)
+
+    # Agrupa as specs por chamada e monta as tarefas (chamada x região) que ainda precisam da API
+    groups = {}
+    for spec in specs:
+        groups.setdefault(spec.call_key(), []).append(spec)
+    tasks = []
+    for group in groups.values():
+        for region in (regions if group[0].scope == 'regional' else [None]):
+            pending = [spec for spec in group if region not in prefetched.get(spec.name, {})]
+            if pending:
+                tasks.append((pending, region))
+
+    collected = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='collect') as executor:
+        futures = {executor.submit(_fetch, session, group, region): (group, region) for group, region in tasks}
+        for future in as_completed(futures):
+            group, region = futures[future]
+            try:
+                for name, items in future.result().items():
+                    collected[(name, region)] = items
+            except Exception as e:
+                # Caso falhe a coleta em alguma região, registra aviso e continua
+                logging.warning(f"Falha ao coletar '{group[0].operation}' da região {region or 'global'}: {e}")
+                result.errors.extend(CollectionError(spec.name, region, e) for spec in group)
+
+    # Junta os resultados seguindo a ordem das regiões, para que o modelo seja determinístico
+    for spec in specs:
+        for region in (regions if spec.scope == 'regional' else [None]):
+            if region in prefetched.get(spec.name, {}):
+                result.items[spec.name].extend(_convert_items(spec, prefetched[spec.name][region], region))
+            else:
+                result.items[spec.name].extend(collected.get((spec.name, region), []))
+    return result
+
+
+def stream(spec: ResourceSpec, session=None, regions: list = None, max_workers: int = None, queue_pages: int = None, errors: list = None):
+    """
+    Versão em streaming de `collect` para inventários grandes: gera (região, itens) a cada
+    página, na ordem em que as páginas chegam, sem guardar o inventário inteiro. As threads
+    de coleta param quando a fila (`queue_pages` páginas) enche, então a memória fica
+    limitada pelo ritmo do consumidor. As páginas não passam pelo cache em disco.
+    Falhas por região são registradas em `errors` (lista de CollectionError), se informada.
+    """
+    max_workers = int(max_workers or get_config('COLLECT_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    queue_pages = int(queue_pages or get_config('COLLECT_QUEUE_PAGES', DEFAULT_QUEUE_PAGES))
+    regions = list(regions or []) if spec.scope == 'regional' else [None]
+    pages = queue.Queue(maxsize=queue_pages)
+    stop = threading.Event()
+    expression = _compile(spec.result_key)
+    # Clientes obtidos aqui, na thread do chamador, antes de disparar as threads
+    clients = {region: get_client(session, spec.service, region) for region in regions}
+
+    def put(item):
+        # Espera por espaço na fila, mas desiste se o consumidor parou de ler
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(region):
+        try:
+            logging.info(f"Coletando '{spec.operation}' da região: {region or 'global'} (streaming)...")
+            paginator = clients[region].get_paginator(spec.operation)
+            for page in paginator.paginate(**spec.call_params()):
+                if not put((region, _convert_items(spec, expression.search(page) or (), region))):
+                    return
+        except Exception as e:
+            logging.warning(f"Falha ao coletar '{spec.operation}' da região {region or 'global'}: {e}")
+            if errors is not None:
+                errors.append(CollectionError(spec.name, region, e))
+        finally:
+            put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='collect-stream')
+    for region in regions:
+        executor.submit(produce, region)
+    try:
+        remaining = len(regions)
+        while remaining:
+            item = pages.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,213 @@
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+from ..models import SecurityGroup  # Modelo dos Security Groups (regras já normalizadas)
+from ..security_analyzer import analyze_sgs  # Mesma classificação de risco dos SGs usada no relatório de VPC
+from ..vpc.exposure import SEVERITY_ORDER  # Níveis de risco que expõem um endpoint (mais grave primeiro)
+from ..utils.config import get_config  # Importa leitura de configurações do ambiente
+from ..utils.sinks import write_outputs  # Gravação das saídas (xlsx, parquet, jsonl, csv)
+from ..utils.spool import SpooledTable  # Tabelas em disco, gravadas e lidas em blocos
+from ..collection import ResourceSpec, collect, stream  # Motor de coleta (em lote e em streaming)
+
+# Número padrão de chamadas simultâneas (região x API) durante a coleta
+DEFAULT_MAX_WORKERS = 8
+NO_PUBLIC_IP = 'N/A'
+NOT_EVALUATED = 'Não avaliado'  # Instâncias de regiões cujos Security Groups não puderam ser coletados
+
+# Security Groups de cada região (para saber quais aceitam tráfego da internet)
+SG_SPEC = ResourceSpec('security_groups', 'ec2', 'describe_security_groups', 'SecurityGroups', model=SecurityGroup)
+
+# Colunas do inventário bruto, na ordem das tuplas montadas por _instance_row
+RAW_COLUMNS = [
+    'InstanceId', 'Name', 'VpcId', 'SubnetId', 'Region', 'InstanceType', 'State',
+    'PrivateIpAddress', 'PublicIpAddress', 'SecurityGroups', 'LaunchTime'
+]
+INSTANCE_COLUMNS = RAW_COLUMNS[:5] + ['Risco'] + RAW_COLUMNS[5:] + ['SGs Abertos à Internet']
+FINDING_COLUMNS = ['Risco', 'ID da Instância', 'Nome', 'Região', 'IP Público', 'SGs Abertos à Internet', 'Recomendação']
+RECOMMENDATION = "Instância com IP público e Security Group de risco aberto à internet. Restrinja a origem ou remova o IP público."
+
+
+def _instance_row(instance: dict) -> tuple:
+    """Linha compacta do inventário (tupla na ordem de RAW_COLUMNS)."""
+    return (
+        instance.get('InstanceId'),
+        next((tag['Value'] for tag in instance.get('Tags', []) if tag['Key'] == 'Name'), 'N/A'),
+        instance.get('VpcId'),
+        instance.get('SubnetId'),
+        instance.get('Region'),
+        instance.get('InstanceType'),
+        instance.get('State', {}).get('Name'),
+        instance.get('PrivateIpAddress'),
+        instance.get('PublicIpAddress', NO_PUBLIC_IP),
+        ', '.join(group['GroupId'] for group in instance.get('SecurityGroups', [])),
+        instance.get('LaunchTime'),
+    )
+
+
+# Instâncias existentes (as encerradas ficam de fora), em páginas de até 1000
+INSTANCES_SPEC = ResourceSpec(
+    'instances', 'ec2', 'describe_instances', 'Reservations[].Instances[]',
+    filters=({'Name': 'instance-state-name', 'Values': ['pending', 'running', 'stopping', 'stopped']},),
+    params={'PaginationConfig': {'PageSize': 1000}},
+    model=_instance_row
+)
+
+
+class EC2Report:
+    """
+    Fábrica do inventário de instâncias EC2 de todas as regiões ativas.
+
+    Pensada para inventários com centenas de milhares de instâncias: as páginas de
+    describe_instances são consumidas à medida que chegam (streaming) e as linhas vão para
+    tabelas em disco (SpooledTable), então nem a coleta nem a análise nem a gravação
+    precisam do inventário inteiro em memória.
+    """
+
+    # Ordem das abas e colunas de risco usadas por todas as saídas (inclusive o consolidado multi-conta)
+    SHEET_ORDER = ['EC2_Security_Analysis', 'EC2_Instances', 'Tendencia']
+    RISK_COLUMNS = {'EC2_Security_Analysis': 'Risco', 'EC2_Instances': 'Risco'}
+
+    def __init__(self, regions_to_scan: list, prefetched_vpcs: dict = None, max_workers: int = None, state_path: str = None, session=None):
+        # Regiões ativas encontradas na descoberta (prefetched_vpcs não é usado por este relatório)
+        self.regions_to_scan = regions_to_scan
+
+        # Sessão boto3 usada na coleta (ex.: sessão de uma role assumida em outra conta)
+        self.session = session
+
+        # Limite de chamadas simultâneas à API durante a coleta
+        self.max_workers = int(max_workers or get_config('COLLECT_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+
+        # ID -> nível de risco dos Security Groups classificados como de risco por analyze_sgs
+        self.risky_sgs = {}
+
+        # Regiões cujos Security Groups não puderam ser coletados (instâncias não avaliadas)
+        self.unevaluated_regions = set()
+
+        # Inventário bruto (coleta), inventário analisado e achados, todos em disco
+        self._raw_instances = None
+        self.instances = None
+        self.findings = None
+
+        # Tendência de risco por região nas últimas execuções (montada a partir do histórico)
+        self.trend_df = None
+
+        # Arquivos gerados pela última chamada de generate_report
+        self.output_files = []
+
+        if state_path:
+            logging.info("O modo incremental não se aplica ao inventário de EC2; todas as instâncias serão analisadas.")
+        logging.info(f"Fábrica de Relatório EC2 iniciada para {len(self.regions_to_scan)} região(ões).")
+
+    def collect_data(self):
+        """ETAPA 1: Coleta os Security Groups e, em streaming, as instâncias de todas as regiões."""
+        logging.info(f"Iniciando coleta paralela ({self.max_workers} workers) do inventário de EC2...")
+
+        # Security Groups primeiro, classificados pelas mesmas regras do relatório de VPC (portas
+        # web públicas, por exemplo, não são risco); só os IDs dos grupos de risco ficam em memória
+        result = collect([SG_SPEC], session=self.session, regions=self.regions_to_scan, max_workers=self.max_workers)
+        _, sg_risk_map = analyze_sgs(result['security_groups'])
+        self.risky_sgs = {sg_id: risk for sg_id, risk in sg_risk_map.items() if risk in SEVERITY_ORDER}
+        self.unevaluated_regions = {error.region for error in result.errors}
+        if result.errors:
+            logging.warning(
+                f"Falha ao coletar Security Groups nas regiões {sorted(self.unevaluated_regions)}: "
+                f"as instâncias dessas regiões ficam como '{NOT_EVALUATED}'."
+            )
+
+        # Instâncias: cada página vai direto para a tabela em disco, assim que chega
+        self._raw_instances = SpooledTable(RAW_COLUMNS)
+        errors = []
+        for region, rows in stream(INSTANCES_SPEC, session=self.session, regions=self.regions_to_scan, max_workers=self.max_workers, errors=errors):
+            self._raw_instances.extend(rows)
+
+        logging.info(
+            f"Inventário com {len(self._raw_instances)} instâncias e {len(self.risky_sgs)} Security Group(s) "
+            f"de risco coletado." + (f" Regiões com falha: {sorted({e.region for e in errors})}" if errors else "")
+        )
+        return self
+
+    def analyze_security(self):
+        """
+        ETAPA 2: Marca as instâncias com IP público e algum Security Group de risco; o nível
+        é o do grupo mais grave. Instâncias de regiões sem os Security Groups ficam 'Não avaliado'.
+        """
+        logging.info("Analisando exposição das instâncias EC2...")
+        self.instances = SpooledTable(INSTANCE_COLUMNS)
+        self.findings = SpooledTable(FINDING_COLUMNS)
+
+        # A mesma combinação de grupos se repete em muitas instâncias: resolvida uma vez
+        groups_memo = {}
+        def risky_groups(groups: str) -> tuple:
+            """(grupos de risco da combinação, nível do mais grave ou None)."""
+            if groups not in groups_memo:
+                risky = [g for g in groups.split(', ') if g in self.risky_sgs] if groups else []
+                level = next((lvl for lvl in SEVERITY_ORDER if any(self.risky_sgs[g] == lvl for g in risky)), None)
+                groups_memo[groups] = (', '.join(risky), level)
+            return groups_memo[groups]
+
+        # Um bloco da tabela em disco por vez, com operações vetorizadas
+        for chunk in self._raw_instances.iter_chunks():
+            classified = chunk['SecurityGroups'].map(risky_groups)
+            open_sgs, levels = classified.str[0], classified.str[1]
+            unevaluated = chunk['Region'].isin(self.unevaluated_regions)
+            exposed = chunk['PublicIpAddress'].notna() & chunk['PublicIpAddress'].ne(NO_PUBLIC_IP) & levels.notna() & ~unevaluated
+            risk = levels.where(exposed, 'Seguro').mask(unevaluated, NOT_EVALUATED)
+            analyzed = chunk.assign(**{'SGs Abertos à Internet': open_sgs.mask(unevaluated, '')})
+            analyzed.insert(RAW_COLUMNS.index('Region') + 1, 'Risco', risk)
+            self.instances.append_frame(analyzed[INSTANCE_COLUMNS])
+
+            flagged = analyzed[exposed]
+            if not flagged.empty:
+                self.findings.append_frame(pd.DataFrame({
+                    'Risco': flagged['Risco'],
+                    'ID da Instância': flagged['InstanceId'],
+                    'Nome': flagged['Name'],
+                    'Região': flagged['Region'],
+                    'IP Público': flagged['PublicIpAddress'],
+                    'SGs Abertos à Internet': flagged['SGs Abertos à Internet'],
+                    'Recomendação': RECOMMENDATION,
+                })[FINDING_COLUMNS])
+
+        # O inventário bruto não é mais necessário
+        self._raw_instances.close()
+        self._raw_instances = None
+
+        logging.info(
+            f"Análise de segurança concluída. {len(self.findings)} instância(s) expostas à internet."
+            + (f" Instâncias não avaliadas nas regiões: {sorted(self.unevaluated_regions)}." if self.unevaluated_regions else "")
+        )
+        return self
+
+    def history_findings(self):
+        """(recurso, região, risco, detalhe) de cada instância exposta, para o histórico de execuções."""
+        if self.findings is None:
+            return
+        for chunk in self.findings.iter_chunks():
+            yield from zip(chunk['ID da Instância'], chunk['Região'], chunk['Risco'], chunk['SGs Abertos à Internet'])
+
+    def generate_report(self, output_path: str, formats: list = None):
+        """ETAPA 3 e 4: Gera as saídas finais a partir das tabelas em disco, bloco a bloco."""
+        logging.info("Gerando e formatando relatório final...")
+
+        data_frames = self.build_tables()
+        self.output_files = write_outputs(
+            output_path,
+            data_frames,
+            sheet_order=self.SHEET_ORDER,
+            formats=formats,
+            risk_columns=self.RISK_COLUMNS
+        )
+
+        logging.info(f"Relatório final gerado com sucesso em: {os.path.basename(output_path)}")
+
+    def build_tables(self):
+        """Tabelas do relatório: o inventário continua em disco (SpooledTable)."""
+        findings = self.findings
+        # Se nenhum risco foi encontrado, a aba de análise traz a mensagem positiva
+        if findings is None or findings.empty:
+            findings = pd.DataFrame([{"Risco": "Parabéns!", "ID da Instância": "Nenhuma instância exposta foi detectada."}])
+        return {
+            'EC2_Security_Analysis': findings,
+            'EC2_Instances': self.instances if self.instances is not None else pd.DataFrame(columns=INSTANCE_COLUMNS),
+            'Tendencia': self.trend_df if self.trend_df is not None else pd.DataFrame(),
+        }
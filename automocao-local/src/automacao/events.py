@@ -0,0 +1,178 @@
+import gzip  # Arquivos de log do CloudTrail são entregues compactados (.json.gz)
+import json  # Registros de eventos em JSON
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+# --- ATUALIZAÇÃO DO INVENTÁRIO POR EVENTOS ---
+# Em vez de recoletar a conta inteira, a execução por eventos lê registros de mudança do
+# CloudTrail (arquivos {"Records": [...]}, como entregues no S3) ou do EventBridge (um evento
+# por objeto, com o registro do CloudTrail em 'detail'), descobre quais recursos mudaram e
+# deixa a fábrica rebuscar só esses objetos no inventário persistido da execução anterior.
+#
+# O evento só aponta o recurso; o estado atual sempre vem de uma nova chamada à API. Por isso
+# aplicar o mesmo evento duas vezes (ou um evento de outra conta de uma trilha da organização)
+# não corrompe o inventário: no pior caso o recurso é rebuscado sem necessidade.
+
+EVENT_FILE_SUFFIXES = ('.json', '.json.gz', '.jsonl', '.jsonl.gz')
+
+# Tipos de recurso afetados pelos eventos
+SECURITY_GROUP = 'security_group'
+IAM_USER = 'iam_user'
+IAM_GROUP = 'iam_group'
+IAM_POLICY = 'iam_policy'
+
+
+def _request(field: str):
+    return lambda record: (record.get('requestParameters') or {}).get(field)
+
+
+def _response(field: str):
+    return lambda record: (record.get('responseElements') or {}).get(field)
+
+
+def _modify_rules_group(record: dict):
+    request = (record.get('requestParameters') or {}).get('ModifySecurityGroupRulesRequest') or {}
+    return request.get('GroupId')
+
+
+# Nome do evento -> (tipo do recurso, extrator do identificador a partir do registro)
+EVENT_TARGETS = {
+    # Security Groups
+    'AuthorizeSecurityGroupIngress': (SECURITY_GROUP, _request('groupId')),
+    'AuthorizeSecurityGroupEgress': (SECURITY_GROUP, _request('groupId')),
+    'RevokeSecurityGroupIngress': (SECURITY_GROUP, _request('groupId')),
+    'RevokeSecurityGroupEgress': (SECURITY_GROUP, _request('groupId')),
+    'ModifySecurityGroupRules': (SECURITY_GROUP, _modify_rules_group),
+    'CreateSecurityGroup': (SECURITY_GROUP, _response('groupId')),
+    'DeleteSecurityGroup': (SECURITY_GROUP, _request('groupId')),
+    # Usuários IAM
+    'CreateUser': (IAM_USER, _request('userName')),
+    'DeleteUser': (IAM_USER, _request('userName')),
+    'CreateAccessKey': (IAM_USER, _request('userName')),
+    'UpdateAccessKey': (IAM_USER, _request('userName')),
+    'DeleteAccessKey': (IAM_USER, _request('userName')),
+    'AttachUserPolicy': (IAM_USER, _request('userName')),
+    'DetachUserPolicy': (IAM_USER, _request('userName')),
+    'PutUserPolicy': (IAM_USER, _request('userName')),
+    'DeleteUserPolicy': (IAM_USER, _request('userName')),
+    'AddUserToGroup': (IAM_USER, _request('userName')),
+    'RemoveUserFromGroup': (IAM_USER, _request('userName')),
+    'EnableMFADevice': (IAM_USER, _request('userName')),
+    'DeactivateMFADevice': (IAM_USER, _request('userName')),
+    # Grupos e políticas gerenciadas: mudam as permissões efetivas de todos os usuários que os usam
+    'AttachGroupPolicy': (IAM_GROUP, _request('groupName')),
+    'DetachGroupPolicy': (IAM_GROUP, _request('groupName')),
+    'PutGroupPolicy': (IAM_GROUP, _request('groupName')),
+    'DeleteGroupPolicy': (IAM_GROUP, _request('groupName')),
+    'CreatePolicyVersion': (IAM_POLICY, _request('policyArn')),
+    'SetDefaultPolicyVersion': (IAM_POLICY, _request('policyArn')),
+}
+
+
+class ChangeEvent(NamedTuple):
+    """Um recurso afetado por um evento de mudança."""
+    kind: str
+    resource_id: str
+    region: str
+    event_name: str
+    event_time: datetime
+
+
+def _event_files(paths) -> list:
+    """Arquivos de eventos: os caminhos dados e, nos diretórios, os arquivos .json/.json.gz."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(EVENT_FILE_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def _load_records(path: str) -> list:
+    """Registros do CloudTrail de um arquivo: trilha ({"Records": [...]}), lista, objeto único ou JSON por linha."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as handle:
+        content = handle.read()
+    try:
+        documents = [json.loads(content)]
+    except ValueError:
+        documents = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    records = []
+    for document in documents:
+        items = document.get('Records', [document]) if isinstance(document, dict) else document
+        for item in items:
+            # EventBridge: o registro do CloudTrail vem dentro de 'detail'
+            records.append(item['detail'] if isinstance(item.get('detail'), dict) else item)
+    return records
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def read_events(paths, since: datetime = None) -> list:
+    """
+    Lê os arquivos de eventos e devolve os recursos afetados (ChangeEvent), em ordem
+    cronológica e sem repetição. Ficam de fora eventos que falharam (errorCode), eventos
+    anteriores a `since` (já refletidos no inventário) e eventos que não mudam recursos
+    acompanhados pelos relatórios.
+    """
+    changes = {}
+    counts = {'records': 0, 'failed': 0, 'old': 0, 'ignored': 0}
+    for path in _event_files(paths):
+        try:
+            records = _load_records(path)
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"Arquivo de eventos ignorado ({path}): {e}")
+            continue
+        for record in records:
+            counts['records'] += 1
+            target = EVENT_TARGETS.get(record.get('eventName'))
+            if target is None:
+                counts['ignored'] += 1
+                continue
+            if record.get('errorCode'):
+                counts['failed'] += 1
+                continue
+            event_time = _parse_time(record.get('eventTime'))
+            if since is not None and event_time is not None and event_time < since:
+                counts['old'] += 1
+                continue
+            kind, extract = target
+            resource_id = extract(record)
+            if not resource_id:
+                counts['ignored'] += 1
+                continue
+            region = record.get('awsRegion') if kind == SECURITY_GROUP else 'global'
+            event = ChangeEvent(kind, resource_id, region, record['eventName'], event_time)
+            # O evento mais recente de cada recurso representa todos (o estado é rebuscado de qualquer forma)
+            key = (kind, region, resource_id)
+            previous = changes.get(key)
+            if previous is None or (event_time and (previous.event_time is None or event_time >= previous.event_time)):
+                changes[key] = event
+
+    events = sorted(changes.values(), key=lambda e: e.event_time or datetime.min.replace(tzinfo=timezone.utc))
+    logging.info(
+        f"Eventos lidos: {counts['records']} registro(s), {len(events)} recurso(s) afetado(s) "
+        f"({counts['old']} já refletidos no inventário, {counts['failed']} com erro, {counts['ignored']} sem recurso acompanhado)."
+    )
+    return events
+
+
+def group_by_kind(events: list) -> dict:
+    """{tipo: {identificador: região}} dos recursos afetados."""
+    grouped = {}
+    for event in events:
+        grouped.setdefault(event.kind, {})[event.resource_id] = event.region
+    return grouped
@@ -0,0 +1,239 @@
+import argparse  # Consultas pela linha de comando (python -m src.automacao.history)
+import hashlib  # Identidade estável de cada achado entre execuções
+import json  # Listas e métricas guardadas como JSON nas colunas de texto
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+import sqlite3  # Banco embutido: sem servidor, um único arquivo
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+
+from .utils.config import get_config
+
+# --- HISTÓRICO DE EXECUÇÕES ---
+# Cada execução de relatório vira uma linha em `runs` (número, horários, conta, regiões,
+# duração das etapas e arquivos gerados) e os seus achados vão para `findings`, gravados em
+# lotes. O número da execução sai do banco, sem varrer a pasta de saída, e as perguntas
+# sobre o histórico ("achados abertos há mais de N execuções", "tendência de risco por
+# região") são consultas SQL indexadas, sem reabrir planilhas antigas.
+#
+# As conexões são curtas (uma por operação), então o mesmo arquivo pode ser usado pelos
+# relatórios que rodam em paralelo no modo não interativo.
+
+DEFAULT_HISTORY_FILE = os.path.join('output', 'history.sqlite')
+INSERT_BATCH_ROWS = 5000  # Achados por executemany
+DEFAULT_TREND_RUNS = 10  # Execuções mostradas na aba de tendência
+COUNTED_STATUSES = ('success', 'partial')  # Execuções que entram nas consultas de histórico
+TREND_COLUMNS = ['Execução', 'Data', 'Região', 'Alto', 'Médio', 'Baixo', 'Total']
+OPEN_COLUMNS = ['Recurso', 'Região', 'Risco', 'Detalhe', 'Execuções em aberto', 'Aberto desde (execução)']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    report TEXT NOT NULL,
+    run_number INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    account TEXT,
+    regions TEXT,
+    status TEXT NOT NULL,
+    durations TEXT,
+    output_files TEXT,
+    UNIQUE (report, run_number)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    finding_key TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    region TEXT,
+    risk TEXT NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_findings_run ON findings (run_id, risk);
+CREATE INDEX IF NOT EXISTS idx_findings_resource ON findings (resource_id);
+CREATE INDEX IF NOT EXISTS idx_findings_risk ON findings (risk);
+CREATE INDEX IF NOT EXISTS idx_findings_key ON findings (finding_key, run_id);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def finding_key(resource_id, detail) -> str:
+    """Identidade de um achado entre execuções: o recurso e o que foi encontrado nele."""
+    return hashlib.sha1(f"{resource_id}\x1f{detail}".encode('utf-8')).hexdigest()
+
+
+class RunHistory:
+    """Banco SQLite com as execuções e os achados de todos os relatórios."""
+
+    def __init__(self, path: str = None):
+        self.path = path or get_config('HISTORY_DB', DEFAULT_HISTORY_FILE)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            # WAL: leituras (consultas, aba de tendência) não bloqueiam a gravação de outro relatório
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute('PRAGMA foreign_keys=ON')
+            yield conn
+        finally:
+            conn.close()
+
+    # --- GRAVAÇÃO ---
+
+    def begin_run(self, report: str, legacy_last_run=None, status: str = 'running') -> tuple:
+        """
+        Reserva o próximo número de execução do relatório e devolve (id, número).
+        `legacy_last_run` é chamado só quando o relatório ainda não tem execuções no banco
+        (ex.: a varredura da pasta de saída), para a numeração continuar de onde parou.
+        """
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE: dois relatórios (ou processos) nunca recebem o mesmo número
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                last = conn.execute('SELECT MAX(run_number) FROM runs WHERE report = ?', (report,)).fetchone()[0]
+                if last is None and legacy_last_run is not None:
+                    last = legacy_last_run()
+                run_number = (last or 0) + 1
+                run_id = conn.execute(
+                    'INSERT INTO runs (report, run_number, started_at, status) VALUES (?, ?, ?, ?)',
+                    (report, run_number, _now(), status)
+                ).lastrowid
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return run_id, run_number
+
+    def record_findings(self, run_id: int, findings) -> int:
+        """Grava os achados (recurso, região, risco, detalhe) da execução em lotes, numa única transação."""
+        total = 0
+        with self._connect() as conn:
+            conn.execute('BEGIN')
+            try:
+                batch = []
+                for resource_id, region, risk, detail in findings:
+                    batch.append((run_id, finding_key(resource_id, detail), str(resource_id), region, risk, detail))
+                    if len(batch) >= INSERT_BATCH_ROWS:
+                        conn.executemany('INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?)', batch)
+                        total += len(batch)
+                        batch = []
+                if batch:
+                    conn.executemany('INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?)', batch)
+                    total += len(batch)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return total
+
+    def finish_run(self, run_id: int, status: str, account: str = None, regions: list = None, durations: dict = None, output_files: list = None):
+        """Fecha a execução com o status final e os dados conhecidos só ao final."""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE runs SET finished_at = ?, status = ?, account = COALESCE(?, account), regions = ?, durations = ?, output_files = ? WHERE id = ?',
+                (
+                    _now(), status, account,
+                    json.dumps(regions) if regions is not None else None,
+                    json.dumps(durations, ensure_ascii=False) if durations else None,
+                    json.dumps(output_files or [], ensure_ascii=False),
+                    run_id,
+                )
+            )
+
+    # --- CONSULTAS ---
+
+    def open_findings(self, report: str, min_runs: int) -> pd.DataFrame:
+        """
+        Achados da última execução que estão abertos há mais de `min_runs` execuções
+        seguidas (contadas só entre execuções concluídas do relatório).
+        """
+        query = """
+            WITH counted AS (
+                SELECT id, run_number, ROW_NUMBER() OVER (ORDER BY run_number) AS seq
+                FROM runs WHERE report = ? AND status IN ({statuses})
+            ),
+            latest AS (SELECT MAX(seq) AS seq FROM counted),
+            seen AS (
+                SELECT DISTINCT f.finding_key, c.seq, c.run_number
+                FROM findings f JOIN counted c ON c.id = f.run_id
+            ),
+            streaks AS (
+                -- Execuções consecutivas formam uma "ilha": seq - posição é constante dentro dela
+                SELECT finding_key, COUNT(*) AS open_runs, MIN(run_number) AS since_run, MAX(seq) AS last_seq
+                FROM (SELECT finding_key, seq, run_number, seq - ROW_NUMBER() OVER (PARTITION BY finding_key ORDER BY seq) AS island FROM seen)
+                GROUP BY finding_key, island
+            )
+            SELECT DISTINCT f.resource_id, f.region, f.risk, f.detail, s.open_runs, s.since_run
+            FROM streaks s
+            JOIN latest l ON s.last_seq = l.seq
+            JOIN counted c ON c.seq = l.seq
+            JOIN findings f ON f.run_id = c.id AND f.finding_key = s.finding_key
+            WHERE s.open_runs > ?
+            ORDER BY s.open_runs DESC, f.risk, f.resource_id
+        """.format(statuses=', '.join('?' * len(COUNTED_STATUSES)))
+        with self._connect() as conn:
+            rows = conn.execute(query, (report, *COUNTED_STATUSES, int(min_runs))).fetchall()
+        return pd.DataFrame(rows, columns=OPEN_COLUMNS)
+
+    def risk_trend(self, report: str, last_runs: int = None, current_run_id: int = None) -> pd.DataFrame:
+        """
+        Achados por nível de risco e região em cada uma das últimas execuções concluídas
+        (mais a execução em andamento `current_run_id`, quando informada).
+        """
+        query = """
+            WITH recent AS (
+                SELECT id, run_number, started_at FROM runs
+                WHERE report = ? AND (status IN ({statuses}) OR id = ?)
+                ORDER BY run_number DESC LIMIT ?
+            )
+            SELECT r.run_number, r.started_at, f.region, f.risk, COUNT(f.run_id)
+            FROM recent r LEFT JOIN findings f ON f.run_id = r.id
+            GROUP BY r.run_number, r.started_at, f.region, f.risk
+            ORDER BY r.run_number, f.region
+        """.format(statuses=', '.join('?' * len(COUNTED_STATUSES)))
+        with self._connect() as conn:
+            rows = conn.execute(query, (report, *COUNTED_STATUSES, current_run_id, int(last_runs or DEFAULT_TREND_RUNS))).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=TREND_COLUMNS)
+
+        # Uma linha por execução e região, com uma coluna por nível de risco
+        trend = {}
+        for run_number, started_at, region, risk, count in rows:
+            row = trend.setdefault((run_number, region or '-'), {
+                'Execução': run_number, 'Data': started_at, 'Região': region or '-', 'Alto': 0, 'Médio': 0, 'Baixo': 0, 'Total': 0
+            })
+            if risk is not None:
+                row[risk] = row.get(risk, 0) + count
+                row['Total'] += count
+        frame = pd.DataFrame(list(trend.values()))
+        return frame[TREND_COLUMNS + [c for c in frame.columns if c not in TREND_COLUMNS]]
+
+
+def main(argv=None):
+    """Consultas ao histórico: 'open' (achados abertos há mais de N execuções) e 'trend' (tendência por região)."""
+    parser = argparse.ArgumentParser(description="Consultas ao histórico de execuções dos relatórios.")
+    parser.add_argument('query', choices=['open', 'trend'])
+    parser.add_argument('--report', required=True, help="Prefixo do relatório (ex.: RELATORIO_VPC).")
+    parser.add_argument('--runs', type=int, default=None, help="open: mínimo de execuções em aberto (padrão 3); trend: últimas execuções (padrão 10).")
+    parser.add_argument('--db', help="Arquivo do histórico (padrão: HISTORY_DB ou output/history.sqlite).")
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.db)
+    if args.query == 'open':
+        frame = history.open_findings(args.report, args.runs if args.runs is not None else 3)
+    else:
+        frame = history.risk_trend(args.report, args.runs)
+    print(frame.to_string(index=False) if not frame.empty else "Nenhum resultado.")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
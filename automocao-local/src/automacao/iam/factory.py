@@ -1,90 +1,480 @@
 import pandas as pd
-import boto3
 import logging
 import io
-import os
+import re
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from openpyxl import load_workbook
+from botocore.exceptions import ClientError
 from ..models import IAMUser, AccessKey
-from ..utils import formatters
+from ..utils.config import get_config
+from ..utils.sinks import write_outputs
+from ..utils.cache import get_cache, cached_call, cached_pages
+from ..utils.clients import get_client
+from ..collection import ResourceSpec, collect
+from ..security_analyzer import analyze_iam_users, KEY_MAX_AGE_DAYS
+from .policies import PolicyEvaluator  # Permissões efetivas (usuário -> grupos -> políticas)
+from ..incremental import IncrementalState, analyze_incrementally, user_fingerprint, save_inventory, load_inventory
+from ..events import IAM_USER, IAM_GROUP, IAM_POLICY, group_by_kind  # Recursos afetados por eventos do CloudTrail/EventBridge
 
-# --- CRITÉRIOS DE RISCO PARA IAM ---
-ADMIN_POLICY_ARN = "arn:aws:iam::aws:policy/AdministratorAccess"
-KEY_MAX_AGE_DAYS = 90
+# --- PARÂMETROS DE COLETA ---
+DEFAULT_MAX_WORKERS = 8
+ACCESS_DENIED_CODES = {'AccessDenied', 'AccessDeniedException', 'UnauthorizedOperation'}
+NOT_FOUND_CODE = 'NoSuchEntity'
+CREDENTIAL_REPORT_MAX_POLLS = 30
+CREDENTIAL_REPORT_POLL_SECONDS = 2
+NOT_EVALUATED = 'Não avaliado'  # Usuários cujos detalhes (MFA, chaves, políticas) não puderam ser coletados
+# A idade da chave muda a cada dia: no histórico o achado fica com o limite, para ser o mesmo entre execuções
+_KEY_AGE = re.compile(r'\d+ dias')
+
+
+def _parse_report_date(value):
+    """Converte uma data do Credential Report (ISO 8601) em datetime; 'N/A' e afins viram None."""
+    if not value or value in ('N/A', 'no_information', 'not_supported'):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _user_from_details(data):
+    """Usuário do GetAccountAuthorizationDetails, já com grupos e políticas."""
+    user = IAMUser(data)
+    user.groups = list(data.get('GroupList', []))
+    user.attached_policies = [p['PolicyArn'] for p in data.get('AttachedManagedPolicies', [])]
+    user.inline_policies = [p['PolicyName'] for p in data.get('UserPolicyList', [])]
+    return user
+
+
+# Coleta em lote: uma única paginação do GetAccountAuthorizationDetails atende as quatro specs
+_AUTHORIZATION_DETAILS = {'Filter': ['User', 'Group', 'LocalManagedPolicy', 'AWSManagedPolicy']}
+IAM_BULK_SPECS = [
+    ResourceSpec('users', 'iam', 'get_account_authorization_details', 'UserDetailList', scope='global', params=_AUTHORIZATION_DETAILS, model=_user_from_details),
+    ResourceSpec('groups', 'iam', 'get_account_authorization_details', 'GroupDetailList', scope='global', params=_AUTHORIZATION_DETAILS),
+    ResourceSpec('policies', 'iam', 'get_account_authorization_details', 'Policies', scope='global', params=_AUTHORIZATION_DETAILS),
+    ResourceSpec('inline_policies', 'iam', 'get_account_authorization_details', 'UserDetailList[].{user: UserName, policies: UserPolicyList}', scope='global', params=_AUTHORIZATION_DETAILS),
+]
+# Coleta por usuário: a lista de usuários; os detalhes vêm de chamadas individuais por usuário
+IAM_USERS_SPEC = ResourceSpec('users', 'iam', 'list_users', 'Users', scope='global', model=IAMUser)
 
 class IAMReport:
     """Fábrica autônoma para criar o relatório de segurança do IAM."""
-    def __init__(self, regions_to_scan=None): # regions_to_scan é ignorado, IAM é global
+
+    # Ordem das abas e colunas de risco usadas por todas as saídas (inclusive o consolidado multi-conta)
+    SHEET_ORDER = ['IAM_Security_Analysis', 'IAM_Users', 'Delta', 'Tendencia']
+    RISK_COLUMNS = {'IAM_Security_Analysis': 'Risco', 'IAM_Users': 'Risco'}
+
+    def __init__(self, regions_to_scan=None, collection_mode=None, max_workers=None, state_path=None, session=None, inventory_path=None): # regions_to_scan é ignorado, IAM é global
+        self.session = session  # Sessão boto3 usada na coleta (padrão: credenciais do ambiente)
         self.users: list[IAMUser] = []
+        self.group_details = {}  # Nome do grupo -> detalhes (políticas inline/atreladas)
+        self.managed_policies = {}  # ARN da política -> detalhes (incluindo versões do documento)
+        self.inline_documents = {}  # Nome do usuário -> {nome da política inline: documento}
+        # 'auto' tenta a coleta em lote e cai para a coleta por usuário se faltar permissão
+        self.collection_mode = (collection_mode or get_config('IAM_COLLECTION_MODE', 'auto')).lower()
+        self.max_workers = int(max_workers or get_config('IAM_MAX_WORKERS', DEFAULT_MAX_WORKERS))
         self.findings_df = pd.DataFrame()
         self.user_risk_map = {}
+        self.state_path = state_path  # Modo incremental: estado da execução anterior
+        self.delta_df = None
+        self.trend_df = None  # Tendência de risco nas últimas execuções (montada a partir do histórico)
+        self.inventory_path = inventory_path  # Inventário persistido (atualizado por eventos)
+        self.collected_at = None  # Início da última coleta completa
+        self.unevaluated_users = set()  # Usuários com coleta de detalhes falha: ficam fora das regras
         logging.info("Fábrica de Relatório IAM iniciada.")
 
     def collect_data(self):
         """Coleta todos os dados de usuários, chaves, MFA e políticas."""
-        logging.info("Coletando dados do IAM...")
-        iam = boto3.client('iam')
-        
-        # Coleta todos os usuários
-        users_raw = iam.list_users().get('Users', [])
-        users_obj = [IAMUser(data) for data in users_raw]
-        
-        # Para cada usuário, coleta detalhes adicionais
+        logging.info(f"Coletando dados do IAM (modo: {self.collection_mode})...")
+        iam = get_client(self.session, 'iam')
+        self.collected_at = datetime.now(timezone.utc)
+        self.unevaluated_users = set()
+
+        if self.collection_mode in ('auto', 'bulk'):
+            try:
+                self.users = self._collect_bulk(iam)
+                if self.inventory_path:
+                    self.save_inventory()
+                return self
+            except ClientError as e:
+                if self.collection_mode == 'bulk' or e.response['Error']['Code'] not in ACCESS_DENIED_CODES:
+                    raise
+                logging.warning(f"Sem permissão para a coleta em lote ({e.response['Error']['Code']}). Usando coleta por usuário.")
+
+        result = collect([IAM_USERS_SPEC], session=self.session)
+        result.raise_first_error()
+        users_obj = result['users']
+        self.unevaluated_users = self._collect_per_user(iam, users_obj)
+        self.users = users_obj
+        if self.inventory_path:
+            self.save_inventory()
+        return self
+
+    def save_inventory(self):
+        """Grava usuários, grupos e políticas para a próxima execução por eventos."""
+        save_inventory(self.inventory_path, 'iam', {
+            'collected_at': self.collected_at,
+            'users': self.users,
+            'group_details': self.group_details,
+            'managed_policies': self.managed_policies,
+            'inline_documents': self.inline_documents,
+            'unevaluated_users': self.unevaluated_users,
+        })
+
+    def load_inventory(self) -> bool:
+        """Carrega o inventário persistido no lugar da coleta; False se não há inventário utilizável."""
+        data = load_inventory(self.inventory_path, 'iam')
+        if data is None:
+            return False
+        self.collected_at = data['collected_at']
+        self.users = data['users']
+        self.group_details = data['group_details']
+        self.managed_policies = data['managed_policies']
+        self.inline_documents = data['inline_documents']
+        self.unevaluated_users = data.get('unevaluated_users', set())
+        logging.info(f"Inventário carregado: {len(self.users)} usuários coletados em {self.collected_at:%Y-%m-%d %H:%M:%S} UTC.")
+        return True
+
+    def apply_events(self, events: list):
+        """
+        Coleta por eventos: rebusca só os usuários, grupos e políticas gerenciadas afetados
+        e os substitui no inventário carregado. Usuários que não existem mais são removidos.
+        A avaliação de permissões efetivas roda de novo na análise, então mudanças num grupo
+        ou numa política chegam a todos os usuários que os usam.
+        """
+        grouped = group_by_kind(events)
+        user_names = set(grouped.get(IAM_USER, {}))
+        group_names = set(grouped.get(IAM_GROUP, {}))
+        policy_arns = set(grouped.get(IAM_POLICY, {}))
+        if not (user_names or group_names or policy_arns):
+            logging.info("Nenhum evento afeta o IAM: o inventário carregado é usado sem alterações.")
+            return self
+        iam = get_client(self.session, 'iam')
+
+        # Usuários: o objeto é recriado a partir do estado atual (GetUser + chamadas por usuário)
+        refreshed, removed = {}, set()
+        for name in sorted(user_names):
+            try:
+                refreshed[name] = IAMUser(iam.get_user(UserName=name)['User'])
+            except ClientError as e:
+                if e.response['Error']['Code'] != NOT_FOUND_CODE:
+                    logging.warning(f"Falha ao rebuscar o usuário {name}: {e}. Mantido como estava.")
+                    continue
+                removed.add(name)
+        # Um usuário rebuscado pela metade (sem MFA, chaves ou políticas) não pode substituir o do inventário
+        failed = self._collect_per_user(iam, list(refreshed.values()))
+        for name in sorted(refreshed):
+            if name in failed:
+                del refreshed[name]
+                logging.warning(f"Detalhes do usuário {name} incompletos. Mantido como estava.")
+                continue
+            try:
+                documents = {policy: self._fetch_user_policy(iam, name, policy) for policy in refreshed[name].inline_policies}
+            except ClientError as e:
+                del refreshed[name]
+                logging.warning(f"Falha ao rebuscar as políticas inline do usuário {name}: {e}. Mantido como estava.")
+                continue
+            self.inline_documents[name] = documents
+        for name in removed:
+            self.inline_documents.pop(name, None)
+        # Usuários rebuscados com sucesso (ou removidos) deixam de ser "não avaliados"
+        self.unevaluated_users -= set(refreshed) | removed
+
+        # Grupos e políticas citados pelos eventos ou que passaram a ser usados pelos usuários rebuscados
+        group_names.update(g for user in refreshed.values() for g in user.groups if g not in self.group_details)
+        for name in sorted(group_names):
+            try:
+                group = self._fetch_group(iam, name)
+            except ClientError as e:
+                logging.warning(f"Falha ao rebuscar o grupo {name}: {e}. Mantido como estava.")
+                continue
+            if group is None:
+                self.group_details.pop(name, None)
+            else:
+                self.group_details[name] = group
+        policy_arns.update(arn for user in refreshed.values() for arn in user.attached_policies if arn not in self.managed_policies)
+        policy_arns.update(
+            attached['PolicyArn'] for name in group_names for attached in self.group_details.get(name, {}).get('AttachedManagedPolicies', [])
+            if attached['PolicyArn'] not in self.managed_policies
+        )
+        for arn in sorted(policy_arns):
+            try:
+                policy = self._fetch_managed_policy(iam, arn)
+            except ClientError as e:
+                logging.warning(f"Falha ao rebuscar a política {arn}: {e}. Mantida como estava.")
+                continue
+            if policy is None:
+                self.managed_policies.pop(arn, None)
+            else:
+                self.managed_policies[arn] = policy
+
+        # Substitui os usuários no lugar (mantendo a ordem do relatório); os novos vão para o fim
+        refreshed_count = len(refreshed)
+        users = [refreshed.pop(user.name, user) for user in self.users if user.name not in removed]
+        self.users = users + list(refreshed.values())
+        logging.info(
+            f"Eventos aplicados: {refreshed_count} usuário(s) rebuscados, {len(removed)} removido(s), "
+            f"{len(group_names)} grupo(s) e {len(policy_arns)} política(s) atualizados."
+        )
+        if self.inventory_path:
+            self.save_inventory()
+        return self
+
+    @staticmethod
+    def _fetch_user_policy(iam, user_name, policy_name):
+        try:
+            return cached_call(iam, 'get_user_policy', UserName=user_name, PolicyName=policy_name).get('PolicyDocument')
+        except ClientError as e:
+            logging.warning(f"Falha ao buscar a política inline {policy_name} do usuário {user_name}: {e}")
+            return None
+
+    @staticmethod
+    def _fetch_group(iam, name):
+        """Detalhes de um grupo no formato do GetAccountAuthorizationDetails; None se o grupo não existe mais."""
+        try:
+            attached = [
+                p for page in cached_pages(iam, 'list_attached_group_policies', GroupName=name)
+                for p in page.get('AttachedPolicies', [])
+            ]
+            inline_names = [n for page in cached_pages(iam, 'list_group_policies', GroupName=name) for n in page.get('PolicyNames', [])]
+            inline = [
+                {'PolicyName': policy, 'PolicyDocument': cached_call(iam, 'get_group_policy', GroupName=name, PolicyName=policy).get('PolicyDocument')}
+                for policy in inline_names
+            ]
+        except ClientError as e:
+            if e.response['Error']['Code'] == NOT_FOUND_CODE:
+                return None
+            raise
+        return {'GroupName': name, 'AttachedManagedPolicies': attached, 'GroupPolicyList': inline}
+
+    @staticmethod
+    def _fetch_managed_policy(iam, arn):
+        """Política gerenciada com o documento da versão padrão; None se a política não existe mais."""
+        try:
+            policy = cached_call(iam, 'get_policy', PolicyArn=arn)['Policy']
+            version = cached_call(iam, 'get_policy_version', PolicyArn=arn, VersionId=policy['DefaultVersionId'])['PolicyVersion']
+        except ClientError as e:
+            if e.response['Error']['Code'] == NOT_FOUND_CODE:
+                return None
+            raise
+        return {**policy, 'PolicyVersionList': [{**version, 'IsDefaultVersion': True}]}
+
+    def _collect_bulk(self, iam):
+        """
+        Monta os usuários com poucas chamadas: GetAccountAuthorizationDetails (paginado)
+        fornece grupos e políticas; o Credential Report fornece MFA, chaves e último uso.
+        """
+        # Sem dados parciais aqui: uma falha (ex.: falta de permissão) leva ao fallback por usuário
+        result = collect(IAM_BULK_SPECS, session=self.session)
+        result.raise_first_error()
+        users_obj = result['users']
+        # Guarda grupos e políticas gerenciadas para análises que dependam deles
+        self.group_details = {group['GroupName']: group for group in result['groups']}
+        self.managed_policies = {policy['Arn']: policy for policy in result['policies']}
+        self.inline_documents = {
+            item['user']: {p['PolicyName']: p.get('PolicyDocument') for p in item['policies'] or []}
+            for item in result['inline_policies'] if item['policies']
+        }
+
+        report_rows = {row['user']: row for row in self._fetch_credential_report(iam)}
+
+        # Usuários criados depois da geração do relatório não aparecem nele: coleta individual
+        missing = []
         for user in users_obj:
+            row = report_rows.get(user.name)
+            if row is None:
+                missing.append(user)
+                continue
+            user.mfa_enabled = row.get('mfa_active') == 'true'
+            user.password_last_used = _parse_report_date(row.get('password_last_used')) or 'Nunca'
+            user.access_keys = [
+                AccessKey({
+                    'AccessKeyId': f"access_key_{slot}",
+                    'Status': 'Active' if row.get(f'access_key_{slot}_active') == 'true' else 'Inactive',
+                    'CreateDate': _parse_report_date(row.get(f'access_key_{slot}_last_rotated')),
+                    'LastUsedDate': _parse_report_date(row.get(f'access_key_{slot}_last_used_date')),
+                    'LastUsedService': row.get(f'access_key_{slot}_last_used_service'),
+                })
+                for slot in (1, 2)
+                if _parse_report_date(row.get(f'access_key_{slot}_last_rotated'))
+            ]
+        if missing:
+            logging.info(f"{len(missing)} usuário(s) ausentes do Credential Report. Coletando individualmente...")
+            self.unevaluated_users = self._collect_per_user(iam, missing, with_policies=False)
+        self._resolve_flagged_key_ids(iam, [user for user in users_obj if user not in missing])
+
+        logging.info(f"Coleta em lote concluída: {len(users_obj)} usuários, {len(self.group_details)} grupos, {len(self.managed_policies)} políticas.")
+        return users_obj
+
+    def _resolve_flagged_key_ids(self, iam, users_obj):
+        """
+        O Credential Report não traz o AccessKeyId, só a posição da chave (access_key_1/2).
+        Para que a recomendação de rotação aponte a chave real, busca os identificadores com
+        ListAccessKeys apenas dos usuários com alguma chave ativa acima da idade máxima.
+        """
+        now = datetime.now(timezone.utc)
+        flagged = [
+            user for user in users_obj
+            if any(key.status == 'Active' and (now - key.create_date).days > KEY_MAX_AGE_DAYS for key in user.access_keys)
+        ]
+        if not flagged:
+            return
+
+        def fetch(user):
+            keys_raw = cached_call(iam, 'list_access_keys', UserName=user.name).get('AccessKeyMetadata', [])
+            # A data de rotação do relatório é a data de criação da chave: é por ela que as duas fontes se casam
+            ids_by_date = {key['CreateDate'].replace(microsecond=0): key['AccessKeyId'] for key in keys_raw if key.get('CreateDate')}
+            for key in user.access_keys:
+                key.id = ids_by_date.get(key.create_date.replace(microsecond=0), key.id)
+
+        logging.info(f"Buscando os identificadores das chaves de {len(flagged)} usuário(s) com chaves a rotacionar...")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='iam-keys') as executor:
+            futures = {executor.submit(fetch, user): user for user in flagged}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    # Sem o identificador a chave continua indicada pela posição no Credential Report
+                    logging.warning(f"Falha ao buscar as chaves do usuário {futures[future].name}: {e}")
+
+    def _fetch_credential_report(self, iam):
+        """Solicita a geração do Credential Report, aguarda ficar pronto e devolve as linhas do CSV."""
+        def download():
+            for _ in range(CREDENTIAL_REPORT_MAX_POLLS):
+                if iam.generate_credential_report().get('State') == 'COMPLETE':
+                    break
+                time.sleep(CREDENTIAL_REPORT_POLL_SECONDS)
+            return iam.get_credential_report()['Content']
+
+        content = get_cache().fetch(None, iam.meta.region_name or 'global', 'iam', 'credential_report', {}, download)
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        return [row for row in csv.DictReader(io.StringIO(content)) if row.get('user') != '<root_account>']
+
+    def _collect_per_user(self, iam, users_obj, with_policies=True) -> set:
+        """
+        Coleta os detalhes de cada usuário com chamadas individuais, em paralelo.
+        Devolve os nomes dos usuários cuja coleta falhou (os detalhes deles ficam incompletos).
+        """
+        def fetch(user):
             logging.info(f"Coletando detalhes para o usuário: {user.name}...")
             # Verifica MFA
-            user.mfa_enabled = bool(iam.list_mfa_devices(UserName=user.name).get('MFADevices', []))
-            
+            user.mfa_enabled = bool(cached_call(iam, 'list_mfa_devices', UserName=user.name).get('MFADevices', []))
+
             # Coleta chaves de acesso
-            keys_raw = iam.list_access_keys(UserName=user.name).get('AccessKeyMetadata', [])
+            keys_raw = cached_call(iam, 'list_access_keys', UserName=user.name).get('AccessKeyMetadata', [])
             user.access_keys = [AccessKey(key) for key in keys_raw]
 
-            # Coleta políticas atreladas diretamente
-            user.attached_policies = [p['PolicyArn'] for p in iam.list_attached_user_policies(UserName=user.name).get('AttachedPolicies', [])]
+            if not with_policies:
+                return
 
-        self.users = users_obj
-        return self
+            # Coleta políticas atreladas diretamente, políticas inline e grupos
+            user.attached_policies = [
+                p['PolicyArn']
+                for page in cached_pages(iam, 'list_attached_user_policies', UserName=user.name)
+                for p in page.get('AttachedPolicies', [])
+            ]
+            user.inline_policies = [
+                name
+                for page in cached_pages(iam, 'list_user_policies', UserName=user.name)
+                for name in page.get('PolicyNames', [])
+            ]
+            user.groups = [
+                g['GroupName']
+                for page in cached_pages(iam, 'list_groups_for_user', UserName=user.name)
+                for g in page.get('Groups', [])
+            ]
+
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='iam-collect') as executor:
+            futures = {executor.submit(fetch, user): user for user in users_obj}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.add(futures[future].name)
+                    logging.warning(f"Falha ao coletar detalhes do usuário {futures[future].name}: {e}")
+        return failed
 
     def analyze_security(self):
         """Analisa cada usuário em busca de riscos de segurança."""
         logging.info("Analisando riscos de segurança para cada usuário IAM...")
-        findings = []
-        
+        # Permissões efetivas primeiro: alimentam as regras IAM_ADMIN_EQUIVALENT e IAM_PRIVILEGE_ESCALATION
+        if not self.managed_policies:
+            logging.info("Documentos de política não coletados (coleta por usuário): a avaliação de permissões efetivas é parcial.")
+        # Usuários sem detalhes coletados ficam fora das regras: sem MFA/chaves conhecidos, qualquer achado seria falso
+        evaluated = [user for user in self.users if user.name not in self.unevaluated_users]
+        if self.unevaluated_users:
+            logging.warning(
+                f"{len(self.unevaluated_users)} usuário(s) sem detalhes coletados ficam como '{NOT_EVALUATED}': "
+                f"{sorted(self.unevaluated_users)}"
+            )
+        PolicyEvaluator(self.managed_policies, self.group_details, self.inline_documents).apply(evaluated)
+        # As verificações (MFA, idade das chaves, AdministratorAccess, permissões efetivas) são regras declarativas em IAM_RULES
+        if self.state_path:
+            # Modo incremental: só usuários alterados desde a última execução são reanalisados
+            state = IncrementalState(self.state_path)
+            self.findings_df, self.user_risk_map, self.delta_df = analyze_incrementally(
+                evaluated, lambda user: user.name, lambda user: user_fingerprint(user, KEY_MAX_AGE_DAYS),
+                analyze_iam_users, state, "Usuário", volatile=_KEY_AGE
+            )
+            state.save()
+        else:
+            self.findings_df, self.user_risk_map = analyze_iam_users(evaluated)
+        self.user_risk_map.update({name: NOT_EVALUATED for name in self.unevaluated_users})
         for user in self.users:
-            highest_risk_level = 0
-            
-            # VERIFICAÇÃO 1: MFA está ativado?
-            if not user.mfa_enabled:
-                highest_risk_level = max(highest_risk_level, 2) # Alto Risco
-                findings.append({"Risco": "Alto", "Usuário": user.name, "Achado": "MFA não está ativado", "Recomendação": "Ative a Autenticação Multi-Fator para este usuário."})
-            
-            # VERIFICAÇÃO 2: Chaves de acesso antigas ou inativas?
-            for key in user.access_keys:
-                if key.status == 'Active':
-                    age = (datetime.now(timezone.utc) - key.create_date).days
-                    if age > KEY_MAX_AGE_DAYS:
-                        highest_risk_level = max(highest_risk_level, 2) # Alto Risco
-                        findings.append({"Risco": "Alto", "Usuário": user.name, "Achado": f"Chave de Acesso ativa com {age} dias", "Recomendação": f"Rotacione a chave de acesso {key.id}."})
-
-            # VERIFICAÇÃO 3: Usuário tem permissão de Administrador?
-            if ADMIN_POLICY_ARN in user.attached_policies:
-                highest_risk_level = max(highest_risk_level, 2) # Alto Risco
-                findings.append({"Risco": "Alto", "Usuário": user.name, "Achado": "Política 'AdministratorAccess' diretamente atrelada", "Recomendação": "Conceda permissões através de grupos e use o princípio do menor privilégio."})
-
-            # Mapeia o risco final
-            if highest_risk_level == 2: self.user_risk_map[user.name] = "Alto"
-            elif highest_risk_level == 1: self.user_risk_map[user.name] = "Médio"
-            else: self.user_risk_map[user.name] = "Seguro"
-
-        self.findings_df = pd.DataFrame(findings) if findings else pd.DataFrame([{"Risco": "Parabéns!", "Usuário": "Nenhum risco comum detectado."}])
+            user.risk_level = self.user_risk_map.get(user.name, "Seguro")
         return self
 
-    def generate_report(self, output_path: str):
-        """Gera a planilha final e a salva no disco."""
-        # (Lógica para criar DataFrames, gerar o workbook em memória, formatar e salvar)
-        # Este método será muito parecido com o da VPCReport que já fizemos.
-        logging.info("Geração do relatório IAM ainda não implementada completamente.")
-        # Por enquanto, vamos apenas salvar os achados para provar que a lógica funciona
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        self.findings_df.to_excel(output_path, sheet_name="IAM_Security_Analysis", index=False)
-        logging.info(f"Relatório de análise de segurança do IAM salvo em: {output_path}")
\ No newline at end of file
+    def history_findings(self):
+        """(recurso, região, risco, detalhe) de cada achado, para o histórico de execuções."""
+        if "Usuário" not in self.findings_df:
+            return
+        findings = self.findings_df
+        for user_name, risk, finding in zip(findings["Usuário"], findings["Risco"], findings["Achado"]):
+            if risk != "Parabéns!":
+                yield user_name, 'global', risk, _KEY_AGE.sub(f"mais de {KEY_MAX_AGE_DAYS} dias", str(finding))
+
+    def generate_report(self, output_path: str, formats: list = None):
+        """Gera as saídas finais (planilha e/ou formatos colunares) e as salva no disco."""
+        logging.info("Gerando relatório IAM...")
+        # As tabelas são montadas uma única vez e reutilizadas por todos os formatos
+        data_frames = self.build_tables()
+        self.output_files = write_outputs(
+            output_path,
+            data_frames,
+            sheet_order=self.SHEET_ORDER,
+            formats=formats,
+            risk_columns=self.RISK_COLUMNS
+        )
+        logging.info(f"Relatório de análise de segurança do IAM salvo em: {output_path}")
+
+    def build_tables(self):
+        """Converte os usuários e os achados em DataFrames prontos para as saídas."""
+        users_for_df = [
+            {
+                'Usuário': user.name,
+                'Arn': user.arn,
+                'Criado em': user.create_date,
+                'Último uso de senha': user.password_last_used if isinstance(user.password_last_used, datetime) else None,
+                'MFA': 'Sim' if user.mfa_enabled else 'Não',
+                'Grupos': ", ".join(user.groups),
+                'Políticas Atreladas': "\n".join(user.attached_policies),
+                'Políticas Inline': "\n".join(user.inline_policies),
+                'Chaves Ativas': sum(1 for key in user.access_keys if key.status == 'Active'),
+                'Risco': self.user_risk_map.get(user.name, "Seguro"),
+            }
+            for user in self.users
+        ]
+        users_df = pd.DataFrame(users_for_df)
+        for column in ('Criado em', 'Último uso de senha'):
+            if column in users_df:
+                users_df[column] = pd.to_datetime(users_df[column], utc=True)
+        return {
+            'IAM_Security_Analysis': self.findings_df,
+            'IAM_Users': users_df,
+            'Delta': self.delta_df if self.delta_df is not None else pd.DataFrame(),
+            'Tendencia': self.trend_df if self.trend_df is not None else pd.DataFrame(),
+        }
@@ -0,0 +1,266 @@
+import json  # Documentos de política chegam como JSON (às vezes codificado em URL)
+import logging  # Biblioteca para registrar logs de eventos e erros
+import re
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import unquote
+
+from ..security_analyzer import ADMIN_POLICY_ARN
+
+# --- AVALIAÇÃO DE PERMISSÕES EFETIVAS ---
+# Cada documento de política é compilado uma única vez em matchers de curinga (Action,
+# NotAction) e avaliado contra um conjunto fixo de ações sensíveis ("sondas"). O veredito
+# de cada política distinta (versão padrão de uma gerenciada ou documento inline) é
+# guardado e reaproveitado por todos os usuários e grupos que a usam; o usuário só junta
+# os vereditos das suas políticas (diretas, inline e dos seus grupos).
+#
+# A avaliação é conservadora e sem contexto: condições não são avaliadas (um Allow
+# condicional conta como concedido; um Deny condicional não bloqueia) e permissões
+# restritas a ARNs específicos, sem curinga no Resource, não são consideradas.
+
+# Combinações que equivalem a administrador. As sondas com curinga ('*', 'iam:*') só casam
+# com statements que liberam o serviço inteiro (ex.: 'iam:Get*' não libera 'iam:*').
+ADMIN_EQUIVALENT_SETS = [
+    ("*",),
+    ("iam:*", "sts:AssumeRole"),
+]
+
+# Caminhos conhecidos de escalonamento de privilégios: todas as ações do caminho são necessárias
+ESCALATION_PATHS = [
+    ("iam:CreatePolicyVersion",),
+    ("iam:SetDefaultPolicyVersion",),
+    ("iam:AttachUserPolicy",),
+    ("iam:AttachGroupPolicy",),
+    ("iam:PutUserPolicy",),
+    ("iam:PutGroupPolicy",),
+    ("iam:AddUserToGroup",),
+    ("iam:CreateAccessKey",),
+    ("iam:CreateLoginProfile",),
+    ("iam:UpdateLoginProfile",),
+    ("iam:AttachRolePolicy", "sts:AssumeRole"),
+    ("iam:PutRolePolicy", "sts:AssumeRole"),
+    ("iam:UpdateAssumeRolePolicy", "sts:AssumeRole"),
+    ("iam:PassRole", "ec2:RunInstances"),
+    ("iam:PassRole", "lambda:CreateFunction", "lambda:InvokeFunction"),
+    ("iam:PassRole", "cloudformation:CreateStack"),
+    ("iam:PassRole", "glue:CreateDevEndpoint"),
+    ("lambda:UpdateFunctionCode",),
+]
+
+# Sondas que exigem Resource '*' (acesso total); as demais aceitam qualquer Resource com curinga
+FULL_RESOURCE_PROBES = {"*", "iam:*"}
+PROBES = tuple(dict.fromkeys(action for path in ADMIN_EQUIVALENT_SETS + ESCALATION_PATHS for action in path))
+
+# Políticas gerenciadas pela AWS cujo documento é conhecido (usado quando a coleta não traz o documento)
+KNOWN_DOCUMENTS = {
+    ADMIN_POLICY_ARN: {"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]},
+}
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: str):
+    """Converte um curinga do IAM ('*' e '?', sem diferenciar maiúsculas) em regex compilada."""
+    if pattern == "*:*":
+        pattern = "*"
+    regex = re.escape(pattern).replace(r"\*", ".*").replace(r"\?", ".")
+    return re.compile(f"^{regex}$", re.IGNORECASE)
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def parse_document(document) -> dict:
+    """Documento como dicionário; a API pode devolvê-lo como JSON codificado em URL."""
+    if isinstance(document, dict):
+        return document
+    if not document:
+        return {}
+    try:
+        return json.loads(unquote(document))
+    except (TypeError, ValueError) as e:
+        logging.warning(f"Documento de política inválido ignorado: {e}")
+        return {}
+
+
+class PolicyVerdict(NamedTuple):
+    """Resultado da avaliação de uma política: sondas liberadas e sondas negadas sem condição."""
+    allows: frozenset
+    denies: frozenset
+
+
+def _matches(statement: dict, action: str) -> bool:
+    if "NotAction" in statement:
+        return not any(compile_pattern(p).match(action) for p in _as_list(statement["NotAction"]))
+    return any(compile_pattern(p).match(action) for p in _as_list(statement.get("Action")))
+
+
+def _overlaps(pattern: str, probe: str) -> bool:
+    """Se o curinga `pattern` alcança alguma ação representada pela sonda curinga ('*' ou 'serviço:*')."""
+    if probe == "*":
+        return True
+    service = probe.split(":", 1)[0]
+    return bool(compile_pattern(pattern.split(":", 1)[0] if ":" in pattern else pattern).match(service))
+
+
+def _grants(statement: dict, probe: str) -> bool:
+    """
+    Se um Allow libera a sonda. Com NotAction, as sondas curinga ('*', 'iam:*') representam o
+    serviço inteiro: só são liberadas quando nenhuma ação excluída pertence a elas (ex.: a
+    PowerUserAccess, NotAction 'iam:*', não libera '*' nem 'iam:*').
+    """
+    if "NotAction" in statement and "*" in probe:
+        return not any(_overlaps(p, probe) for p in _as_list(statement["NotAction"]))
+    return _matches(statement, probe)
+
+
+def evaluate_document(document) -> PolicyVerdict:
+    """Avalia todas as sondas contra os statements de um documento."""
+    allows, denies = set(), set()
+    for statement in _as_list(parse_document(document).get("Statement")):
+        if not isinstance(statement, dict):
+            continue
+        resources = _as_list(statement.get("Resource"))
+        full_resource = "*" in resources
+        broad_resource = full_resource or "NotResource" in statement or any("*" in r for r in resources)
+        if statement.get("Effect") == "Allow":
+            if not broad_resource:
+                continue
+            allows.update(
+                probe for probe in PROBES
+                if (full_resource or probe not in FULL_RESOURCE_PROBES) and _grants(statement, probe)
+            )
+        elif statement.get("Effect") == "Deny" and full_resource and not statement.get("Condition"):
+            denies.update(probe for probe in PROBES if _matches(statement, probe))
+    return PolicyVerdict(frozenset(allows), frozenset(denies))
+
+
+class EffectivePermissions(NamedTuple):
+    """Achados de permissão de um usuário: políticas que dão acesso de administrador e caminhos de escalonamento."""
+    admin_via: tuple
+    escalation_paths: tuple
+
+
+class PolicyEvaluator:
+    """
+    Resolve usuário -> grupos -> políticas e calcula as permissões efetivas.
+
+    Os vereditos ficam em cache por política distinta (ARN + versão padrão, ou o conteúdo
+    do documento inline) e o resultado por combinação de políticas, então milhares de
+    usuários com as mesmas políticas custam uma avaliação cada.
+    """
+    def __init__(self, managed_policies: dict = None, group_details: dict = None, inline_documents: dict = None):
+        self.managed_policies = managed_policies or {}  # ARN -> detalhes (com PolicyVersionList)
+        self.group_details = group_details or {}  # Nome do grupo -> detalhes (políticas inline/atreladas)
+        self.inline_documents = inline_documents or {}  # Nome do usuário -> {nome da política: documento}
+        self._verdicts = {}  # Chave da política -> PolicyVerdict
+        self._combinations = {}  # Tupla de (rótulo, veredito, direta) -> EffectivePermissions
+
+    # --- VEREDITOS POR POLÍTICA ---
+
+    def _verdict(self, key, document) -> PolicyVerdict:
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            verdict = self._verdicts[key] = evaluate_document(document)
+        return verdict
+
+    def _managed(self, arn: str):
+        """(chave, documento) da versão padrão de uma política gerenciada; None se o documento não é conhecido."""
+        policy = self.managed_policies.get(arn)
+        if policy:
+            default = next(
+                (v for v in policy.get("PolicyVersionList", []) if v.get("IsDefaultVersion") or v.get("VersionId") == policy.get("DefaultVersionId")),
+                None
+            )
+            if default is not None:
+                return (arn, default.get("VersionId")), default.get("Document")
+        if arn in KNOWN_DOCUMENTS:
+            return (arn, None), KNOWN_DOCUMENTS[arn]
+        return None
+
+    def _inline(self, document):
+        """Documentos inline idênticos (comuns em usuários criados por automação) compartilham o veredito."""
+        key = document if isinstance(document, str) else json.dumps(document, sort_keys=True)
+        return ("inline", key), document
+
+    # --- RESOLUÇÃO USUÁRIO -> GRUPOS -> POLÍTICAS ---
+
+    def _policy_refs(self, user) -> list:
+        """
+        (rótulo exibido no achado, chave, documento, é a AdministratorAccess direta) de cada
+        política que se aplica ao usuário. A AdministratorAccess atrelada diretamente já é
+        reportada pela regra IAM_ADMIN_POLICY e não é repetida como origem do acesso total.
+        """
+        refs = []
+        for arn in user.attached_policies:
+            managed = self._managed(arn)
+            if managed:
+                refs.append((arn.rsplit("/", 1)[-1], *managed, arn == ADMIN_POLICY_ARN))
+        for name, document in self.inline_documents.get(user.name, {}).items():
+            refs.append((f"{name} (inline)", *self._inline(document), False))
+        for group_name in user.groups:
+            group = self.group_details.get(group_name, {})
+            for attached in group.get("AttachedManagedPolicies", []):
+                managed = self._managed(attached["PolicyArn"])
+                if managed:
+                    refs.append((f"{attached['PolicyArn'].rsplit('/', 1)[-1]} (grupo {group_name})", *managed, False))
+            for inline in group.get("GroupPolicyList", []):
+                refs.append((f"{inline['PolicyName']} (inline do grupo {group_name})", *self._inline(inline.get("PolicyDocument")), False))
+        return refs
+
+    def evaluate_user(self, user) -> EffectivePermissions:
+        # Políticas sem nenhuma sonda liberada ou negada (a maioria) não mudam o resultado e ficam de fora da combinação
+        verdicts = tuple(
+            (label, verdict, direct_admin)
+            for label, key, document, direct_admin in self._policy_refs(user)
+            for verdict in (self._verdict(key, document),)
+            if verdict.allows or verdict.denies
+        )
+        result = self._combinations.get(verdicts)
+        if result is None:
+            result = self._combinations[verdicts] = _combine(verdicts)
+        return result
+
+    def apply(self, users: list) -> dict:
+        """Avalia todos os usuários, grava os achados em cada IAMUser e devolve {usuário: EffectivePermissions}."""
+        results = {}
+        for user in users:
+            result = results[user.name] = self.evaluate_user(user)
+            user.admin_via = result.admin_via
+            user.escalation_paths = result.escalation_paths
+        admins = sum(1 for r in results.values() if r.admin_via)
+        escalations = sum(1 for r in results.values() if r.escalation_paths)
+        logging.info(
+            f"Permissões efetivas: {len(self._verdicts)} política(s) distintas avaliadas para {len(users)} usuário(s), "
+            f"{len(self._combinations)} combinação(ões) de políticas; {admins} com acesso de administrador, "
+            f"{escalations} com caminho de escalonamento."
+        )
+        return results
+
+
+def _combine(verdicts: list) -> EffectivePermissions:
+    """Junta os vereditos das políticas de um usuário: um Deny de qualquer política prevalece."""
+    denied = frozenset().union(*(verdict.denies for _, verdict, _ in verdicts))
+    allowed = frozenset().union(*(verdict.allows for _, verdict, _ in verdicts)) - denied
+    # Um Deny parcial quebra o curinga: com 'iam:PassRole' negado, '*' e 'iam:*' deixam de ser acesso total
+    allowed -= {probe for probe in FULL_RESOURCE_PROBES if any(compile_pattern(probe).match(action) for action in denied)}
+
+    def granted_by(actions, include_direct_admin=True) -> list:
+        return [
+            label for label, verdict, direct_admin in verdicts
+            if (include_direct_admin or not direct_admin) and verdict.allows.intersection(actions)
+        ]
+
+    admin_sets = [actions for actions in ADMIN_EQUIVALENT_SETS if allowed.issuperset(actions)]
+    if admin_sets:
+        # Quem já é administrador tem todos os caminhos de escalonamento: só o acesso total é reportado
+        via = list(dict.fromkeys(label for actions in admin_sets for label in granted_by(actions, include_direct_admin=False)))
+        return EffectivePermissions(tuple(via), ())
+
+    paths = tuple(
+        f"{' + '.join(actions)} (via {', '.join(dict.fromkeys(granted_by(actions)))})"
+        for actions in ESCALATION_PATHS if allowed.issuperset(actions)
+    )
+    return EffectivePermissions((), paths)
@@ -0,0 +1,234 @@
+import hashlib  # Para as impressões digitais (fingerprints) dos recursos
+import json  # Serialização canônica do conteúdo dos recursos
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+import pickle  # Persistência do estado entre execuções
+from datetime import datetime, timezone
+
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+
+# --- MODO INCREMENTAL ---
+# Cada execução guarda a impressão digital do conteúdo de cada recurso e os achados
+# gerados para ele. Na execução seguinte, só os recursos com impressão digital diferente
+# são reanalisados; os demais reaproveitam os achados guardados.
+
+STATE_VERSION = 2
+INVENTORY_VERSION = 1
+DELTA_COLUMNS = ["Tipo", "Recurso", "Detalhe"]
+
+
+def fingerprint(content) -> str:
+    """Hash estável de uma estrutura (dicts/listas) independente da ordem das chaves."""
+    payload = json.dumps(content, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def sg_fingerprint(sg) -> str:
+    """Conteúdo que influencia a análise e o relatório de um Security Group."""
+    return fingerprint({
+        'name': sg.name,
+        'vpc': sg.vpc_id,
+        'region': sg.region,
+        'in': sg.inbound,
+        'out': sg.outbound,
+    })
+
+
+def user_fingerprint(user, key_max_age_days: int) -> str:
+    """
+    Conteúdo que influencia a análise de um usuário IAM. Da idade da chave só entra se
+    ela passou do limite: a idade exata muda todo dia e reanalisaria (e reportaria no
+    Delta) todos os usuários com chave antiga a cada execução.
+    """
+    now = datetime.now(timezone.utc)
+    keys = []
+    for key in user.access_keys:
+        expired = bool(key.create_date) and (now - key.create_date).days > key_max_age_days
+        keys.append((key.id, key.status, str(key.create_date), expired))
+    return fingerprint({
+        'name': user.name,
+        'mfa': bool(user.mfa_enabled),
+        'keys': keys,
+        'attached': sorted(user.attached_policies),
+        'inline': sorted(user.inline_policies),
+        'groups': sorted(user.groups),
+        # Só presente com achados de permissão: mudanças no documento de uma política também reanalisam o usuário
+        **({'effective': [list(user.admin_via), list(user.escalation_paths)]} if user.admin_via or user.escalation_paths else {}),
+    })
+
+
+class IncrementalState:
+    """
+    Estado persistido entre execuções: impressões digitais, achados e risco por recurso.
+    `findings`/`risks` guardam só o resultado da análise de cada recurso (reaproveitado
+    enquanto ele não muda); `reported` guarda os achados finais, base do Delta.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fingerprints = {}
+        self.findings = {}
+        self.risks = {}
+        self.reported = {}
+        self.loaded = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'rb') as handle:
+                    data = pickle.load(handle)
+                if data.get('version') == STATE_VERSION:
+                    self.fingerprints = data['fingerprints']
+                    self.findings = data['findings']
+                    self.risks = data['risks']
+                    self.reported = data.get('reported', self.findings)
+                    self.loaded = True
+            except Exception as e:
+                logging.warning(f"Estado incremental ilegível em {path}: {e}. Executando análise completa.")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            pickle.dump({
+                'version': STATE_VERSION,
+                'fingerprints': self.fingerprints,
+                'findings': self.findings,
+                'risks': self.risks,
+                'reported': self.reported,
+            }, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+
+def save_inventory(path: str, kind: str, data: dict):
+    """
+    Grava o inventário coletado (objetos do modelo e dados auxiliares) para que a
+    execução por eventos atualize só os recursos afetados, sem recoletar a conta.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as handle:
+        pickle.dump({'version': INVENTORY_VERSION, 'kind': kind, 'data': data}, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_inventory(path: str, kind: str):
+    """Inventário gravado por save_inventory; None se não existe, é de outro relatório ou está ilegível."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as handle:
+            payload = pickle.load(handle)
+    except Exception as e:
+        logging.warning(f"Inventário persistido ilegível em {path}: {e}")
+        return None
+    if payload.get('version') != INVENTORY_VERSION or payload.get('kind') != kind:
+        return None
+    return payload['data']
+
+
+def _finding_key(record: dict, volatile=None) -> tuple:
+    """
+    Identidade de um achado para comparar execuções (sem a recomendação). Trechos que
+    mudam sem o recurso mudar (`volatile`, ex.: a idade da chave em dias) são mascarados.
+    """
+    return tuple(sorted(
+        (k, volatile.sub('*', str(v)) if volatile is not None else str(v)) for k, v in record.items() if k != "Recomendação"
+    ))
+
+
+def _describe(record: dict, id_column: str) -> str:
+    return " | ".join(str(v) for k, v in record.items() if k not in (id_column, "Recomendação") and pd.notna(v))
+
+
+def analyze_incrementally(resources: list, key_fn, fingerprint_fn, analyze_fn, state: IncrementalState, id_column: str,
+                          volatile=None, derive_fn=None):
+    """
+    Reanalisa apenas os recursos cujo conteúdo mudou desde a última execução.
+
+    Args:
+        resources: objetos do modelo (SecurityGroup, IAMUser...).
+        key_fn: recurso -> identificador (ex.: ID do SG, nome do usuário).
+        fingerprint_fn: recurso -> impressão digital do conteúdo.
+        analyze_fn: lista de recursos -> (findings_df, risk_map), ex.: analyze_sgs.
+        state: estado da execução anterior; é atualizado (mas não salvo) aqui.
+        id_column: coluna dos achados que contém o identificador do recurso.
+        volatile: regex dos trechos do achado que mudam sem o recurso mudar (ignorados no Delta).
+        derive_fn: (findings_df, risk_map) -> (findings_df, risk_map) com os achados que dependem de
+            vários recursos (ex.: exposição transitiva entre SGs). Roda sobre o resultado consolidado,
+            a cada execução, antes do Delta; o que ele acrescenta nunca é reaproveitado.
+
+    Returns:
+        (findings_df, risk_map, delta_df) para todos os recursos.
+    """
+    current_fps = {key_fn(resource): fingerprint_fn(resource) for resource in resources}
+    changed = [r for r in resources if state.fingerprints.get(key_fn(r)) != current_fps[key_fn(r)]]
+    logging.info(f"Modo incremental: {len(changed)} de {len(resources)} recurso(s) alterados serão reanalisados.")
+
+    changed_df, changed_risks = analyze_fn(changed)
+    placeholder_df, _ = analyze_fn([])
+    changed_keys = {key_fn(r) for r in changed}
+    new_findings = {key: [] for key in changed_keys}
+    if id_column in changed_df.columns:
+        for record in changed_df.to_dict('records'):
+            if record.get(id_column) in new_findings:
+                new_findings[record[id_column]].append(record)
+
+    previous_findings = state.findings
+    previous_fps = state.fingerprints
+
+    # Monta o resultado final na ordem dos recursos, reaproveitando o que não mudou
+    findings, risks, merged_findings = [], {}, {}
+    for resource in resources:
+        key = key_fn(resource)
+        if key in changed_keys:
+            records = new_findings[key]
+            risks[key] = changed_risks.get(key, "Seguro")
+        else:
+            records = previous_findings.get(key, [])
+            risks[key] = state.risks.get(key, "Seguro")
+        merged_findings[key] = records
+        findings.extend(records)
+
+    findings_df = pd.DataFrame(findings) if findings else placeholder_df
+    risk_map, reported = dict(risks), merged_findings
+    if derive_fn is not None:
+        findings_df, risk_map = derive_fn(findings_df, risk_map)
+        reported = {key: [] for key in current_fps}
+        if id_column in findings_df.columns:
+            for record in findings_df.to_dict('records'):
+                if record.get(id_column) in reported:
+                    reported[record[id_column]].append(record)
+    delta_df = _build_delta(previous_fps, current_fps, state.reported, reported, id_column, state.loaded, volatile)
+
+    state.fingerprints = current_fps
+    state.findings = merged_findings
+    state.risks = risks
+    state.reported = reported
+    return findings_df, risk_map, delta_df
+
+
+def _build_delta(previous_fps, current_fps, previous_findings, current_findings, id_column, had_previous, volatile=None):
+    """Recursos adicionados/removidos/alterados e achados novos/resolvidos desde a última execução."""
+    if not had_previous:
+        return pd.DataFrame([{"Tipo": "Linha de base", "Recurso": "-", "Detalhe": "Primeira execução incremental: estado inicial gravado."}])
+
+    rows = []
+    for key in current_fps:
+        if key not in previous_fps:
+            rows.append({"Tipo": "Recurso adicionado", "Recurso": key, "Detalhe": ""})
+        elif previous_fps[key] != current_fps[key]:
+            rows.append({"Tipo": "Recurso alterado", "Recurso": key, "Detalhe": ""})
+    for key in previous_fps:
+        if key not in current_fps:
+            rows.append({"Tipo": "Recurso removido", "Recurso": key, "Detalhe": ""})
+
+    for key in sorted(set(previous_findings) | set(current_findings), key=str):
+        before = {_finding_key(r, volatile): r for r in previous_findings.get(key, [])}
+        after = {_finding_key(r, volatile): r for r in current_findings.get(key, [])}
+        for finding_key in after.keys() - before.keys():
+            rows.append({"Tipo": "Achado novo", "Recurso": key, "Detalhe": _describe(after[finding_key], id_column)})
+        for finding_key in before.keys() - after.keys():
+            rows.append({"Tipo": "Achado resolvido", "Recurso": key, "Detalhe": _describe(before[finding_key], id_column)})
+
+    if not rows:
+        rows.append({"Tipo": "Sem mudanças", "Recurso": "-", "Detalhe": "Nenhuma alteração desde a última execução."})
+    return pd.DataFrame(rows, columns=DELTA_COLUMNS)
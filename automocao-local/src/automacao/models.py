@@ -1,26 +1,76 @@
+from sys import intern  # Strings repetidas (região, VPC, protocolo, CIDR) guardadas uma única vez
+from typing import NamedTuple
+
+# Os modelos usam __slots__ (sem __dict__ por objeto) e guardam só os campos usados pela
+# análise e pelos relatórios. As regras dos Security Groups são convertidas uma única vez
+# em tuplas imutáveis; o dicionário bruto da API não é mantido.
+
+
+def _intern(value):
+    """Interna strings (valores repetidos em milhares de objetos passam a ser compartilhados)."""
+    return intern(value) if isinstance(value, str) else value
+
+
+class PermissionRule(NamedTuple):
+    """
+    Regra de Security Group normalizada (entrada ou saída).
+
+    `ip_ranges`, `ipv6_ranges` e `group_pairs` são tuplas de (origem/destino, descrição);
+    a descrição é None quando a regra não tem uma. Sem portas definidas (ex.: All Traffic),
+    `from_port` e `to_port` são None.
+    """
+    protocol: str
+    from_port: int
+    to_port: int
+    ip_ranges: tuple
+    ipv6_ranges: tuple
+    group_pairs: tuple
+    prefix_lists: tuple
+
+    @classmethod
+    def from_api(cls, rule: dict) -> 'PermissionRule':
+        return cls(
+            _intern(str(rule.get('IpProtocol', '-1'))),
+            rule.get('FromPort'),
+            rule.get('ToPort'),
+            tuple((_intern(r.get('CidrIp')), _intern(r.get('Description'))) for r in rule.get('IpRanges', [])),
+            tuple((_intern(r.get('CidrIpv6')), _intern(r.get('Description'))) for r in rule.get('Ipv6Ranges', [])),
+            tuple((_intern(p.get('GroupId')), _intern(p.get('Description'))) for p in rule.get('UserIdGroupPairs', [])),
+            tuple(_intern(p.get('PrefixListId')) for p in rule.get('PrefixListIds', [])),
+        )
+
+
+def parse_rules(rules: list) -> tuple:
+    """Converte a lista de regras da API (IpPermissions/IpPermissionsEgress) em tuplas normalizadas."""
+    return tuple(PermissionRule.from_api(rule) for rule in rules or ())
+
+
 class SecurityGroup:
     """
     Representa um Security Group da AWS.
     """
+    __slots__ = ('id', 'name', 'description', 'vpc_id', 'region', 'inbound', 'outbound', 'risk_level')
+
     def __init__(self, sg_data: dict):
         # Pega o ID do Security Group do dicionário sg_data
         self.id = sg_data.get('GroupId')
-        
+
         # Pega o nome do Security Group
         self.name = sg_data.get('GroupName')
-        
+
         # Pega a descrição do Security Group
         self.description = sg_data.get('Description')
-        
+
         # Pega o ID da VPC à qual esse Security Group pertence
-        self.vpc_id = sg_data.get('VpcId')
-        
+        self.vpc_id = _intern(sg_data.get('VpcId'))
+
         # Pega a região AWS onde esse Security Group está localizado
-        self.region = sg_data.get('Region')
-        
-        # Armazena todos os dados brutos do Security Group para análises futuras
-        self.raw_rules = sg_data 
-        
+        self.region = _intern(sg_data.get('Region'))
+
+        # Regras de entrada e de saída, já normalizadas para a análise e os relatórios
+        self.inbound = parse_rules(sg_data.get('IpPermissions'))
+        self.outbound = parse_rules(sg_data.get('IpPermissionsEgress'))
+
         # Inicializa o nível de risco como "Seguro", podendo ser alterado depois
         self.risk_level = "Seguro"
 
@@ -29,10 +79,12 @@ class VPC:
     """
     Representa uma VPC da AWS e conterá seus recursos associados.
     """
+    __slots__ = ('id', 'name', 'region', 'security_groups')
+
     def __init__(self, vpc_data: dict):
         # Pega o ID da VPC
-        self.id = vpc_data.get('VpcId')
-        
+        self.id = _intern(vpc_data.get('VpcId'))
+
         # Procura a tag 'Name' na lista de tags da VPC e usa seu valor como nome.
         # Se não encontrar, usa o próprio ID como nome.
         self.name = next(
@@ -43,35 +95,95 @@ class VPC:
             ),
             self.id
         )
-        
+
         # Pega a região AWS onde a VPC está localizada
-        self.region = vpc_data.get('Region')
-        
+        self.region = _intern(vpc_data.get('Region'))
+
         # Inicializa uma lista vazia para armazenar os Security Groups associados a essa VPC
         self.security_groups: list[SecurityGroup] = []
 
-# Adicione estas classes ao final do seu arquivo models.py
-
 class IAMUser:
     """Representa um usuário do serviço IAM da AWS."""
+    __slots__ = (
+        'id', 'name', 'arn', 'create_date', 'password_last_used', '_groups', '_attached_policies',
+        '_inline_policies', 'mfa_enabled', 'access_keys', 'risk_level', 'admin_via', 'escalation_paths'
+    )
+
     def __init__(self, user_data: dict):
         self.id = user_data.get('UserId')
         self.name = user_data.get('UserName')
         self.arn = user_data.get('Arn')
         self.create_date = user_data.get('CreateDate')
         self.password_last_used = user_data.get('PasswordLastUsed', 'Nunca')
-        
+
         # Atributos que serão preenchidos pela fábrica
-        self.groups = []
-        self.attached_policies = []
-        self.inline_policies = []
+        self.groups = ()
+        self.attached_policies = ()
+        self.inline_policies = ()
         self.mfa_enabled = False
         self.access_keys = []
         self.risk_level = "Seguro"
 
+        # Permissões efetivas, preenchidas pela avaliação de políticas (iam/policies.py)
+        self.admin_via = ()
+        self.escalation_paths = ()
+
+    # Grupos e políticas se repetem entre usuários: guardados como tuplas de strings internadas
+
+    @property
+    def groups(self) -> tuple:
+        return self._groups
+
+    @groups.setter
+    def groups(self, values):
+        self._groups = tuple(_intern(v) for v in values)
+
+    @property
+    def attached_policies(self) -> tuple:
+        return self._attached_policies
+
+    @attached_policies.setter
+    def attached_policies(self, values):
+        self._attached_policies = tuple(_intern(v) for v in values)
+
+    @property
+    def inline_policies(self) -> tuple:
+        return self._inline_policies
+
+    @inline_policies.setter
+    def inline_policies(self, values):
+        self._inline_policies = tuple(_intern(v) for v in values)
+
 class AccessKey:
     """Representa uma chave de acesso de um usuário IAM."""
+    __slots__ = ('id', 'status', 'create_date', 'last_used_date', 'last_used_service')
+
     def __init__(self, key_data: dict):
         self.id = key_data.get('AccessKeyId')
-        self.status = key_data.get('Status')
-        self.create_date = key_data.get('CreateDate')
\ No newline at end of file
+        self.status = _intern(key_data.get('Status'))
+        self.create_date = key_data.get('CreateDate')
+        # Preenchidos apenas quando a chave vem do Credential Report
+        self.last_used_date = key_data.get('LastUsedDate')
+        self.last_used_service = _intern(key_data.get('LastUsedService'))
+
+class NetworkInterface:
+    """Representa uma interface de rede (ENI): onde os Security Groups estão de fato em uso."""
+    __slots__ = ('id', 'region', 'vpc_id', 'subnet_id', 'interface_type', 'status', 'instance_id', 'private_ip', 'public_ips', 'group_ids')
+
+    def __init__(self, eni_data: dict):
+        self.id = eni_data.get('NetworkInterfaceId')
+        self.region = _intern(eni_data.get('Region'))
+        self.vpc_id = _intern(eni_data.get('VpcId'))
+        self.subnet_id = _intern(eni_data.get('SubnetId'))
+        self.interface_type = _intern(eni_data.get('InterfaceType'))
+        self.status = _intern(eni_data.get('Status'))
+        self.instance_id = (eni_data.get('Attachment') or {}).get('InstanceId')
+        self.private_ip = eni_data.get('PrivateIpAddress')
+
+        # IP público principal e os associados a IPs privados secundários, sem repetição
+        public_ips = [(eni_data.get('Association') or {}).get('PublicIp')]
+        public_ips += [(ip.get('Association') or {}).get('PublicIp') for ip in eni_data.get('PrivateIpAddresses', [])]
+        self.public_ips = tuple(dict.fromkeys(ip for ip in public_ips if ip))
+
+        # IDs dos Security Groups associados à interface
+        self.group_ids = tuple(_intern(group.get('GroupId')) for group in eni_data.get('Groups', []))
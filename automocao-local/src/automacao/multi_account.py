@@ -0,0 +1,218 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+import multiprocessing  # Contexto 'spawn' para os processos do pool
+import os  # Biblioteca para manipulação de arquivos e diretórios
+import threading  # Trava do cache de sessões por processo
+import time  # Para medir a duração de cada conta
+from concurrent.futures import ProcessPoolExecutor, as_completed  # Pool de processos limitado
+
+import boto3  # Biblioteca oficial AWS para interagir com serviços AWS via API
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+from botocore.credentials import RefreshableCredentials  # Credenciais renovadas automaticamente antes de expirar
+
+from .utils.cache import configure_cache, get_cache
+from .utils.clients import get_client
+from .utils.config import get_config
+from .utils.credentials import session_with_credentials
+from .utils.discovery import find_active_vpc_regions
+from .utils.logger import setup_logging
+from .utils.sinks import write_outputs
+from .utils.spool import SpooledTable
+
+# --- MODO MULTI-CONTA ---
+# Cada conta é processada em um processo do pool: a role informada é assumida via STS,
+# a fábrica do relatório roda com a sessão dessa role e as tabelas voltam para o processo
+# principal, que as junta em um único relatório com a coluna Account.
+#
+# Os processos são criados com 'spawn': quando o pool sobe, o processo principal já tem
+# threads rodando (ex.: o painel de desempenho), e um fork copiaria travas seguradas por elas.
+
+DEFAULT_MAX_WORKERS = 4  # Contas processadas ao mesmo tempo
+DEFAULT_ROLE_NAME = 'OrganizationAccountAccessRole'
+DEFAULT_SESSION_SECONDS = 3600  # Validade das credenciais da role assumida
+ACCOUNTS_SHEET = 'Contas'
+
+# Sessões já criadas neste processo, por (conta, role); as credenciais se renovam sozinhas
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def parse_accounts(value: str) -> list:
+    """Lê a lista de contas: IDs separados por vírgula ou '@arquivo' com um ID por linha."""
+    if value.startswith('@'):
+        with open(value[1:], encoding='utf-8') as handle:
+            value = handle.read().replace('\n', ',')
+    accounts = []
+    for account_id in (item.strip() for item in value.split(',')):
+        if account_id and not account_id.startswith('#') and account_id not in accounts:
+            accounts.append(account_id)
+    return accounts
+
+
+def assume_role_session(account_id: str, role_name: str, base_session=None) -> boto3.Session:
+    """
+    Retorna uma sessão boto3 com as credenciais da role `role_name` na conta `account_id`.
+    As credenciais ficam em memória e são renovadas automaticamente (novo AssumeRole)
+    antes de expirar, então coletas longas não falham no meio.
+    """
+    key = (account_id, role_name)
+    with _sessions_lock:
+        if key in _sessions:
+            return _sessions[key]
+
+        sts = get_client(base_session, 'sts', get_config('AWS_REGION', 'us-east-1'))
+        params = {
+            'RoleArn': f"arn:aws:iam::{account_id}:role/{role_name}",
+            'RoleSessionName': f"automacoesaws-{account_id}",
+            'DurationSeconds': int(get_config('MULTI_ACCOUNT_SESSION_SECONDS', DEFAULT_SESSION_SECONDS)),
+        }
+        external_id = get_config('MULTI_ACCOUNT_EXTERNAL_ID')
+        if external_id:
+            params['ExternalId'] = external_id
+
+        def refresh():
+            logging.info(f"Assumindo a role {role_name} na conta {account_id}...")
+            credentials = sts.assume_role(**params)['Credentials']
+            return {
+                'access_key': credentials['AccessKeyId'],
+                'secret_key': credentials['SecretAccessKey'],
+                'token': credentials['SessionToken'],
+                'expiry_time': credentials['Expiration'].isoformat(),
+            }
+
+        credentials = RefreshableCredentials.create_from_metadata(
+            metadata=refresh(), refresh_using=refresh, method='sts-assume-role'
+        )
+        session = session_with_credentials(credentials, region_name=get_config('AWS_REGION', 'us-east-1'))
+        _sessions[key] = session
+        return session
+
+
+def _init_worker(cache_options: dict):
+    """Prepara cada processo do pool (logging e cache, como no main; o .env já vem no ambiente herdado)."""
+    setup_logging()
+    configure_cache(**cache_options)
+
+
+def _run_account(factory_class, scope: str, account_id: str, role_name: str, factory_options: dict):
+    """Executa coleta e análise de uma conta; devolve (tabelas, achados para o histórico, erro, duração)."""
+    started_at = time.monotonic()
+    try:
+        session = assume_role_session(account_id, role_name)
+        # As respostas guardadas no cache passam a ser indexadas por esta conta
+        get_cache().account = account_id
+
+        options = dict(factory_options)
+        for option in ('state_path', 'inventory_path'):
+            if options.get(option):
+                # Cada conta tem o seu próprio estado incremental e inventário persistido
+                base, extension = os.path.splitext(options[option])
+                options[option] = f"{base}_{account_id}{extension}"
+
+        if scope == 'regional':
+            discovery = find_active_vpc_regions(session)
+            if discovery.error:
+                raise RuntimeError(f"Falha na descoberta de regiões: {discovery.error}")
+            unscanned = discovery.timed_out_regions + discovery.failed_regions
+            if unscanned and not discovery.active_regions:
+                raise RuntimeError(f"Nenhuma região ativa encontrada e {len(unscanned)} região(ões) sem resposta na descoberta: {unscanned}")
+            if unscanned:
+                logging.warning(f"Conta {account_id}: regiões sem resposta na descoberta ficam fora do relatório: {unscanned}")
+            if not discovery.active_regions:
+                logging.warning(f"Conta {account_id}: nenhuma região ativa para escanear.")
+                return {}, [], None, time.monotonic() - started_at
+            factory = factory_class(
+                regions_to_scan=discovery.active_regions, prefetched_vpcs=discovery.vpcs_by_region,
+                session=session, **options
+            )
+        else:
+            factory = factory_class(session=session, **options)
+
+        data_frames = factory.collect_data().analyze_security().build_tables()
+        # Tabelas em disco (ex.: inventário de EC2) não atravessam processos: voltam como DataFrame
+        data_frames = {name: table.to_frame() if isinstance(table, SpooledTable) else table for name, table in data_frames.items()}
+        findings = list(factory.history_findings()) if hasattr(factory, 'history_findings') else []
+        return data_frames, findings, None, time.monotonic() - started_at
+    except Exception as e:
+        logging.error(f"Conta {account_id}: falha na execução: {e}")
+        return {}, [], f"{type(e).__name__}: {e}", time.monotonic() - started_at
+
+
+def run_multi_account(factory_class, scope: str, accounts: list, role_name: str, output_path: str,
+                      formats=None, factory_options=None, cache_options=None, max_workers=None, record_history=None) -> tuple:
+    """
+    Roda o relatório em todas as contas, com no máximo `max_workers` processos ao mesmo tempo,
+    e grava um relatório consolidado. As abas da fábrica ganham a coluna Account e uma aba
+    'Contas' resume o resultado de cada conta.
+
+    `record_history` recebe os achados consolidados (recurso prefixado pela conta, região,
+    risco, detalhe) e devolve a tabela de tendência, que entra no relatório consolidado.
+
+    Returns:
+        ({conta: mensagem de erro ou None}, arquivos gravados).
+    """
+    max_workers = int(max_workers or get_config('MULTI_ACCOUNT_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    max_workers = max(1, min(max_workers, len(accounts)))
+    logging.info(f"Modo multi-conta: {len(accounts)} conta(s), role '{role_name}', {max_workers} processo(s).")
+
+    results = {}
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker, initargs=(cache_options or {},)
+    ) as executor:
+        futures = {
+            executor.submit(_run_account, factory_class, scope, account_id, role_name, factory_options or {}): account_id
+            for account_id in accounts
+        }
+        for future in as_completed(futures):
+            account_id = futures[future]
+            try:
+                results[account_id] = future.result()
+            except Exception as e:
+                # Ex.: o processo do worker morreu
+                results[account_id] = ({}, [], f"{type(e).__name__}: {e}", 0.0)
+            status = "falhou" if results[account_id][2] else "concluída"
+            logging.info(f"Conta {account_id} {status} ({len(results)}/{len(accounts)}).")
+
+    # Junta as tabelas na ordem das contas informadas, com a conta como primeira coluna
+    data_frames = {}
+    for sheet_name in factory_class.SHEET_ORDER:
+        parts = [
+            results[account_id][0][sheet_name].assign(Account=account_id)
+            for account_id in accounts
+            if results[account_id][0].get(sheet_name) is not None and not results[account_id][0][sheet_name].empty
+        ]
+        if parts:
+            merged = pd.concat(parts, ignore_index=True)
+            data_frames[sheet_name] = merged[['Account'] + [c for c in merged.columns if c != 'Account']]
+
+    # Histórico: os achados de todas as contas entram na mesma execução; a conta prefixa o recurso
+    if record_history is not None:
+        trend_df = record_history(
+            (f"{account_id}:{resource_id}", region, risk, detail)
+            for account_id in accounts
+            for resource_id, region, risk, detail in results[account_id][1]
+        )
+        if trend_df is not None and 'Tendencia' in factory_class.SHEET_ORDER:
+            data_frames['Tendencia'] = trend_df
+
+    data_frames[ACCOUNTS_SHEET] = pd.DataFrame([
+        {
+            'Account': account_id,
+            'Status': 'Falha' if results[account_id][2] else 'Sucesso',
+            'Detalhe': results[account_id][2] or '',
+            'Duração (s)': round(results[account_id][3], 1),
+        }
+        for account_id in accounts
+    ])
+
+    written = write_outputs(
+        output_path,
+        data_frames,
+        sheet_order=factory_class.SHEET_ORDER + [ACCOUNTS_SHEET],
+        formats=formats,
+        risk_columns=factory_class.RISK_COLUMNS,
+    )
+    failed = [account_id for account_id in accounts if results[account_id][2]]
+    if failed:
+        logging.warning(f"{len(failed)} conta(s) com falha: {failed}")
+    return {account_id: results[account_id][2] for account_id in accounts}, written
@@ -0,0 +1,148 @@
+import importlib  # Carrega as fábricas só quando o relatório é escolhido
+import logging  # Biblioteca para registrar logs de eventos e erros
+import threading
+from collections.abc import Mapping
+
+from .utils.config import get_config
+
+# --- REGISTRO PREGUIÇOSO DE RELATÓRIOS ---
+# O menu só precisa do nome de cada relatório; a fábrica (e com ela boto3, pandas e
+# openpyxl) é importada apenas quando o relatório é executado. Cada entrada aponta para
+# a fábrica por caminho de módulo ('pacote.modulo:Classe').
+#
+# Novos relatórios entram sem editar o main.py, de duas formas:
+#   - plugins instalados que declaram um entry point no grupo 'automacao.reports'
+#     (o nome do entry point vira a chave do menu);
+#   - a variável REPORT_PLUGINS, com caminhos 'pacote.modulo:CONFIG' separados por vírgula
+#     (a chave do menu vem do campo 'key' da configuração).
+# Em ambos os casos o objeto carregado é o dicionário de configuração do relatório (as
+# mesmas chaves das entradas abaixo), num módulo leve que não importe a fábrica.
+
+ENTRY_POINT_GROUP = 'automacao.reports'
+REQUIRED_KEYS = ('name', 'factory', 'scope', 'output_dir_name', 'output_prefix')
+
+BUILTIN_REPORTS = {
+    "1": {
+        "name": "VPC e Recursos Associados",
+        "factory": f"{__package__}.vpc.factory:VPCReport",
+        "scope": "regional",
+        "output_dir_name": "vpc",
+        "output_prefix": "RELATORIO_VPC",
+        "output_formats": ["xlsx"]
+    },
+    "2": {
+        "name": "Análise de Segurança do IAM",
+        "factory": f"{__package__}.iam.factory:IAMReport",
+        "scope": "global",
+        "output_dir_name": "iam",
+        "output_prefix": "RELATORIO_IAM",
+        "output_formats": ["xlsx"]
+    },
+    "3": {
+        "name": "Inventário de Instâncias EC2",
+        "factory": f"{__package__}.ec2.factory:EC2Report",
+        "scope": "regional",
+        "output_dir_name": "ec2",
+        "output_prefix": "RELATORIO_EC2",
+        "output_formats": ["xlsx"]
+    },
+}
+
+
+def import_object(path: str):
+    """Resolve 'pacote.modulo:atributo' (importando o módulo na primeira vez)."""
+    module_name, _, attribute = path.partition(':')
+    if not attribute:
+        raise ValueError(f"Caminho inválido '{path}': use 'pacote.modulo:atributo'.")
+    obj = importlib.import_module(module_name)
+    for part in attribute.split('.'):
+        obj = getattr(obj, part)
+    return obj
+
+
+def load_factory(report_config: dict):
+    """Classe da fábrica do relatório; aceita a própria classe ou o caminho 'pacote.modulo:Classe'."""
+    factory = report_config["factory"]
+    return import_object(factory) if isinstance(factory, str) else factory
+
+
+class ReportRegistry(Mapping):
+    """
+    Dicionário chave do menu -> configuração do relatório. Os relatórios embutidos vêm
+    primeiro; os plugins são procurados no primeiro acesso e entram em seguida.
+    """
+
+    def __init__(self, builtin: dict):
+        self._reports = dict(builtin)
+        self._plugins_loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_plugins(self):
+        if self._plugins_loaded:
+            return
+        with self._lock:
+            if self._plugins_loaded:
+                return
+            for key, loader, source in self._plugin_sources():
+                try:
+                    config = loader()
+                    key = config.pop('key', key)
+                    if not key:
+                        raise ValueError("configuração sem 'key'")
+                    missing = [name for name in REQUIRED_KEYS if name not in config]
+                    if missing:
+                        raise ValueError(f"configuração sem {missing}")
+                except Exception as e:
+                    logging.warning(f"Plugin de relatório ignorado ({source}): {e}")
+                    continue
+                key = str(key)
+                if key in self._reports:
+                    logging.warning(f"Plugin de relatório ignorado ({source}): a chave '{key}' já está em uso.")
+                    continue
+                self._reports[key] = config
+            self._plugins_loaded = True
+
+    @staticmethod
+    def _plugin_sources():
+        """(chave, carregador, origem) de cada plugin: REPORT_PLUGINS e entry points instalados."""
+        sources = []
+        for path in (item.strip() for item in str(get_config('REPORT_PLUGINS', '')).split(',')):
+            if path:
+                sources.append((None, lambda path=path: dict(import_object(path)), path))
+        try:
+            from importlib.metadata import entry_points
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                sources.append((entry_point.name, lambda ep=entry_point: dict(ep.load()), f"entry point {entry_point.value}"))
+        except Exception as e:
+            logging.warning(f"Não foi possível listar os plugins de relatório instalados: {e}")
+        return sources
+
+    def __getitem__(self, key):
+        if key not in self._reports:
+            self._ensure_plugins()
+        return self._reports[key]
+
+    def __iter__(self):
+        self._ensure_plugins()
+        return iter(self._reports)
+
+    def __len__(self):
+        self._ensure_plugins()
+        return len(self._reports)
+
+    def __contains__(self, key):
+        if key in self._reports:
+            return True
+        self._ensure_plugins()
+        return key in self._reports
+
+
+_registry = None
+
+
+def get_report_registry() -> ReportRegistry:
+    """Registro compartilhado pelo processo (embutidos + plugins)."""
+    global _registry
+    if _registry is None:
+        _registry = ReportRegistry(BUILTIN_REPORTS)
+    return _registry
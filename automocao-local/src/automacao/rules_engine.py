@@ -0,0 +1,270 @@
+from datetime import datetime, timezone
+from string import Formatter  # Para decompor os templates de texto das regras
+
+import numpy as np  # Operações vetorizadas sobre as colunas das tabelas
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+
+# --- MOTOR DE REGRAS DECLARATIVAS ---
+# Os recursos (Security Groups, usuários IAM) são achatados em tabelas colunares e cada
+# regra de risco é um dicionário de dados avaliado com operações vetorizadas. Adicionar
+# uma regra é adicionar um dicionário; apenas um novo *tipo* de regra exige um avaliador.
+
+RISK_LEVELS = {"Alto": 2, "Médio": 1, "Seguro": 0}
+RISK_LABELS = {level: label for label, level in RISK_LEVELS.items()}
+
+
+# --- TABELAS COLUNARES ---
+
+def flatten_security_groups(security_groups: list) -> pd.DataFrame:
+    """
+    Achata as regras de entrada dos Security Groups em uma tabela com uma linha por
+    (grupo, regra, CIDR). Regras sem IpRanges (ex.: só referências a SGs) geram uma
+    linha com CIDR nulo, para que continuem visíveis para regras futuras.
+    """
+    rows = []
+    labels = {}  # Protocolo da API -> rótulo exibido (ex.: '-1' -> 'All'), calculado uma vez por valor
+    for pos, sg in enumerate(security_groups):
+        for idx, rule in enumerate(sg.inbound):
+            protocol = labels.get(rule.protocol)
+            if protocol is None:
+                protocol = labels[rule.protocol] = rule.protocol.upper().replace('-1', 'All')
+            # Sem portas definidas, o intervalo fica vazio (largura zero)
+            if rule.from_port is None:
+                head = (pos, idx, protocol, 0, -1, False)
+            else:
+                head = (pos, idx, protocol, rule.from_port, rule.to_port, True)
+            if rule.ip_ranges:
+                rows.extend(head + (cidr,) for cidr, _ in rule.ip_ranges)
+            else:
+                rows.append(head + (None,))
+
+    columns = list(zip(*rows)) if rows else [()] * 7
+    table = pd.DataFrame({
+        'sg_pos': np.asarray(columns[0], dtype=np.int64),
+        'rule_idx': np.asarray(columns[1], dtype=np.int64),
+        'protocol': pd.Categorical(columns[2]),
+        'from_port': np.asarray(columns[3], dtype=np.int64),
+        'to_port': np.asarray(columns[4], dtype=np.int64),
+        'has_ports': np.asarray(columns[5], dtype=bool),
+        'cidr': pd.Categorical(columns[6]),
+    })
+    ids = np.asarray([sg.id for sg in security_groups], dtype=object)
+    names = np.asarray([sg.name for sg in security_groups], dtype=object)
+    table['group_id'] = ids[table['sg_pos'].to_numpy()] if len(ids) else pd.Series(dtype=object)
+    table['group_name'] = names[table['sg_pos'].to_numpy()] if len(names) else pd.Series(dtype=object)
+    return table
+
+
+def flatten_iam_users(users: list, now: datetime = None) -> pd.DataFrame:
+    """
+    Achata os usuários IAM em uma tabela com uma linha por (usuário, chave de acesso).
+    Usuários sem chaves geram uma linha com os campos de chave nulos.
+    """
+    now = now or datetime.now(timezone.utc)
+    user_pos, key_pos, names, mfa, policies, key_ids, key_status, key_dates = [], [], [], [], [], [], [], []
+    admin_via, escalation_paths = [], []
+    for pos, user in enumerate(users):
+        keys = user.access_keys or [None]
+        admin_text = ", ".join(user.admin_via)
+        escalation_text = "; ".join(user.escalation_paths)
+        for kpos, key in enumerate(keys):
+            user_pos.append(pos)
+            key_pos.append(kpos)
+            names.append(user.name)
+            mfa.append(bool(user.mfa_enabled))
+            policies.append(tuple(user.attached_policies))
+            key_ids.append(key.id if key else None)
+            key_status.append(key.status if key else None)
+            key_dates.append(key.create_date if key else None)
+            admin_via.append(admin_text)
+            escalation_paths.append(escalation_text)
+
+    table = pd.DataFrame({
+        'user_pos': np.asarray(user_pos, dtype=np.int64),
+        'key_pos': np.asarray(key_pos, dtype=np.int64),
+        'user_name': names,
+        'mfa_enabled': np.asarray(mfa, dtype=bool),
+        'attached_policies': policies,
+        'key_id': key_ids,
+        'key_status': key_status,
+        'key_create_date': pd.to_datetime(pd.Series(key_dates, dtype=object), utc=True),
+        'admin_via': admin_via,
+        'escalation_paths': escalation_paths,
+    })
+    table['admin_equivalent'] = table['admin_via'] != ''
+    table['privilege_escalation'] = table['escalation_paths'] != ''
+    table['key_age_days'] = (pd.Timestamp(now) - table['key_create_date']).dt.days.astype('Int64')
+    return table
+
+
+# --- AVALIADORES (um por tipo de regra) ---
+
+def _port_rows(table):
+    """Linhas com portas específicas (exclui 'All' e regras sem portas)."""
+    return table['has_ports'] & (table['protocol'] != 'All')
+
+
+def _ports_in_range(table, ports):
+    """Para cada linha, quantas portas do conjunto caem no intervalo [from_port, to_port]."""
+    from_ports = table['from_port'].to_numpy()
+    to_ports = table['to_port'].to_numpy()
+    counts = np.zeros(len(table), dtype=np.int64)
+    for port in ports:
+        counts += (from_ports <= port) & (to_ports >= port)
+    return counts
+
+
+def _eval_all_traffic(table, rule):
+    return (table['protocol'] == 'All') | ~table['has_ports']
+
+
+def _eval_port_set(table, rule):
+    return _port_rows(table) & (_ports_in_range(table, rule['ports']) > 0)
+
+
+def _eval_port_complement(table, rule):
+    width = table['to_port'] - table['from_port'] + 1
+    return _port_rows(table) & (width > _ports_in_range(table, rule['exclude_ports']))
+
+
+def _eval_equals(table, rule):
+    return table[rule['column']] == rule['value']
+
+
+def _eval_greater_than(table, rule):
+    return table[rule['column']] > rule['value']
+
+
+def _eval_contains(table, rule):
+    exploded = table[rule['column']].explode()
+    return (exploded == rule['value']).groupby(level=0).any().reindex(table.index, fill_value=False)
+
+
+EVALUATORS = {
+    'all_traffic': _eval_all_traffic,
+    'port_set': _eval_port_set,
+    'port_complement': _eval_port_complement,
+    'equals': _eval_equals,
+    'greater_than': _eval_greater_than,
+    'contains': _eval_contains,
+}
+
+
+def rule_mask(table: pd.DataFrame, rule: dict) -> pd.Series:
+    """Avalia uma regra sobre a tabela inteira, aplicando os predicados comuns (CIDR e 'where')."""
+    # Comparações com valores ausentes (ex.: usuário sem chave) resultam em NA: tratadas como não-casamento
+    mask = EVALUATORS[rule['tipo']](table, rule).fillna(False).astype(bool)
+    if rule.get('cidrs'):
+        mask &= table['cidr'].isin(rule['cidrs'])
+    for column, value in rule.get('where', {}).items():
+        mask &= table[column] == value
+    return mask
+
+
+def run_rules(table: pd.DataFrame, rules: list, order_by: list) -> pd.DataFrame:
+    """
+    Executa todas as regras sobre a tabela e retorna as linhas que casaram, com as
+    colunas 'rule_order' e 'Risco', ordenadas por `order_by`. Cada regra é deduplicada
+    pelas colunas de 'scope' (ex.: um achado por regra do SG, mesmo que vários CIDRs casem).
+    """
+    matches = []
+    for order, rule in enumerate(rules):
+        matched = table[rule_mask(table, rule)]
+        if matched.empty:
+            continue
+        if rule.get('scope'):
+            matched = matched.drop_duplicates(subset=rule['scope'])
+        matched = matched.assign(rule_order=order, Risco=rule['severity'])
+        matches.append(matched)
+    if not matches:
+        return table.iloc[0:0].assign(rule_order=pd.Series(dtype=np.int64), Risco=pd.Series(dtype=object))
+    return pd.concat(matches, ignore_index=True).sort_values(order_by, kind='stable', ignore_index=True)
+
+
+def risk_map(matches: pd.DataFrame, keys: list, position_column: str) -> dict:
+    """Consolida o maior nível de risco por recurso; recursos sem achados ficam como 'Seguro'."""
+    levels = np.zeros(len(keys), dtype=np.int64)
+    if not matches.empty:
+        worst = matches['Risco'].map(RISK_LEVELS).groupby(matches[position_column]).max()
+        levels[worst.index.to_numpy()] = worst.to_numpy()
+    return {key: RISK_LABELS[level] for key, level in zip(keys, levels.tolist())}
+
+
+# --- DESCRIÇÃO DAS PORTAS AFETADAS ---
+
+def intersect_ports(from_port: int, to_port: int, ports) -> list:
+    """Portas do conjunto contidas no intervalo, em ordem."""
+    return [port for port in sorted(ports) if from_port <= port <= to_port]
+
+
+def port_gaps(from_port: int, to_port: int, excluded) -> list:
+    """Sub-intervalos (início, fim) de [from_port, to_port] que não contêm portas excluídas."""
+    gaps = []
+    start = from_port
+    for port in sorted(excluded):
+        if port < start or port > to_port:
+            continue
+        if port > start:
+            gaps.append((start, port - 1))
+        start = port + 1
+    if start <= to_port:
+        gaps.append((start, to_port))
+    return gaps
+
+
+def format_port_intervals(intervals) -> str:
+    """Formata uma lista de intervalos (início, fim) como texto, ex.: '22, 1000-2000'."""
+    return ", ".join(f"{start}" if start == end else f"{start}-{end}" for start, end in intervals)
+
+
+def describe_affected_ports(rule: dict, from_port: int, to_port: int) -> str:
+    """Texto das portas afetadas por um achado, conforme o tipo da regra."""
+    if rule['tipo'] == 'port_set':
+        return format_port_intervals([(p, p) for p in intersect_ports(from_port, to_port, rule['ports'])])
+    if rule['tipo'] == 'port_complement':
+        return format_port_intervals(port_gaps(from_port, to_port, rule['exclude_ports']))
+    if rule['tipo'] == 'all_traffic':
+        return "TODAS"
+    return None
+
+
+def _render_template(template: str, frame: pd.DataFrame) -> pd.Series:
+    """Preenche um template ('Chave {key_id}') de forma vetorizada, concatenando colunas."""
+    result = pd.Series("", index=frame.index, dtype=object)
+    for literal, field, _, _ in Formatter().parse(template):
+        result = result + literal
+        if field is not None:
+            result = result + frame[field].astype(str).to_numpy(dtype=object)
+    return result
+
+
+def render_findings(matches: pd.DataFrame, rules: list, columns: dict) -> pd.DataFrame:
+    """
+    Transforma as linhas casadas no DataFrame de achados. `columns` mapeia o nome da
+    coluna de saída para um campo da linha ou para a chave do template na regra.
+    Os textos são montados por regra, com concatenação vetorizada de colunas.
+    """
+    if matches.empty:
+        return pd.DataFrame(columns=list(columns))
+    frame = matches.reset_index(drop=True)
+    if 'from_port' in frame:
+        from_text = frame['from_port'].astype(str)
+        frame = frame.assign(port_label=from_text.where(
+            frame['from_port'] == frame['to_port'], from_text + '-' + frame['to_port'].astype(str)
+        ))
+
+    output = {name: np.empty(len(frame), dtype=object) for name in columns}
+    for order, group in frame.groupby('rule_order', sort=False):
+        rule = rules[order]
+        rows = group.index.to_numpy()  # Após o reset_index, o índice é a posição na saída
+        if 'from_port' in group:
+            # Poucos intervalos distintos se repetem muito: calcula cada descrição uma única vez
+            pairs = list(zip(group['from_port'].tolist(), group['to_port'].tolist()))
+            described = {pair: describe_affected_ports(rule, *pair) for pair in set(pairs)}
+            group = group.assign(affected_ports=[described[pair] for pair in pairs])
+        for name, source in columns.items():
+            if source in rule:
+                output[name][rows] = _render_template(rule[source], group).to_numpy(dtype=object)
+            elif source in group:
+                output[name][rows] = group[source].to_numpy(dtype=object)
+    return pd.DataFrame(output)
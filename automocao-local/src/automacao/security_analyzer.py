@@ -1,136 +1,201 @@
 import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
 import logging  # Biblioteca para registrar logs de eventos e erros
+from collections import namedtuple
+
+from .rules_engine import flatten_security_groups, flatten_iam_users, run_rules, risk_map, render_findings
+from .utils.memo import get_rule_set_memo, analysis_key
 
 # --- CRITÉRIOS DE RISCO ---
 HIGH_RISK_PORTS = {22, 3389, 3306, 5432, 1433, 27017}  # Portas críticas (SSH, RDP, bancos de dados)
 ACCEPTABLE_PUBLIC_PORTS = {80, 443}  # Portas web públicas consideradas aceitáveis
 ANYWHERE_CIDR = '0.0.0.0/0'  # Representa acesso aberto para qualquer IP na internet
 
+ADMIN_POLICY_ARN = "arn:aws:iam::aws:policy/AdministratorAccess"
+KEY_MAX_AGE_DAYS = 90
+
+# --- REGRAS DECLARATIVAS ---
+# Cada regra é avaliada pelo motor em rules_engine.py. A ordem da lista define a ordem
+# dos achados dentro de cada recurso. Para uma nova verificação basta adicionar um item.
+
+SG_RULES = [
+    {
+        "id": "SG_ALL_TRAFFIC",
+        "tipo": "all_traffic",
+        "cidrs": {ANYWHERE_CIDR},
+        "scope": ["sg_pos", "rule_idx"],
+        "severity": "Médio",
+        "regra": "Entrada {protocol}:TODAS de {cidr}",
+        "recomendacao": "Acesso de todas as portas liberado para a internet. Especifique as portas necessárias.",
+    },
+    {
+        "id": "SG_HIGH_RISK_PORTS",
+        "tipo": "port_set",
+        "ports": HIGH_RISK_PORTS,
+        "cidrs": {ANYWHERE_CIDR},
+        "scope": ["sg_pos", "rule_idx"],
+        "severity": "Alto",
+        "regra": "Entrada {protocol}:{port_label} de {cidr}",
+        "recomendacao": "Acesso crítico (gerenciamento/BD) exposto à internet. RESTRINJA a origem.",
+    },
+    {
+        "id": "SG_NON_STANDARD_PORTS",
+        "tipo": "port_complement",
+        "exclude_ports": HIGH_RISK_PORTS | ACCEPTABLE_PUBLIC_PORTS,
+        "cidrs": {ANYWHERE_CIDR},
+        "scope": ["sg_pos", "rule_idx"],
+        "severity": "Médio",
+        "regra": "Entrada {protocol}:{port_label} de {cidr}",
+        "recomendacao": "Porta não-padrão exposta à internet. Verifique a necessidade.",
+    },
+]
+
+IAM_RULES = [
+    {
+        "id": "IAM_NO_MFA",
+        "tipo": "equals",
+        "column": "mfa_enabled",
+        "value": False,
+        "scope": ["user_pos"],
+        "severity": "Alto",
+        "achado": "MFA não está ativado",
+        "recomendacao": "Ative a Autenticação Multi-Fator para este usuário.",
+    },
+    {
+        "id": "IAM_OLD_ACCESS_KEY",
+        "tipo": "greater_than",
+        "column": "key_age_days",
+        "value": KEY_MAX_AGE_DAYS,
+        "where": {"key_status": "Active"},
+        "severity": "Alto",
+        "achado": "Chave de Acesso ativa com {key_age_days} dias",
+        "recomendacao": "Rotacione a chave de acesso {key_id}.",
+    },
+    {
+        "id": "IAM_ADMIN_POLICY",
+        "tipo": "contains",
+        "column": "attached_policies",
+        "value": ADMIN_POLICY_ARN,
+        "scope": ["user_pos"],
+        "severity": "Alto",
+        "achado": "Política 'AdministratorAccess' diretamente atrelada",
+        "recomendacao": "Conceda permissões através de grupos e use o princípio do menor privilégio.",
+    },
+    {
+        # Permissões efetivas calculadas em iam/policies.py (grupos, inline, políticas próprias)
+        "id": "IAM_ADMIN_EQUIVALENT",
+        "tipo": "equals",
+        "column": "admin_equivalent",
+        "value": True,
+        "scope": ["user_pos"],
+        "severity": "Alto",
+        "achado": "Permissões equivalentes a administrador via {admin_via}",
+        "recomendacao": "Substitua os curingas ('*', 'iam:*') por ações específicas e aplique o princípio do menor privilégio.",
+    },
+    {
+        "id": "IAM_PRIVILEGE_ESCALATION",
+        "tipo": "equals",
+        "column": "privilege_escalation",
+        "value": True,
+        "scope": ["user_pos"],
+        "severity": "Alto",
+        "achado": "Caminho de escalonamento de privilégios: {escalation_paths}",
+        "recomendacao": "Restrinja essas ações a recursos específicos ou remova-as; elas permitem que o usuário amplie as próprias permissões.",
+    },
+]
+
+SG_FINDING_COLUMNS = {
+    "Risco": "Risco",
+    "ID do Security Group": "group_id",
+    "Nome do Grupo": "group_name",
+    "Regra Problemática": "regra",
+    "Portas Afetadas": "affected_ports",
+    "Recomendação": "recomendacao",
+}
+
+IAM_FINDING_COLUMNS = {
+    "Risco": "Risco",
+    "Usuário": "user_name",
+    "Achado": "achado",
+    "Recomendação": "recomendacao",
+}
+
+# Um conjunto de regras de entrada analisado isoladamente, sem grupo associado
+_RuleSetView = namedtuple('_RuleSetView', ['id', 'name', 'inbound'])
+_SG_IDENTITY_COLUMNS = ("ID do Security Group", "Nome do Grupo")
+_SG_RULE_COLUMNS = [column for column in SG_FINDING_COLUMNS if column not in _SG_IDENTITY_COLUMNS]
+
+def _analyze_rule_sets(rule_sets: list) -> list:
+    """
+    Avalia SG_RULES sobre conjuntos distintos de regras de entrada, em um único lote
+    vetorizado. Para cada conjunto retorna (linhas de achado sem ID/nome do grupo, risco).
+    """
+    views = [_RuleSetView(None, None, rules) for rules in rule_sets]
+    table = flatten_security_groups(views)
+    matches = run_rules(table, SG_RULES, order_by=["sg_pos", "rule_idx", "rule_order"])
+    findings_df = render_findings(matches, SG_RULES, SG_FINDING_COLUMNS)
+    risks = risk_map(matches, list(range(len(views))), "sg_pos")
+
+    rows_by_set = [[] for _ in views]
+    if not findings_df.empty:
+        records = zip(*(findings_df[column].tolist() for column in _SG_RULE_COLUMNS))
+        for pos, record in zip(matches['sg_pos'].tolist(), records):
+            rows_by_set[pos].append(record)
+    return [(tuple(rows_by_set[pos]), risks[pos]) for pos in range(len(views))]
+
 def analyze_sgs(security_groups: list):
     """
     Analisa uma LISTA de objetos SecurityGroup e retorna:
     - um DataFrame com os riscos encontrados,
     - um dicionário mapeando o nível de risco de cada Security Group para uso em coloração.
+
+    Grupos com as mesmas regras de entrada compartilham o resultado: cada conjunto distinto
+    é avaliado uma única vez (memo compartilhado) e os achados são replicados para os grupos.
     """
     logging.info("Analisando objetos Security Group para riscos...")  # Log do início da análise
-    findings = []  # Lista para armazenar os achados de risco detalhados
-    sg_risk_map = {}  # Dicionário para mapear o nível de risco final de cada Security Group
-
-    # Itera sobre cada Security Group recebido
-    for sg in security_groups:
-        highest_risk_level = 0  # Inicializa o nível de risco para este SG (0=Seguro,1=Médio,2=Alto)
-
-        # Analisa as regras de entrada (Inbound) do Security Group, acessando dados brutos
-        for rule in sg.raw_rules.get('IpPermissions', []):
-            # Verifica se a regra está aberta para todo o mundo (0.0.0.0/0)
-            is_open_to_world = any(
-                ip_range.get('CidrIp') == ANYWHERE_CIDR
-                for ip_range in rule.get('IpRanges', [])
-            )
-            if not is_open_to_world:
-                continue  # Se não estiver aberta para o mundo, ignora essa regra e vai para a próxima
-
-            # Obtém as portas inicial e final da regra
-            from_port = rule.get('FromPort')
-            to_port = rule.get('ToPort')
-            # Obtém o protocolo da regra, substitui '-1' por 'All' e converte para maiúsculas
-            protocol = str(rule.get('IpProtocol', '-1')).upper().replace('-1', 'All')
-            
-            # Se a regra libera todas as portas (protocolo 'All' ou portas não especificadas)
-            if protocol == 'All' or from_port is None:
-                # Atualiza o nível de risco para pelo menos médio
-                highest_risk_level = max(highest_risk_level, 1)
-                # Adiciona um achado detalhado para essa regra de alto risco
-                findings.append({
-                    "Risco": "Médio",
-                    "ID do Security Group": sg.id,
-                    "Nome do Grupo": sg.name,
-                    "Regra Problemática": f"Entrada {protocol}:TODAS de {ANYWHERE_CIDR}",
-                    "Recomendação": "Acesso de todas as portas liberado para a internet. Especifique as portas necessárias."
-                })
-                continue  # Passa para próxima regra
-
-            # Se portas específicas foram definidas, analisa cada porta individualmente
-            for port in range(from_port, to_port + 1):
-                rule_text = f"Entrada {protocol}:{port} de {ANYWHERE_CIDR}"
-                # Verifica se a porta é crítica (alto risco)
-                if port in HIGH_RISK_PORTS:
-                    highest_risk_level = max(highest_risk_level, 2)  # Atualiza para alto risco
-                    findings.append({
-                        "Risco": "Alto",
-                        "ID do Security Group": sg.id,
-                        "Nome do Grupo": sg.name,
-                        "Regra Problemática": rule_text,
-                        "Recomendação": "Acesso crítico (gerenciamento/BD) exposto à internet. RESTRINJA a origem."
-                    })
-                # Verifica se a porta é diferente das portas públicas padrão (risco médio)
-                elif port not in ACCEPTABLE_PUBLIC_PORTS:
-                    highest_risk_level = max(highest_risk_level, 1)  # Atualiza para médio risco
-                    findings.append({
-                        "Risco": "Médio",
-                        "ID do Security Group": sg.id,
-                        "Nome do Grupo": sg.name,
-                        "Regra Problemática": rule_text,
-                        "Recomendação": "Porta não-padrão exposta à internet. Verifique a necessidade."
-                    })
-
-        # Após analisar todas as regras, mapeia o nível de risco final para o ID do Security Group
-        if highest_risk_level == 2:
-            sg_risk_map[sg.id] = "Alto"
-        elif highest_risk_level == 1:
-            sg_risk_map[sg.id] = "Médio"
-        else:
-            sg_risk_map[sg.id] = "Seguro"
-            
+
+    # Achata as regras em uma tabela (grupo, regra, CIDR) e avalia SG_RULES de forma vetorizada,
+    # apenas para os conjuntos de regras ainda não analisados
+    results = get_rule_set_memo().get_many('sg_analysis', [analysis_key(sg.inbound) for sg in security_groups], _analyze_rule_sets)
+
+    # Replica os achados de cada conjunto para os grupos que o usam, na ordem dos grupos
+    output = {column: [] for column in SG_FINDING_COLUMNS}
+    sg_risk_map = {}
+    for sg, (rows, risk) in zip(security_groups, results):
+        sg_risk_map[sg.id] = risk
+        if not rows:
+            continue
+        output["ID do Security Group"].extend([sg.id] * len(rows))
+        output["Nome do Grupo"].extend([sg.name] * len(rows))
+        for column, values in zip(_SG_RULE_COLUMNS, zip(*rows)):
+            output[column].extend(values)
+    findings_df = pd.DataFrame(output)
+    total_findings = len(findings_df)
+
     # Se nenhum risco foi encontrado, cria um DataFrame com mensagem positiva
-    if not findings:
+    if findings_df.empty:
         findings_df = pd.DataFrame([{
             "Risco": "Parabéns!",
             "ID do Security Group": "Nenhum risco comum foi detectado."
         }])
-    else:
-        # Caso contrário, cria DataFrame com todos os achados detalhados
-        findings_df = pd.DataFrame(findings)
 
-    logging.info(f"Análise de segurança concluída. {len(findings)} riscos individuais encontrados.")
+    logging.info(f"Análise de segurança concluída. {total_findings} achados agregados encontrados.")
     # Retorna o DataFrame com achados e o mapa de risco para cada Security Group
     return findings_df, sg_risk_map
 
-# ... (a função analyze_sgs e as constantes de risco para VPC permanecem aqui) ...
-
 def analyze_iam_users(users: list):
     """
     Analisa uma LISTA de objetos IAMUser e retorna findings e mapa de risco.
     """
     logging.info("Analisando objetos IAM User para riscos de segurança...")
-    findings = []
-    user_risk_map = {}
-    
-    from datetime import datetime, timezone
-    ADMIN_POLICY_ARN = "arn:aws:iam::aws:policy/AdministratorAccess"
-    KEY_MAX_AGE_DAYS = 90
-
-    for user in users:
-        highest_risk_level = 0
-
-        # Verificação 1: MFA está ativado?
-        if not user.mfa_enabled:
-            highest_risk_level = max(highest_risk_level, 2) # Alto Risco
-            findings.append({"Risco": "Alto", "Usuário": user.name, "Achado": "MFA não está ativado", "Recomendação": "Ative a Autenticação Multi-Fator."})
-        
-        # Verificação 2: Chaves de acesso antigas?
-        for key in user.access_keys:
-            if key.status == 'Active':
-                age = (datetime.now(timezone.utc) - key.create_date).days
-                if age > KEY_MAX_AGE_DAYS:
-                    highest_risk_level = max(highest_risk_level, 2) # Alto Risco
-                    findings.append({"Risco": "Alto", "Usuário": user.name, "Achado": f"Chave de Acesso ativa com {age} dias", "Recomendação": f"Rotacione a chave {key.id}."})
-        
-        # Mapeia o risco final para o usuário
-        if highest_risk_level == 2: user_risk_map[user.name] = "Alto"
-        elif highest_risk_level == 1: user_risk_map[user.name] = "Médio"
-        else: user_risk_map[user.name] = "Seguro"
-
-    findings_df = pd.DataFrame(findings) if findings else pd.DataFrame([{"Risco": "Parabéns!", "Usuário": "Nenhum risco comum detectado."}])
-    logging.info(f"Análise de IAM concluída. {len(findings)} riscos encontrados.")
+
+    # Achata os usuários em uma tabela (usuário, chave) e avalia IAM_RULES de forma vetorizada
+    table = flatten_iam_users(users)
+    matches = run_rules(table, IAM_RULES, order_by=["user_pos", "rule_order", "key_pos"])
+    findings_df = render_findings(matches, IAM_RULES, IAM_FINDING_COLUMNS)
+    user_risk_map = risk_map(matches, [user.name for user in users], "user_pos")
+    total_findings = len(findings_df)
+
+    if findings_df.empty:
+        findings_df = pd.DataFrame([{"Risco": "Parabéns!", "Usuário": "Nenhum risco comum detectado."}])
+    logging.info(f"Análise de IAM concluída. {total_findings} riscos encontrados.")
     return findings_df, user_risk_map
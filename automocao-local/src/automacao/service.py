@@ -0,0 +1,335 @@
+import hmac  # Comparação do token de acesso em tempo constante
+import json  # Corpo das respostas da API
+import logging  # Biblioteca para registrar logs de eventos e erros
+import threading  # Agendador, travas do estado quente e servidor HTTP com threads
+import time  # Para medir a duração e a idade de cada inventário
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # API HTTP local, sem dependências novas
+from urllib.parse import parse_qs, urlparse
+
+import boto3  # Biblioteca oficial AWS para interagir com serviços AWS via API
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+
+from .utils.config import get_config
+from .utils.credentials import validate_aws_credentials
+from .utils.discovery import find_active_vpc_regions
+from .registry import load_factory
+from .utils.sinks import resolve_formats
+
+# --- MODO SERVIÇO (DAEMON) ---
+# Um processo de longa duração mantém quentes a sessão AWS (credenciais já validadas), o
+# pool de clientes boto3 e o último inventário coletado e analisado de cada relatório.
+# Um agendador recoleta os inventários em segundo plano; a API HTTP local gera os
+# arquivos e devolve as tabelas a partir do estado quente, sem repetir a coleta.
+#
+# Rotas (JSON):
+#   GET  /health                          identidade, uptime e última atualização
+#   GET  /reports                         estado de cada relatório
+#   GET  /reports/<chave>                 estado e abas disponíveis de um relatório
+#   GET  /reports/<chave>/sheets/<aba>    linhas de uma aba (?offset=0&limit=1000)
+#   POST /reports/<chave>/refresh         recoleta em segundo plano (?wait=1 espera terminar)
+#   POST /reports/<chave>/generate        grava os arquivos do relatório (?formats=xlsx,csv)
+#   POST /refresh                         recoleta todos os relatórios do serviço
+
+DEFAULT_HOST = '127.0.0.1'  # Só a máquina local: os relatórios contêm dados sensíveis
+DEFAULT_PORT = 8765
+DEFAULT_REFRESH_SECONDS = 900  # Intervalo entre as recoletas agendadas; 0 desativa o agendador
+DEFAULT_PAGE_LIMIT = 1000  # Linhas por resposta na leitura das abas
+MAX_PAGE_LIMIT = 50000
+
+
+class ServiceError(Exception):
+    """Erro de uso da API, devolvido ao cliente com o status HTTP informado."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class WarmReport:
+    """Estado quente de um relatório: a fábrica já coletada e analisada e as tabelas prontas."""
+
+    def __init__(self, key: str, config: dict):
+        self.key = key
+        self.config = config
+        self.factory = None
+        self.tables = None  # Montadas na primeira leitura e reaproveitadas até a próxima recoleta
+        self.refreshed_at = None
+        self.durations = {}
+        self.status = 'pending'
+        self.error = None
+        self.output_files = []
+        self.lock = threading.Lock()  # Serializa a leitura das tabelas e a gravação dos arquivos
+
+    def describe(self) -> dict:
+        age = time.time() - self.refreshed_at if self.refreshed_at else None
+        return {
+            'report': self.key,
+            'name': self.config['name'],
+            'status': self.status,
+            'error': self.error,
+            'refreshed_at': datetime.fromtimestamp(self.refreshed_at, timezone.utc).isoformat(timespec='seconds') if self.refreshed_at else None,
+            'age_seconds': round(age, 1) if age is not None else None,
+            'durations': self.durations,
+            'sheets': list(self.factory.SHEET_ORDER) if self.factory is not None else [],
+            'output_files': self.output_files,
+        }
+
+
+class ReportService:
+    """
+    Mantém os relatórios de `reports` (o registro REPORTS do main.py) quentes em memória.
+
+    `output_path_for(chave)` devolve o caminho do próximo arquivo do relatório, seguindo a
+    numeração das execuções do modo interativo. `session` permite usar outra sessão (ex.:
+    a AWS sintética dos benchmarks); sem ela, as credenciais do ambiente.
+    """
+
+    def __init__(self, reports: dict, output_path_for, session=None, report_keys: list = None, refresh_seconds: float = None):
+        self.reports = reports
+        self.output_path_for = output_path_for
+        self.session = session or boto3.Session()
+        self.refresh_seconds = float(refresh_seconds if refresh_seconds is not None else get_config('SERVICE_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS))
+        keys = report_keys or list(reports)
+        self.states = {key: WarmReport(key, reports[key]) for key in keys}
+        self.identity = None
+        self.discovery = None
+        self.started_at = time.time()
+        self._refresh_lock = threading.Lock()  # Uma recoleta por vez: compartilham a sessão e a descoberta
+        self._stop = threading.Event()
+        self._scheduler = None
+
+    # --- CICLO DE VIDA ---
+
+    def start(self) -> bool:
+        """Valida as credenciais uma única vez e inicia o agendador (a primeira coleta começa já)."""
+        self.identity = validate_aws_credentials(self.session)
+        if not self.identity:
+            return False
+        self._scheduler = threading.Thread(target=self._run_scheduler, name='service-scheduler', daemon=True)
+        self._scheduler.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout=5)
+
+    def _run_scheduler(self):
+        while not self._stop.is_set():
+            self.refresh()
+            if self.refresh_seconds <= 0:
+                logging.info("Recoleta agendada desativada (SERVICE_REFRESH_SECONDS=0).")
+                return
+            self._stop.wait(self.refresh_seconds)
+
+    # --- RECOLETA ---
+
+    def refresh(self, keys: list = None):
+        """Recoleta e reanalisa os relatórios pedidos (padrão: todos os do serviço)."""
+        keys = list(keys or self.states)
+        with self._refresh_lock:
+            logging.info(f"Atualizando o estado quente dos relatórios: {', '.join(keys)}...")
+            # A varredura de regiões é refeita uma vez por ciclo e compartilhada pelos relatórios regionais
+            if any(self.states[key].config.get('scope') == 'regional' for key in keys):
+                started = time.monotonic()
+                try:
+                    discovery = find_active_vpc_regions(self.session)
+                    if discovery.error:
+                        raise RuntimeError(discovery.error)
+                    self.discovery = discovery
+                except Exception as e:
+                    logging.error(f"Falha na descoberta de regiões: {e}. Mantendo a varredura anterior.")
+                logging.info(f"Descoberta de regiões concluída em {time.monotonic() - started:.1f}s.")
+            for key in keys:
+                self._refresh_one(self.states[key])
+
+    def _refresh_one(self, state: WarmReport):
+        """Monta uma fábrica nova; o estado anterior continua servindo as leituras até a troca."""
+        durations = {}
+        try:
+            if state.config.get('scope') == 'regional':
+                if self.discovery is None or not self.discovery.active_regions:
+                    raise RuntimeError("Nenhuma região ativa encontrada na descoberta.")
+                factory = load_factory(state.config)(
+                    regions_to_scan=self.discovery.active_regions, prefetched_vpcs=self.discovery.vpcs_by_region,
+                    session=self.session
+                )
+            else:
+                factory = load_factory(state.config)(session=self.session)
+            for stage in ('collect_data', 'analyze_security'):
+                started = time.monotonic()
+                getattr(factory, stage)()
+                durations[stage] = round(time.monotonic() - started, 3)
+        except Exception as e:
+            logging.error(f"Falha ao atualizar o relatório '{state.config['name']}': {e}", exc_info=True)
+            with state.lock:
+                state.status = 'failed' if state.factory is None else 'stale'
+                state.error = f"{type(e).__name__}: {e}"
+            return
+
+        with state.lock:
+            state.factory, state.tables = factory, None
+            state.refreshed_at = time.time()
+            state.durations = durations
+            state.status, state.error = 'ready', None
+        logging.info(f"Relatório '{state.config['name']}' atualizado (coleta {durations['collect_data']}s, análise {durations['analyze_security']}s).")
+
+    def refresh_async(self, keys: list = None) -> threading.Thread:
+        thread = threading.Thread(target=self.refresh, args=(keys,), name='service-refresh', daemon=True)
+        thread.start()
+        return thread
+
+    # --- LEITURA DO ESTADO QUENTE ---
+
+    def state(self, key: str) -> WarmReport:
+        if key not in self.states:
+            raise ServiceError(404, f"Relatório desconhecido: {key}. Opções: {', '.join(self.states)}.")
+        return self.states[key]
+
+    def _ready(self, key: str) -> WarmReport:
+        state = self.state(key)
+        if state.factory is None:
+            raise ServiceError(409, f"O relatório '{key}' ainda não tem inventário (status: {state.status}).")
+        return state
+
+    def health(self) -> dict:
+        refreshed = [state.refreshed_at for state in self.states.values() if state.refreshed_at]
+        return {
+            'status': 'ok',
+            'account': (self.identity or {}).get('Account'),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'refresh_seconds': self.refresh_seconds,
+            'last_refresh': datetime.fromtimestamp(max(refreshed), timezone.utc).isoformat(timespec='seconds') if refreshed else None,
+            'active_regions': self.discovery.active_regions if self.discovery is not None else None,
+        }
+
+    def sheet(self, key: str, sheet: str, offset: int = 0, limit: int = DEFAULT_PAGE_LIMIT) -> dict:
+        """Linhas [offset, offset + limit) de uma aba, a partir das tabelas do estado quente."""
+        state = self._ready(key)
+        limit = min(max(limit, 0), MAX_PAGE_LIMIT)
+        with state.lock:
+            if state.tables is None:
+                state.tables = state.factory.build_tables()
+            if sheet not in state.tables:
+                raise ServiceError(404, f"Aba desconhecida: {sheet}. Opções: {', '.join(state.tables)}.")
+            table = state.tables[sheet]
+            rows = _slice(table, offset, limit)
+            total = len(table)
+        return {'report': key, 'sheet': sheet, 'offset': offset, 'total': total, 'rows': _records(rows)}
+
+    def generate(self, key: str, formats: list = None) -> dict:
+        """Grava os arquivos do relatório a partir do estado quente (sem chamadas à AWS)."""
+        state = self._ready(key)
+        output_formats = [fmt.lower() for fmt in formats] if formats else resolve_formats(state.config.get('output_formats'))
+        with state.lock:
+            path = self.output_path_for(key)
+            started = time.monotonic()
+            state.factory.generate_report(output_path=path, formats=output_formats)
+            state.output_files = list(state.factory.output_files)
+        return {**state.describe(), 'generate_seconds': round(time.monotonic() - started, 3)}
+
+
+def _slice(table, offset: int, limit: int) -> pd.DataFrame:
+    """Recorte de um DataFrame ou de uma SpooledTable (lida bloco a bloco, sem materializar)."""
+    if isinstance(table, pd.DataFrame):
+        return table.iloc[offset:offset + limit]
+    parts, position = [], 0
+    for chunk in table.iter_chunks():
+        start, end = max(offset - position, 0), min(offset + limit - position, len(chunk))
+        if start < end:
+            parts.append(chunk.iloc[start:end])
+        position += len(chunk)
+        if position >= offset + limit:
+            break
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=table.columns)
+
+
+def _records(frame: pd.DataFrame) -> list:
+    """Linhas como dicionários serializáveis: datas em ISO 8601 e valores ausentes como null."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return [
+        {column: value.isoformat() if hasattr(value, 'isoformat') else value for column, value in record.items()}
+        for record in frame.to_dict('records')
+    ]
+
+
+# --- API HTTP ---
+
+def _make_handler(service: ReportService, token: str = None):
+    class ServiceHandler(BaseHTTPRequestHandler):
+        server_version = 'AutomacaoService/1.0'
+
+        def log_message(self, fmt, *args):
+            logging.info(f"API {self.address_string()} - {fmt % args}")
+
+        def _send(self, status: int, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self, method: str):
+            url = urlparse(self.path)
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split('/') if part]
+            try:
+                # Com SERVICE_TOKEN definido, toda chamada precisa do cabeçalho 'Authorization: Bearer <token>'
+                if token and not hmac.compare_digest(self.headers.get('Authorization', ''), f"Bearer {token}"):
+                    raise ServiceError(401, "Token de acesso ausente ou inválido.")
+                self._send(*self._route(method, parts, query))
+            except ServiceError as e:
+                self._send(e.status, {'error': str(e)})
+            except ValueError as e:
+                self._send(400, {'error': str(e)})
+            except Exception as e:
+                logging.error(f"Erro na API ({method} {url.path}): {e}", exc_info=True)
+                self._send(500, {'error': f"{type(e).__name__}: {e}"})
+
+        def _route(self, method: str, parts: list, query: dict) -> tuple:
+            """Devolve (status HTTP, corpo da resposta)."""
+            if method == 'GET' and parts == ['health']:
+                return 200, service.health()
+            if method == 'GET' and parts == ['reports']:
+                return 200, [state.describe() for state in service.states.values()]
+            if method == 'POST' and parts == ['refresh']:
+                return _refresh(None, query)
+            if len(parts) >= 2 and parts[0] == 'reports':
+                key = parts[1]
+                if method == 'GET' and len(parts) == 2:
+                    return 200, service.state(key).describe()
+                if method == 'GET' and len(parts) == 4 and parts[2] == 'sheets':
+                    return 200, service.sheet(key, parts[3], int(query.get('offset', 0)), int(query.get('limit', DEFAULT_PAGE_LIMIT)))
+                if method == 'POST' and parts[2:] == ['refresh']:
+                    service.state(key)
+                    return _refresh([key], query)
+                if method == 'POST' and parts[2:] == ['generate']:
+                    formats = [fmt.strip() for fmt in query.get('formats', '').split(',') if fmt.strip()] or None
+                    return 200, service.generate(key, formats)
+            raise ServiceError(404, f"Rota desconhecida: {method} /{'/'.join(parts)}")
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+    def _refresh(keys, query) -> tuple:
+        if query.get('wait') in ('1', 'true', 'sim'):
+            service.refresh(keys)
+            return 200, [service.state(key).describe() for key in (keys or service.states)]
+        service.refresh_async(keys)
+        return 202, {'status': 'refreshing', 'reports': keys or list(service.states)}
+
+    return ServiceHandler
+
+
+def create_server(service: ReportService, host: str = None, port: int = None, token: str = None) -> ThreadingHTTPServer:
+    """Servidor HTTP da API (porta 0 escolhe uma porta livre; veja server.server_address)."""
+    host = host or get_config('SERVICE_HOST', DEFAULT_HOST)
+    port = int(port if port is not None else get_config('SERVICE_PORT', DEFAULT_PORT))
+    server = ThreadingHTTPServer((host, port), _make_handler(service, token or get_config('SERVICE_TOKEN')))
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,174 @@
+import hashlib  # Para gerar a chave (hash) de cada resposta
+import json  # Para serializar os parâmetros de forma canônica
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+import pickle  # Preserva os tipos das respostas (ex.: datetime) sem conversões
+import tempfile  # Gravação atômica dos arquivos de cache
+import threading  # Trava para o controle de tamanho compartilhado entre threads
+import time
+
+from .config import get_config
+
+# --- CACHE EM DISCO DAS RESPOSTAS DA AWS ---
+# Cada resposta é guardada em um arquivo, com chave derivada de (conta, região, serviço,
+# operação, parâmetros). Reexecuções dentro do TTL não fazem chamadas de rede.
+
+DEFAULT_TTL_SECONDS = 1800
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'cache'))
+_MISS = object()
+
+
+class ResponseCache:
+    """Cache de respostas em disco com TTL e remoção das entradas menos usadas (LRU) por tamanho."""
+
+    def __init__(self, cache_dir=None, ttl_seconds=None, max_bytes=None, refresh=False, enabled=None):
+        self.cache_dir = cache_dir or get_config('CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None else get_config('CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+        self.max_bytes = int(max_bytes if max_bytes is not None else get_config('CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        if enabled is None:
+            enabled = str(get_config('CACHE_ENABLED', 'true')).lower() in ('1', 'true', 'yes', 'sim')
+        self.enabled = enabled
+        # Com refresh, o cache é ignorado na leitura mas continua sendo atualizado
+        self.refresh = refresh
+        # Conta padrão usada na chave; definida após a validação das credenciais
+        self.account = 'default'
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    @staticmethod
+    def make_key(account, region, service, operation, params) -> str:
+        payload = json.dumps(
+            {'account': account, 'region': region, 'service': service, 'operation': operation, 'params': params},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def get(self, key):
+        """Retorna o valor guardado ou _MISS se ausente, expirado ou em modo refresh."""
+        if not self.enabled or self.refresh:
+            return _MISS
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if time.time() - stat.st_mtime > self.ttl_seconds:
+                return _MISS
+            with open(path, 'rb') as handle:
+                value = pickle.load(handle)
+            # Atualiza só o horário de acesso (usado na remoção LRU); o mtime marca a gravação (TTL)
+            os.utime(path, (time.time(), stat.st_mtime))
+            return value
+        except FileNotFoundError:
+            return _MISS
+        except Exception as e:
+            logging.warning(f"Entrada de cache ilegível ({os.path.basename(path)}): {e}. Ignorando.")
+            return _MISS
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"Não foi possível gravar no cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def fetch(self, account, region, service, operation, params, loader):
+        """Busca no cache; em caso de falta, executa `loader()` e guarda o resultado."""
+        key = self.make_key(account or self.account, region, service, operation, params)
+        value = self.get(key)
+        if value is not _MISS:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        self.put(key, value)
+        return value
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.pkl'):
+                    path = os.path.join(root, name)
+                    try:
+                        yield path, os.stat(path)
+                    except FileNotFoundError:
+                        continue
+
+    def _scan_size(self):
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _evict(self):
+        """Remove as entradas acessadas há mais tempo até o cache caber no limite (mantém 90%)."""
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries(), key=lambda item: item[1].st_atime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        for path, stat in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= stat.st_size
+                removed += 1
+            except FileNotFoundError:
+                continue
+        self._total_bytes = total
+        logging.info(f"Cache acima do limite: {removed} entrada(s) removidas.")
+
+
+_default_cache = None
+
+
+def get_cache() -> ResponseCache:
+    """Cache compartilhado pelo processo (criado com as configurações do ambiente)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
+
+
+def configure_cache(**kwargs) -> ResponseCache:
+    """Recria o cache compartilhado (ex.: configure_cache(refresh=True) para o --refresh)."""
+    global _default_cache
+    _default_cache = ResponseCache(**kwargs)
+    return _default_cache
+
+
+def _client_scope(client):
+    return client.meta.region_name or 'global', client.meta.service_model.service_name
+
+
+def cached_call(client, operation, account=None, **params):
+    """Chama `client.<operation>(**params)` passando pelo cache."""
+    region, service = _client_scope(client)
+    return get_cache().fetch(account, region, service, operation, params, lambda: getattr(client, operation)(**params))
+
+
+def cached_pages(client, operation, account=None, **params) -> list:
+    """Percorre o paginador da operação e retorna a lista de páginas, passando pelo cache."""
+    region, service = _client_scope(client)
+    return get_cache().fetch(
+        account, region, service, f"{operation}#paginated", params,
+        lambda: list(client.get_paginator(operation).paginate(**params))
+    )
@@ -0,0 +1,197 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+import threading  # Pool e limitadores compartilhados entre as threads de coleta
+import time
+import weakref  # Os clientes de uma sessão são descartados junto com ela
+from collections import defaultdict
+
+import boto3  # Biblioteca oficial AWS para interagir com serviços AWS via API
+from botocore.config import Config  # Pool de conexões, keep-alive e retentativas dos clientes
+
+from .cache import get_cache
+from .config import get_config
+
+# --- POOL DE CLIENTES BOTO3 ---
+# Um cliente por (conta, região, serviço) dentro de cada sessão, criado uma única vez com
+# pool de conexões maior, keep-alive e retentativas no modo 'standard'. Os clientes ficam
+# presos à sessão de origem (e não só às credenciais) porque herdam os hooks dela, como a
+# contagem de chamadas do painel de performance.
+#
+# Cada (serviço, região) tem um token bucket compartilhado entre as threads: toda tentativa
+# de envio consome uma ficha; uma resposta de throttling corta a taxa pela metade e cada
+# resposta bem-sucedida a recupera aos poucos (AIMD), até o limite configurado.
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32  # Conexões HTTP simultâneas por cliente
+DEFAULT_MAX_ATTEMPTS = 5  # Tentativas por chamada (a primeira + retentativas)
+DEFAULT_CONNECT_TIMEOUT = 10  # Segundos
+DEFAULT_READ_TIMEOUT = 60  # Segundos
+DEFAULT_RATE_LIMIT = 20.0  # Requisições por segundo por (serviço, região); 0 desativa o limitador
+MIN_RATE = 1.0  # Taxa mínima após throttling seguidos
+RECOVERY_STEP = 0.05  # Fração do limite recuperada a cada resposta bem-sucedida
+
+THROTTLING_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded', 'BandwidthLimitExceeded', 'RequestThrottled',
+    'SlowDown', 'PriorRequestNotComplete', 'EC2ThrottledException',
+}
+
+
+class TokenBucket:
+    """Limitador de taxa de um (serviço, região), ajustado pelas respostas de throttling."""
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.throttles = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Bloqueia até haver uma ficha disponível; devolve o tempo de espera em segundos."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def on_throttle(self):
+        """Recebeu throttling: reduz a taxa pela metade e esvazia o balde."""
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self):
+        """Resposta sem throttling: recupera parte da taxa, até o limite configurado."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+
+class ClientPool:
+    """Clientes boto3 reaproveitados, limitadores de taxa e contadores de retentativas/throttling."""
+
+    def __init__(self):
+        self.max_pool_connections = int(get_config('CLIENT_MAX_POOL_CONNECTIONS', DEFAULT_MAX_POOL_CONNECTIONS))
+        self.max_attempts = int(get_config('CLIENT_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+        self.rate_limit = float(get_config('CLIENT_RATE_LIMIT', DEFAULT_RATE_LIMIT))
+        self.retries = defaultdict(lambda: defaultdict(int))  # serviço -> região -> retentativas
+        self.throttles = defaultdict(lambda: defaultdict(int))  # serviço -> região -> respostas de throttling
+        self._clients = weakref.WeakKeyDictionary()  # sessão -> {(conta, região, serviço, ajustes): cliente}
+        self._limiters = {}
+        self._default_session = None
+        self._lock = threading.RLock()
+
+    def default_session(self) -> boto3.Session:
+        """Sessão com as credenciais do ambiente, usada por quem não recebe uma sessão."""
+        with self._lock:
+            if self._default_session is None:
+                self._default_session = boto3.Session()
+            return self._default_session
+
+    def client_config(self, **overrides) -> Config:
+        config = Config(
+            max_pool_connections=self.max_pool_connections,
+            tcp_keepalive=True,
+            connect_timeout=float(get_config('CLIENT_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(get_config('CLIENT_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+            retries={'total_max_attempts': self.max_attempts, 'mode': 'standard'},
+        )
+        return config.merge(Config(**overrides)) if overrides else config
+
+    def get_client(self, session, service: str, region: str = None, account: str = None, **overrides):
+        """
+        Devolve o cliente de `service` na `region` para a sessão (ou a sessão padrão),
+        criando-o na primeira vez. `overrides` são opções de botocore.config.Config
+        (ex.: timeouts menores na descoberta de regiões) e geram um cliente à parte.
+        A criação é serializada: a Session do boto3 não é thread-safe.
+        """
+        session = session or self.default_session()
+        key = (account or get_cache().account, region, service, tuple(sorted((k, repr(v)) for k, v in overrides.items())))
+        with self._lock:
+            clients = self._clients.setdefault(session, {})
+            client = clients.get(key)
+            if client is None:
+                client = session.client(service, region_name=region, config=self.client_config(**overrides))
+                self._attach(client, service, client.meta.region_name or 'global')
+                clients[key] = client
+            return client
+
+    def limiter(self, service: str, region: str):
+        if self.rate_limit <= 0:
+            return None
+        with self._lock:
+            key = (service, region)
+            if key not in self._limiters:
+                self._limiters[key] = TokenBucket(self.rate_limit)
+            return self._limiters[key]
+
+    def _attach(self, client, service: str, region: str):
+        """Liga o limitador e os contadores aos eventos do cliente (não afeta outros clientes da sessão)."""
+        limiter = self.limiter(service, region)
+
+        def before_send(**kwargs):
+            if limiter is not None:
+                limiter.acquire()
+
+        def needs_retry(response=None, **kwargs):
+            # response = (resposta HTTP, resposta já interpretada); None em erros de conexão
+            error_code = response[1].get('Error', {}).get('Code') if response else None
+            if error_code in THROTTLING_CODES:
+                with self._lock:
+                    self.throttles[service][region] += 1
+                if limiter is not None:
+                    limiter.on_throttle()
+                logging.debug(f"Throttling ({error_code}) em {service}/{region}.")
+
+        def after_call(parsed=None, **kwargs):
+            parsed = parsed or {}
+            attempts = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            if attempts:
+                with self._lock:
+                    self.retries[service][region] += attempts
+            if limiter is not None and parsed.get('Error', {}).get('Code') not in THROTTLING_CODES:
+                limiter.on_success()
+
+        client.meta.events.register('before-send', before_send)
+        # Registrado primeiro: o handler de retentativas do botocore encerra a cadeia ao decidir
+        client.meta.events.register_first('needs-retry', needs_retry)
+        client.meta.events.register('after-call', after_call)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'clients': sum(len(clients) for clients in self._clients.values()),
+                'retries': {service: dict(regions) for service, regions in self.retries.items()},
+                'throttles': {service: dict(regions) for service, regions in self.throttles.items()},
+                'retries_total': sum(sum(regions.values()) for regions in self.retries.values()),
+                'throttles_total': sum(sum(regions.values()) for regions in self.throttles.values()),
+                'rate_limits': {f"{service}/{region}": round(bucket.rate, 2) for (service, region), bucket in self._limiters.items()},
+            }
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> ClientPool:
+    """Pool compartilhado pelo processo."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ClientPool()
+        return _default_pool
+
+
+def get_client(session, service: str, region: str = None, **overrides):
+    """Atalho para get_client_pool().get_client(...)."""
+    return get_client_pool().get_client(session, service, region, **overrides)
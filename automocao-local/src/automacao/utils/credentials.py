@@ -1,28 +1,41 @@
 import boto3  # Biblioteca oficial AWS para interagir com serviços AWS via API
+import botocore.session  # Sessão de baixo nível, para clonar sessões compartilhando as credenciais
+from botocore.credentials import CredentialProvider  # Ponto de extensão da cadeia de credenciais do botocore
 from botocore.exceptions import ClientError  # Exceções específicas da AWS para tratamento de erros
 import logging  # Biblioteca para registrar logs de eventos e erros
 
 # Importa função para obter configurações do ambiente, dentro do mesmo pacote 'utils'
 from .config import get_config 
+from .cache import get_cache
+from .clients import get_client, get_client_pool
 
-def validate_aws_credentials():
+def validate_aws_credentials(session=None):
     """
     Valida as credenciais AWS carregadas no ambiente usando o serviço STS (Security Token Service).
-    Retorna True se as credenciais forem válidas, False caso contrário.
+    Retorna a identidade (resposta do get_caller_identity) se as credenciais forem válidas,
+    False caso contrário.
     """
     try:
         # Obtém a região AWS configurada, padrão para 'us-east-1' se não definida
         aws_region = get_config('AWS_REGION', 'us-east-1')
         
-        # Cria cliente STS na região configurada
-        sts_client = boto3.client('sts', region_name=aws_region)
+        # Cria cliente STS na região configurada, a partir da sessão recebida (ou das credenciais do ambiente)
+        session = session or get_client_pool().default_session()
+        sts_client = get_client(session, 'sts', aws_region)
         
-        # Chama a API get_caller_identity para verificar se as credenciais são válidas
-        sts_client.get_caller_identity()
+        # Chama a API get_caller_identity para verificar se as credenciais são válidas.
+        # A chamada nunca passa pelo cache: uma chave revogada, expirada ou desativada
+        # precisa falhar aqui, mesmo com o cache quente.
+        identity = sts_client.get_caller_identity()
+        
+        # Só depois da chamada bem-sucedida, a conta identificada passa a compor a chave
+        # de todas as respostas guardadas no cache
+        cache = get_cache()
+        cache.account = identity.get('Account', 'default')
         
         # Se não lançar exceção, credenciais são válidas
-        logging.info("Credenciais AWS validadas com sucesso.")
-        return True
+        logging.info(f"Credenciais AWS validadas com sucesso (conta {cache.account}).")
+        return identity
     
     except ClientError as e:
         # Captura erros específicos do cliente AWS
@@ -40,3 +53,36 @@ def validate_aws_credentials():
         # Captura qualquer outro erro genérico, como problemas de rede
         logging.error(f"Não foi possível conectar à AWS. Verifique sua conexão ou configuração. Erro: {e}")
         return False
+
+
+class ResolvedCredentialProvider(CredentialProvider):
+    """Provedor que entrega credenciais já obtidas (ex.: de outra sessão ou de um AssumeRole)."""
+    METHOD = 'resolved'
+
+    def __init__(self, credentials):
+        super().__init__()
+        self._credentials = credentials
+
+    def load(self):
+        return self._credentials
+
+
+def session_with_credentials(credentials, region_name=None) -> boto3.Session:
+    """
+    Cria uma sessão boto3 que usa `credentials` (inclusive RefreshableCredentials, que
+    continuam se renovando). O provedor entra no início da cadeia de credenciais do
+    botocore, antes de variáveis de ambiente, perfis e metadados da instância.
+    """
+    core_session = botocore.session.get_session()
+    resolver = core_session.get_component('credential_provider')
+    resolver.insert_before(resolver.providers[0].METHOD, ResolvedCredentialProvider(credentials))
+    return boto3.Session(botocore_session=core_session, region_name=region_name)
+
+
+def clone_session(session):
+    """
+    Cria uma nova sessão boto3 que reaproveita as credenciais já resolvidas de `session`.
+    A criação de clientes a partir de uma mesma Session não é thread-safe: cada relatório
+    executado em paralelo usa o seu clone, sem repetir a cadeia de credenciais.
+    """
+    return session_with_credentials(session.get_credentials(), region_name=session.region_name)
@@ -0,0 +1,206 @@
+import json  # Gravação das métricas ao lado do relatório
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+import sys  # Saída do painel no terminal
+import threading  # Thread de monitoramento em segundo plano
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import psutil  # Consumo de CPU, memória e threads do processo
+
+from .cache import get_cache
+from .clients import get_client_pool
+from .memo import get_rule_set_memo
+from .config import get_config
+
+# --- MONITOR DE PERFORMANCE ---
+# Uma thread em segundo plano amostra CPU, memória (RSS) e número de threads do processo,
+# redesenha uma linha de status no terminal e acompanha o pico de memória de cada etapa
+# do pipeline (collect_data, analyze_security, generate_report). As chamadas de API são
+# contadas por serviço e região com um hook de eventos do botocore.
+
+DEFAULT_INTERVAL = 1.0  # Segundos entre amostras
+MB = 1024 * 1024
+
+
+class PerformanceDashboard:
+    """Painel de performance em tempo real e coletor das métricas por etapa."""
+
+    def __init__(self, interval: float = None, live: bool = None):
+        self.interval = float(interval or get_config('DASHBOARD_INTERVAL', DEFAULT_INTERVAL))
+        if live is None:
+            # Só redesenha o painel em um terminal interativo (não em cron/arquivos de log)
+            live = sys.stderr.isatty() and str(get_config('DASHBOARD_ENABLED', 'true')).lower() in ('1', 'true', 'yes', 'sim')
+        self.live = live
+        self.process = psutil.Process()
+        self.stages = {}
+        self.api_calls = defaultdict(lambda: defaultdict(int))  # serviço -> região -> chamadas
+        self.peak_rss = 0
+        self.max_threads = 0
+        self.cpu_samples = []
+        self._current_stage = None
+        self._stage_peak = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = None
+        self._started_monotonic = None
+        self._cache_start = (0, 0)
+        self._memo_start = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._clients_start = {'retries_total': 0, 'throttles_total': 0}
+
+    # --- Coleta das amostras ---
+
+    def _sample(self):
+        with self.process.oneshot():
+            rss = self.process.memory_info().rss
+            threads = self.process.num_threads()
+            cpu = self.process.cpu_percent(interval=None)
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            self.max_threads = max(self.max_threads, threads)
+            self.cpu_samples.append(cpu)
+            if self._current_stage:
+                self._stage_peak = max(self._stage_peak, rss)
+        return rss, threads, cpu
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss, threads, cpu = self._sample()
+            if self.live:
+                self._render(rss, threads, cpu)
+
+    def _render(self, rss, threads, cpu):
+        elapsed = time.monotonic() - self._started_monotonic
+        hours, remainder = divmod(int(elapsed), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        line = (
+            f"[{self._current_stage or '-'}] {hours:02d}:{minutes:02d}:{seconds:02d}"
+            f" | CPU {cpu:5.1f}% | Memória {rss / MB:8.1f} MB | Threads {threads:3d}"
+            f" | Chamadas de API {self.total_api_calls()}"
+        )
+        throttles = get_client_pool().stats()['throttles_total'] - self._clients_start['throttles_total']
+        if throttles:
+            line += f" | Throttling {throttles}"
+        sys.stderr.write(f"\r{line}\033[K")
+        sys.stderr.flush()
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        """Inicia a thread de monitoramento."""
+        self._started_at = datetime.now()
+        self._started_monotonic = time.monotonic()
+        cache = get_cache()
+        self._cache_start = (cache.hits, cache.misses)
+        self._memo_start = get_rule_set_memo().stats()
+        self._clients_start = get_client_pool().stats()
+        self.process.cpu_percent(interval=None)  # Primeira leitura só inicializa o contador de CPU
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name='performance-dashboard', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Encerra a thread de monitoramento e limpa a linha do painel."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        if self.live:
+            sys.stderr.write("\r\033[K")
+            sys.stderr.flush()
+        return self
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede tempo de parede, pico de memória e chamadas de API de uma etapa do pipeline."""
+        rss_before, _, _ = self._sample()
+        calls_before = self.total_api_calls()
+        with self._lock:
+            self._current_stage = name
+            self._stage_peak = rss_before
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - started
+            rss_after, _, _ = self._sample()
+            with self._lock:
+                self.stages[name] = {
+                    'duration_seconds': round(duration, 3),
+                    'peak_rss_mb': round(self._stage_peak / MB, 1),
+                    'rss_delta_mb': round((rss_after - rss_before) / MB, 1),
+                    'api_calls': self.total_api_calls() - calls_before,
+                }
+                self._current_stage = None
+            logging.info(f"Etapa '{name}' concluída em {duration:.2f}s (pico de memória {self._stage_peak / MB:.1f} MB).")
+
+    # --- Contagem de chamadas de API ---
+
+    def instrument(self, session):
+        """
+        Conta as chamadas de API feitas pelos clientes desta sessão boto3. Deve ser chamado
+        antes da criação dos clientes (eles copiam os hooks da sessão ao serem criados).
+        Respostas servidas pelo cache local não chegam aqui, pois não geram chamadas.
+        """
+        session.events.register('before-call.*.*', self._count_call)
+        return session
+
+    def _count_call(self, event_name=None, context=None, request_signer=None, **kwargs):
+        service = event_name.split('.')[1] if event_name else 'desconhecido'
+        region = (context or {}).get('client_region') or getattr(request_signer, 'region_name', None) or 'global'
+        with self._lock:
+            self.api_calls[service][region] += 1
+
+    def total_api_calls(self) -> int:
+        return sum(count for regions in list(self.api_calls.values()) for count in list(regions.values()))
+
+    # --- Resultado ---
+
+    def _rule_set_cache_metrics(self) -> dict:
+        """Acertos do memo de conjuntos de regras desde o início do painel."""
+        stats = get_rule_set_memo().stats()
+        hits = stats['hits'] - self._memo_start['hits']
+        misses = stats['misses'] - self._memo_start['misses']
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'entries': stats['entries'],
+            'evictions': stats['evictions'] - self._memo_start['evictions'],
+        }
+
+    def metrics(self) -> dict:
+        cache = get_cache()
+        rule_set_cache = self._rule_set_cache_metrics()
+        clients = get_client_pool().stats()
+        with self._lock:
+            return {
+                'started_at': self._started_at.isoformat(timespec='seconds') if self._started_at else None,
+                'duration_seconds': round(time.monotonic() - self._started_monotonic, 3) if self._started_monotonic else 0.0,
+                'peak_rss_mb': round(self.peak_rss / MB, 1),
+                'cpu_percent_avg': round(sum(self.cpu_samples) / len(self.cpu_samples), 1) if self.cpu_samples else 0.0,
+                'cpu_percent_max': round(max(self.cpu_samples), 1) if self.cpu_samples else 0.0,
+                'max_threads': self.max_threads,
+                'stages': dict(self.stages),
+                'api_calls': {service: dict(regions) for service, regions in self.api_calls.items()},
+                'api_calls_total': sum(sum(regions.values()) for regions in self.api_calls.values()),
+                # Retentativas e respostas de throttling dos clientes do pool (limitador de taxa em rate_limits)
+                'api_retries_total': clients['retries_total'] - self._clients_start['retries_total'],
+                'api_throttles_total': clients['throttles_total'] - self._clients_start['throttles_total'],
+                'rate_limits': clients['rate_limits'],
+                'cache': {'hits': cache.hits - self._cache_start[0], 'misses': cache.misses - self._cache_start[1]},
+                'rule_set_cache': rule_set_cache,
+            }
+
+    def write_metrics(self, output_path: str) -> str:
+        """Grava as métricas em JSON ao lado do relatório: <base>_metrics.json."""
+        path = f"{os.path.splitext(output_path)[0]}_metrics.json"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.metrics(), handle, ensure_ascii=False, indent=2)
+        logging.info(f"Métricas de performance salvas em: {os.path.basename(path)}")
+        return path
@@ -0,0 +1,123 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+import time  # Para controlar o prazo total (deadline) da varredura
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED  # Pool de threads limitado
+from botocore.exceptions import ConnectTimeoutError, ReadTimeoutError  # Erros de timeout de rede
+
+from .config import get_config
+from .cache import cached_call, cached_pages
+from .clients import get_client
+
+# --- PADRÕES DA DESCOBERTA DE REGIÕES (podem ser sobrescritos via .env) ---
+DEFAULT_MAX_WORKERS = 8  # Quantas regiões são sondadas ao mesmo tempo
+DEFAULT_REGION_TIMEOUT = 10  # Segundos máximos de conexão/leitura por região
+DEFAULT_DEADLINE = 60  # Segundos máximos para a varredura inteira
+
+
+class RegionDiscoveryResult:
+    """
+    Resultado da varredura de regiões: regiões ativas, os payloads de VPC já
+    coletados (para reaproveitamento pela fábrica) e as regiões que não responderam.
+    `error` fica preenchido quando nem a lista de regiões pôde ser obtida: nesse caso
+    nenhuma região foi varrida e o resultado vazio não significa "sem regiões ativas".
+    """
+    def __init__(self):
+        self.active_regions: list[str] = []
+        self.vpcs_by_region: dict[str, list] = {}
+        self.timed_out_regions: list[str] = []
+        self.failed_regions: list[str] = []
+        self.error: str = None
+
+
+def _probe_region(client, region_name):
+    """Busca todas as VPCs da região (sem filtro, para que o payload possa ser reaproveitado)."""
+    vpcs = []
+    for page in cached_pages(client, 'describe_vpcs'):
+        vpcs.extend(page.get('Vpcs', []))
+    for item in vpcs:
+        item['Region'] = region_name
+    return vpcs
+
+
+def find_active_vpc_regions(session, max_workers=None, region_timeout=None, deadline=None):
+    """
+    Varre todas as regiões em paralelo para encontrar aquelas que têm VPCs customizadas em uso.
+
+    Cada região tem seu próprio timeout de conexão/leitura e a varredura inteira respeita
+    um prazo total: regiões que não respondem a tempo são reportadas em
+    `timed_out_regions` em vez de bloquear a execução. Com `max_workers=1` a sondagem
+    volta a ser sequencial.
+
+    Returns:
+        RegionDiscoveryResult com as regiões ativas (na ordem retornada pela AWS),
+        os payloads de `describe_vpcs` por região e as regiões com timeout/erro.
+    """
+    max_workers = int(max_workers or get_config('DISCOVERY_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+    region_timeout = float(region_timeout or get_config('DISCOVERY_REGION_TIMEOUT', DEFAULT_REGION_TIMEOUT))
+    deadline = float(deadline or get_config('DISCOVERY_DEADLINE', DEFAULT_DEADLINE))
+
+    logging.info(f"Iniciando varredura paralela ({max_workers} workers) em todas as regiões para encontrar VPCs ativas...")
+    result = RegionDiscoveryResult()
+    # Timeouts curtos e poucas retentativas: uma região lenta não pode segurar a varredura
+    client_options = {
+        'connect_timeout': region_timeout,
+        'read_timeout': region_timeout,
+        'retries': {'max_attempts': 2, 'mode': 'standard'},
+    }
+
+    try:
+        ec2_global = get_client(session, 'ec2', 'us-east-1', **client_options)
+        all_regions = [region['RegionName'] for region in cached_call(ec2_global, 'describe_regions', AllRegions=False)['Regions']]
+    except Exception as e:
+        logging.error(f"Não foi possível buscar a lista de regiões da AWS: {e}.")
+        result.error = f"{type(e).__name__}: {e}"
+        return result
+
+    # Os clientes vêm do pool compartilhado (criados uma vez por região) e só as chamadas de rede vão para as threads
+    clients = {region_name: get_client(session, 'ec2', region_name, **client_options) for region_name in all_regions}
+
+    started_at = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='region-probe')
+    pending = {executor.submit(_probe_region, clients[region_name], region_name): region_name for region_name in all_regions}
+    try:
+        while pending:
+            remaining = deadline - (time.monotonic() - started_at)
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                region_name = pending.pop(future)
+                try:
+                    vpcs = future.result()
+                except (ConnectTimeoutError, ReadTimeoutError) as e:
+                    logging.warning(f"Timeout ao sondar a região {region_name}: {e}.")
+                    result.timed_out_regions.append(region_name)
+                    continue
+                except Exception as e:
+                    logging.warning(f"Não foi possível sondar a região {region_name}. Erro: {e}.")
+                    result.failed_regions.append(region_name)
+                    continue
+                result.vpcs_by_region[region_name] = vpcs
+                if any(not vpc.get('IsDefault', False) for vpc in vpcs):
+                    logging.info(f"-> Região ATIVA encontrada (VPC customizada): {region_name}")
+    finally:
+        # Regiões que estouraram o prazo total são abandonadas, sem esperar pelas threads
+        for future, region_name in pending.items():
+            future.cancel()
+            result.timed_out_regions.append(region_name)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if pending:
+        logging.warning(f"Prazo total de {deadline:.0f}s esgotado. Regiões sem resposta: {sorted(pending.values())}")
+
+    # Mantém a ordem original das regiões para que o resultado seja determinístico
+    result.active_regions = [
+        region_name for region_name in all_regions
+        if any(not vpc.get('IsDefault', False) for vpc in result.vpcs_by_region.get(region_name, []))
+    ]
+    result.timed_out_regions = [r for r in all_regions if r in set(result.timed_out_regions)]
+
+    logging.info(
+        f"Análise concluída em {time.monotonic() - started_at:.1f}s. Regiões com VPCs em uso: {result.active_regions}"
+        + (f" | Regiões com timeout: {result.timed_out_regions}" if result.timed_out_regions else "")
+    )
+    return result
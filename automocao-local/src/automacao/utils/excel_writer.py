@@ -0,0 +1,140 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+from openpyxl import Workbook  # Workbook em modo write-only (streaming)
+from openpyxl.cell import WriteOnlyCell  # Célula com estilo para o modo write-only
+from openpyxl.formatting.rule import FormulaRule  # Formatação condicional por fórmula
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill  # Estilos compartilhados
+from openpyxl.utils import get_column_letter  # Para converter número de coluna em letra (ex: 1 -> 'A')
+
+# Cores dos níveis de risco: alto (vermelho), médio (amarelo), seguro (verde)
+RISK_COLORS = {"Alto": 'FFC7CE', "Médio": 'FFEB9C', "Seguro": 'C6EFCE'}
+MAX_COLUMN_WIDTH = 70
+CHUNK_ROWS = 10000  # Linhas convertidas por vez ao enviar o DataFrame para a planilha
+
+
+def _named_styles():
+    """Estilos nomeados: registrados uma única vez no workbook e referenciados por nome nas células."""
+    header = NamedStyle(name='report_header')
+    header.font = Font(bold=True)
+    header.alignment = Alignment(wrap_text=True, vertical='top', horizontal='left')
+    body = NamedStyle(name='report_wrap')
+    body.alignment = Alignment(wrap_text=True, vertical='top', horizontal='left')
+    return header, body
+
+
+def column_widths(df: pd.DataFrame) -> list:
+    """
+    Calcula a largura de cada coluna a partir do DataFrame, com operações de string
+    vetorizadas: maior linha de texto de cada coluna (considerando quebras de linha).
+    """
+    widths = []
+    for column in df.columns:
+        text = df[column].astype(str).where(df[column].notna(), '')
+        longest = text.str.split('\n').explode().str.len().max() if len(text) else 0
+        longest = max(int(longest or 0), len(str(column)))
+        widths.append(min((longest + 2) * 1.2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def _excel_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """O Excel não aceita datas com fuso horário: converte essas colunas para UTC sem fuso."""
+    tz_columns = [c for c in df.columns if isinstance(df[c].dtype, pd.DatetimeTZDtype)]
+    if not tz_columns:
+        return df
+    return df.assign(**{c: df[c].dt.tz_convert('UTC').dt.tz_localize(None) for c in tz_columns})
+
+
+def iter_chunks(table, chunk_rows: int = CHUNK_ROWS):
+    """Blocos de um DataFrame ou de uma SpooledTable (utils/spool.py)."""
+    if isinstance(table, pd.DataFrame):
+        return (table.iloc[start:start + chunk_rows] for start in range(0, len(table), chunk_rows))
+    return table.iter_chunks()
+
+
+def _wrap_columns(df: pd.DataFrame) -> set:
+    """Posições das colunas com texto multi-linha."""
+    return {
+        idx for idx, column in enumerate(df.columns)
+        if (pd.api.types.is_object_dtype(df[column]) or pd.api.types.is_string_dtype(df[column]))
+        and df[column].astype(str).str.contains('\n', regex=False).any()
+    }
+
+
+def write_workbook(output_path: str, data_frames: dict, sheet_order: list, risk_columns: dict = None):
+    """
+    Gera o .xlsx em uma única passada, no modo write-only do openpyxl: as linhas são
+    enviadas direto para o arquivo, então a memória fica praticamente constante no
+    número de linhas.
+
+    Args:
+        output_path: caminho do arquivo final.
+        data_frames: {nome da aba: DataFrame ou SpooledTable}. Tabelas em disco são lidas
+            duas vezes, bloco a bloco (larguras e depois as linhas), sem materializá-las.
+        sheet_order: ordem das abas; abas vazias ou fora da lista são ignoradas.
+        risk_columns: {nome da aba: coluna com o nível de risco} para colorir as linhas
+            com formatação condicional (em vez de um preenchimento por célula).
+    """
+    risk_columns = risk_columns or {}
+    workbook = Workbook(write_only=True)
+    header_style, body_style = _named_styles()
+    workbook.add_named_style(header_style)
+    workbook.add_named_style(body_style)
+
+    for sheet_name in sheet_order:
+        table = data_frames.get(sheet_name)
+        if table is None or table.empty:
+            continue
+        columns = list(table.columns)
+        sheet = workbook.create_sheet(title=sheet_name)
+
+        # Larguras e congelamento do cabeçalho precisam ser definidos antes das linhas.
+        # A largura é o máximo entre os blocos; só colunas com texto multi-linha precisam
+        # de células estilizadas, as demais vão como valor puro.
+        widths = [0.0] * len(columns)
+        wrap_columns = set()
+        for chunk in map(_excel_safe, iter_chunks(table)):
+            widths = [max(a, b) for a, b in zip(widths, column_widths(chunk))]
+            wrap_columns |= _wrap_columns(chunk)
+        for idx, width in enumerate(widths, 1):
+            sheet.column_dimensions[get_column_letter(idx)].width = width
+        sheet.freeze_panes = 'A2'
+
+        header_row = []
+        for column in columns:
+            cell = WriteOnlyCell(sheet, value=str(column))
+            cell.style = header_style.name
+            header_row.append(cell)
+        sheet.append(header_row)
+
+        # Percorre a tabela em blocos: nulos viram células vazias sem copiar a tabela inteira
+        for chunk in map(_excel_safe, iter_chunks(table)):
+            chunk = chunk.astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            for values in chunk.itertuples(index=False, name=None):
+                row = list(values)
+                for idx in wrap_columns:
+                    cell = WriteOnlyCell(sheet, value=row[idx])
+                    cell.style = body_style.name
+                    row[idx] = cell
+                sheet.append(row)
+
+        # Cores de risco via formatação condicional: uma regra por nível, para a aba inteira
+        risk_column = risk_columns.get(sheet_name)
+        if risk_column in columns:
+            risk_letter = get_column_letter(columns.index(risk_column) + 1)
+            data_range = f"A2:{get_column_letter(len(columns))}{len(table) + 1}"
+            for level, color in RISK_COLORS.items():
+                fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+                sheet.conditional_formatting.add(
+                    data_range, FormulaRule(formula=[f'${risk_letter}2="{level}"'], fill=fill)
+                )
+
+    if not workbook.worksheets:
+        workbook.create_sheet(title='Vazio')
+
+    # Garante que o diretório de saída exista
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    workbook.save(output_path)
+    logging.info(f"Planilha gravada em modo streaming: {os.path.basename(output_path)}")
@@ -19,24 +19,22 @@ def format_rules(rules_list):
     """ 
     Formata uma lista de regras de Security Group (Inbound ou Outbound) em um texto multi-linha detalhado,
     pronto para ser exibido em uma célula de planilha, mostrando protocolo, portas e fontes/destinos.
+    As regras chegam já normalizadas (tuplas PermissionRule de models.py).
     """
-    # Verifica se a entrada é realmente uma lista e se não está vazia.
-    # Se não for uma lista ou estiver vazia, significa que não há regras, então retorna uma mensagem padrão.
-    if not isinstance(rules_list, list) or not rules_list:
+    # Se não houver regras, retorna uma mensagem padrão.
+    if not rules_list:
         return "Nenhuma regra."
 
     formatted_text = [] # Lista para armazenar as strings formatadas de cada regra individualmente
     
-    # Itera sobre cada 'rule' (dicionário) na rules_list, começando a contagem de 'i' em 1.
+    # Itera sobre cada regra, começando a contagem de 'i' em 1.
     for i, rule in enumerate(rules_list, 1):
         # Formata o protocolo:
-        # Pega o valor de 'IpProtocol'. Se for '-1', significa 'All Traffic'.
-        # Converte para string, coloca em maiúsculas e substitui '-1' por 'All Traffic'.
-        protocol = str(rule.get('IpProtocol', '-1')).upper().replace('-1', 'All Traffic')
+        # Se for '-1', significa 'All Traffic'. Coloca em maiúsculas e substitui '-1' por 'All Traffic'.
+        protocol = rule.protocol.upper().replace('-1', 'All Traffic')
         
         # Formata as portas:
-        # Pega os valores de 'FromPort' (porta inicial) e 'ToPort' (porta final).
-        from_port, to_port = rule.get('FromPort'), rule.get('ToPort')
+        from_port, to_port = rule.from_port, rule.to_port
         port_str = "All" # Valor padrão para portas (se não especificado ou se FromPort/ToPort forem None)
         
         # Se 'FromPort' não for None (indicando que portas foram especificadas)
@@ -49,18 +47,14 @@ def format_rules(rules_list):
                 port_str = f"{from_port}-{to_port}"
         
         # Formata as fontes (para regras de entrada) ou destinos (para regras de saída):
-        # Pode ser um IP (CidrIp) ou outro Security Group (UserIdGroupPairs).
-        sources = [] # Lista para armazenar as descrições das fontes/destinos desta regra
-        
-        # Itera sobre os blocos IP (CIDRs) definidos na regra.
-        for ip in rule.get('IpRanges', []):
-            # Adiciona uma string formatada para cada IP de origem, incluindo sua descrição (se houver).
-            sources.append(f"  Source: {ip.get('CidrIp')} (Description: {ip.get('Description', 'N/A')})")
-        
-        # Itera sobre os pares de ID de usuário/grupo (referência a outros Security Groups).
-        for group in rule.get('UserIdGroupPairs', []):
-            # Adiciona uma string formatada para cada Security Group de origem, incluindo sua descrição.
-            sources.append(f"  Source SG: {group.get('GroupId')} (Description: {group.get('Description', 'N/A')})")
+        # Pode ser um IP (CIDR) ou outro Security Group (referência).
+        # Cada fonte é uma tupla (CIDR ou ID do grupo, descrição).
+        sources = [
+            f"  Source: {cidr} (Description: {description or 'N/A'})" for cidr, description in rule.ip_ranges
+        ]
+        sources += [
+            f"  Source SG: {group_id} (Description: {description or 'N/A'})" for group_id, description in rule.group_pairs
+        ]
         
         # Se nenhuma fonte (IP ou SG) foi encontrada para esta regra, adiciona uma entrada "N/A".
         if not sources:
@@ -0,0 +1,114 @@
+import threading  # Memo compartilhado entre relatórios executados em paralelo
+from collections import OrderedDict
+
+from .config import get_config
+
+# --- MEMO DE CONJUNTOS DE REGRAS ---
+# Muitos Security Groups têm exatamente as mesmas regras (stacks do CloudFormation, cópias
+# por ambiente, a regra de saída padrão...). As regras normalizadas (tuplas PermissionRule)
+# são a impressão digital canônica do conjunto: hashable e comparadas por igualdade, então
+# não há risco de colisão. Cada conjunto distinto é analisado/formatado uma única vez e o
+# resultado é reaproveitado por todos os grupos que o usam.
+#
+# Para a análise de risco a chave é canônica (`analysis_key`): regras ordenadas e sem as
+# descrições, que não mudam o resultado. Assim, cópias do mesmo grupo com as regras em
+# outra ordem ou descritas de outro jeito também compartilham a entrada. A formatação das
+# regras mostra ordem e descrições, então usa o conjunto exato como chave.
+
+DEFAULT_MAX_ENTRIES = 100000
+_MISS = object()
+
+
+def _rule_sort_key(rule) -> tuple:
+    # Portas ausentes (All Traffic) são None e não se comparam com inteiros
+    return (rule.protocol, -1 if rule.from_port is None else rule.from_port, -1 if rule.to_port is None else rule.to_port, rule[3:])
+
+
+def analysis_key(rules: tuple) -> tuple:
+    """
+    Chave canônica de um conjunto de regras para a análise de risco: as mesmas regras
+    (PermissionRule), sem descrições e em ordem fixa. Continua sendo um conjunto de regras
+    válido, que é o que a função de cálculo do memo recebe.
+    """
+    canonical = {
+        rule._replace(
+            ip_ranges=tuple(sorted({(cidr, None) for cidr, _ in rule.ip_ranges}, key=str)),
+            ipv6_ranges=tuple(sorted({(cidr, None) for cidr, _ in rule.ipv6_ranges}, key=str)),
+            group_pairs=tuple(sorted({(group_id, None) for group_id, _ in rule.group_pairs}, key=str)),
+            prefix_lists=tuple(sorted(set(rule.prefix_lists), key=str)),
+        )
+        for rule in rules
+    }
+    return tuple(sorted(canonical, key=_rule_sort_key))
+
+
+class RuleSetMemo:
+    """Memo LRU limitado, indexado por (namespace, conjunto de regras), com contagem de acertos."""
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = int(max_entries or get_config('RULESET_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, namespace: str, keys: list, compute) -> list:
+        """
+        Devolve os valores de `keys` (alinhados, com repetições). Os conjuntos ausentes são
+        calculados de uma vez com `compute(lista de conjuntos distintos)`, que devolve os
+        valores na mesma ordem. Cada grupo servido sem recálculo conta como acerto.
+        """
+        values = [None] * len(keys)
+        missing = {}  # conjunto -> posições que o usam
+        with self._lock:
+            for pos, key in enumerate(keys):
+                value = self._entries.get((namespace, key), _MISS)
+                if value is _MISS:
+                    missing.setdefault(key, []).append(pos)
+                else:
+                    self._entries.move_to_end((namespace, key))
+                    values[pos] = value
+
+        if missing:
+            unique = list(missing)
+            computed = compute(unique)
+            with self._lock:
+                for key, value in zip(unique, computed):
+                    self._entries[(namespace, key)] = value
+                    for pos in missing[key]:
+                        values[pos] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return values
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_default_memo = None
+
+
+def get_rule_set_memo() -> RuleSetMemo:
+    """Memo compartilhado pelo processo (análise e formatação das regras)."""
+    global _default_memo
+    if _default_memo is None:
+        _default_memo = RuleSetMemo()
+    return _default_memo
@@ -0,0 +1,175 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+import os  # Biblioteca para manipulação de arquivos e diretórios
+
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+
+from .config import get_config
+from .excel_writer import write_workbook, iter_chunks
+
+# --- SAÍDAS (SINKS) DOS RELATÓRIOS ---
+# Cada sink recebe as mesmas tabelas montadas por `build_tables` e grava em um formato.
+# Como as tabelas são montadas uma única vez, vários formatos saem do mesmo build em memória.
+# Uma tabela pode ser também uma SpooledTable (utils/spool.py), gravada bloco a bloco.
+
+CATEGORICAL_COLUMNS = ('Account', 'Region', 'Risco')  # Colunas de baixa cardinalidade, gravadas como categorias
+STREAM_CHUNK_ROWS = 50000  # Linhas serializadas por vez nos formatos em streaming
+
+
+def _table_path(base_path: str, table_name: str, extension: str) -> str:
+    """Formatos de uma tabela por arquivo: <base>_<Tabela>.<ext>."""
+    return f"{base_path}_{table_name}.{extension}"
+
+
+def _tables(data_frames: dict, sheet_order: list):
+    """Tabelas não vazias, na ordem das abas."""
+    for name in sheet_order:
+        df = data_frames.get(name)
+        if df is not None and not df.empty:
+            yield name, df
+
+
+class ExcelSink:
+    """Planilha .xlsx única, com uma aba por tabela (gravada em streaming)."""
+    extension = 'xlsx'
+
+    def write(self, base_path, data_frames, sheet_order, risk_columns=None):
+        path = f"{base_path}.{self.extension}"
+        write_workbook(path, data_frames, sheet_order=sheet_order, risk_columns=risk_columns)
+        return [path]
+
+
+class ParquetSink:
+    """Um arquivo Parquet por tabela, comprimido e com Account/Region/Risco como colunas categóricas."""
+    extension = 'parquet'
+
+    def __init__(self, compression=None):
+        self.compression = compression or get_config('PARQUET_COMPRESSION', 'snappy')
+
+    def write(self, base_path, data_frames, sheet_order, risk_columns=None):
+        paths = []
+        for name, df in _tables(data_frames, sheet_order):
+            path = _table_path(base_path, name, self.extension)
+            if isinstance(df, pd.DataFrame):
+                self._typed(df).to_parquet(path, compression=self.compression, index=False)
+            else:
+                self._write_chunks(path, df)
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def _typed(df):
+        typed = df.assign(**{c: df[c].astype('category') for c in CATEGORICAL_COLUMNS if c in df.columns})
+        # Colunas com tipos mistos (ex.: datas e textos) não têm tipo Parquet: gravadas como texto
+        mixed = [c for c in typed.columns if typed[c].dtype == object and typed[c].map(type).nunique() > 1]
+        return typed.assign(**{c: typed[c].astype(str).where(typed[c].notna(), None) for c in mixed})
+
+    def _write_chunks(self, path, table):
+        """Tabela em disco: um row group por bloco, com o esquema do primeiro bloco."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in table.iter_chunks():
+                typed = self._typed(chunk)
+                if writer is None:
+                    arrow_table = pa.Table.from_pandas(typed, preserve_index=False)
+                    writer = pq.ParquetWriter(path, arrow_table.schema, compression=self.compression)
+                else:
+                    arrow_table = pa.Table.from_pandas(typed, schema=writer.schema, preserve_index=False)
+                writer.write_table(arrow_table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+class JsonlSink:
+    """Um arquivo JSON por linha (NDJSON) por tabela, serializado em blocos."""
+    extension = 'jsonl'
+
+    def write(self, base_path, data_frames, sheet_order, risk_columns=None):
+        paths = []
+        for name, df in _tables(data_frames, sheet_order):
+            path = _table_path(base_path, name, self.extension)
+            with open(path, 'w', encoding='utf-8') as handle:
+                for chunk in iter_chunks(df, STREAM_CHUNK_ROWS):
+                    # Cada bloco já termina com quebra de linha, então os blocos podem ser concatenados
+                    handle.write(chunk.to_json(orient='records', lines=True, date_format='iso', force_ascii=False))
+            paths.append(path)
+        return paths
+
+
+class CsvSink:
+    """Um arquivo CSV (UTF-8) por tabela."""
+    extension = 'csv'
+
+    def write(self, base_path, data_frames, sheet_order, risk_columns=None):
+        paths = []
+        for name, df in _tables(data_frames, sheet_order):
+            path = _table_path(base_path, name, self.extension)
+            if isinstance(df, pd.DataFrame):
+                df.to_csv(path, index=False, encoding='utf-8', chunksize=STREAM_CHUNK_ROWS)
+            else:
+                # Tabela em disco: cabeçalho só no primeiro bloco, os demais são acrescentados
+                for position, chunk in enumerate(df.iter_chunks()):
+                    chunk.to_csv(path, mode='w' if position == 0 else 'a', header=position == 0, index=False, encoding='utf-8')
+            paths.append(path)
+        return paths
+
+
+SINKS = {
+    'xlsx': ExcelSink,
+    'parquet': ParquetSink,
+    'jsonl': JsonlSink,
+    'csv': CsvSink,
+}
+
+
+def resolve_formats(default_formats=None) -> list:
+    """Formatos de saída: OUTPUT_FORMATS (ex.: 'xlsx,parquet') tem prioridade sobre o padrão do relatório."""
+    configured = get_config('OUTPUT_FORMATS')
+    if configured:
+        return [fmt.strip().lower() for fmt in configured.split(',') if fmt.strip()]
+    return list(default_formats or ['xlsx'])
+
+
+class OutputError(Exception):
+    """
+    Falha na gravação das saídas: nenhum arquivo foi gerado ou algum formato pedido falhou.
+    `written` traz os arquivos que chegaram a ser gravados (execução parcial).
+    """
+    def __init__(self, message: str, written: list = None):
+        super().__init__(message)
+        self.written = list(written or [])
+
+
+def write_outputs(output_path: str, data_frames: dict, sheet_order: list, formats=None, risk_columns=None) -> list:
+    """
+    Grava as tabelas em todos os formatos pedidos. `output_path` pode vir com extensão
+    (ex.: o .xlsx montado pelo main): ela é removida e usada como base dos arquivos.
+    Retorna a lista de arquivos gerados. Falha em um formato não impede os demais, mas ao
+    final levanta OutputError se algum formato falhou ou se nenhum arquivo foi gerado; só
+    um formato com dependência opcional ausente (ex.: Parquet sem pyarrow) é apenas ignorado.
+    """
+    base_path = os.path.splitext(output_path)[0]
+    os.makedirs(os.path.dirname(base_path) or '.', exist_ok=True)
+    written, failed = [], []
+    for fmt in formats or ['xlsx']:
+        sink_class = SINKS.get(fmt)
+        if sink_class is None:
+            logging.warning(f"Formato de saída desconhecido '{fmt}'. Opções: {', '.join(SINKS)}")
+            continue
+        try:
+            written.extend(sink_class().write(base_path, data_frames, sheet_order, risk_columns=risk_columns))
+        except ImportError as e:
+            # Parquet depende de pyarrow, que é opcional
+            logging.warning(f"Dependência ausente para o formato '{fmt}': {e}. Formato ignorado.")
+        except Exception as e:
+            logging.error(f"Falha ao gravar o formato '{fmt}': {e}")
+            failed.append(f"{fmt}: {e}")
+    for path in written:
+        logging.info(f"Saída gerada: {os.path.basename(path)}")
+    if failed:
+        raise OutputError(f"Falha ao gravar {len(failed)} formato(s) de saída ({'; '.join(failed)})", written)
+    if not written:
+        raise OutputError("Nenhum arquivo de saída foi gerado.")
+    return written
@@ -0,0 +1,78 @@
+import pickle  # Serialização dos blocos no arquivo temporário
+import tempfile  # Arquivo anônimo, apagado ao ser fechado
+
+import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
+
+from .config import get_config
+
+# --- TABELA EM DISCO (SPOOL) ---
+# Para inventários com centenas de milhares de linhas: as linhas chegam aos poucos, são
+# acumuladas em blocos pequenos e cada bloco vira um DataFrame gravado num arquivo
+# temporário. A leitura devolve um bloco por vez, então nem a coleta nem a gravação dos
+# relatórios precisam da tabela inteira em memória. Os sinks (utils/sinks.py) aceitam uma
+# SpooledTable no lugar de um DataFrame.
+
+DEFAULT_CHUNK_ROWS = 20000  # Linhas por bloco
+
+
+class SpooledTable:
+    """Tabela gravada em blocos num arquivo temporário e lida de volta bloco a bloco."""
+
+    def __init__(self, columns: list, chunk_rows: int = None):
+        self.columns = list(columns)
+        self.chunk_rows = int(chunk_rows or get_config('SPOOL_CHUNK_ROWS', DEFAULT_CHUNK_ROWS))
+        self._file = tempfile.TemporaryFile()
+        self._buffer = []
+        self._rows = 0
+
+    def append(self, row: tuple):
+        """Acrescenta uma linha (valores na ordem de `columns`)."""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_rows:
+            self._flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def append_frame(self, df: pd.DataFrame):
+        """Acrescenta um bloco já montado (as colunas devem ser as mesmas, na mesma ordem)."""
+        self._flush()
+        if len(df):
+            pickle.dump(df.reset_index(drop=True), self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._rows += len(df)
+
+    def _flush(self):
+        if self._buffer:
+            pickle.dump(pd.DataFrame(self._buffer, columns=self.columns), self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._rows += len(self._buffer)
+            self._buffer = []
+
+    def __len__(self):
+        return self._rows + len(self._buffer)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def iter_chunks(self):
+        """Gera os blocos (DataFrames) na ordem de inserção."""
+        self._flush()
+        self._file.seek(0)
+        try:
+            while True:
+                try:
+                    yield pickle.load(self._file)
+                except EOFError:
+                    return
+        finally:
+            # Novas linhas continuam sendo gravadas no fim do arquivo
+            self._file.seek(0, 2)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materializa a tabela inteira (ex.: para juntar contas no modo multi-conta)."""
+        chunks = list(self.iter_chunks())
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=self.columns)
+
+    def close(self):
+        self._file.close()
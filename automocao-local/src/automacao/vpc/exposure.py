@@ -0,0 +1,64 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+
+# Ordem dos níveis de risco na aba de endpoints expostos (mais grave primeiro)
+SEVERITY_ORDER = ("Alto", "Médio")
+
+# Colunas da aba de endpoints expostos (mantidas mesmo quando não há nenhuma linha)
+ENDPOINT_COLUMNS = [
+    "Risco", "Região", "VpcId", "ENI", "Tipo", "Status", "Instância",
+    "IP Privado", "IPs Públicos", "Security Groups de Risco"
+]
+
+
+class ENIExposureIndex:
+    """
+    Índice Security Group -> interfaces de rede (ENIs) que o usam.
+
+    Montado em uma única passada pelas interfaces; responde quais ENIs, instâncias e IPs
+    públicos estão atrás de cada grupo e quais grupos não estão associados a nenhuma ENI.
+    """
+    def __init__(self, interfaces: list):
+        self.interfaces = interfaces
+        self.by_group: dict[str, list[int]] = {}
+        for pos, eni in enumerate(interfaces):
+            for group_id in eni.group_ids:
+                self.by_group.setdefault(group_id, []).append(pos)
+
+        logging.info(f"Índice de exposição: {len(interfaces)} interfaces de rede, {len(self.by_group)} Security Groups em uso.")
+
+    def attachment_count(self, group_id: str) -> int:
+        """Quantas ENIs usam o grupo (0 = grupo sem uso, candidato a remoção)."""
+        return len(self.by_group.get(group_id, ()))
+
+    def unused_groups(self, group_ids) -> list:
+        return [group_id for group_id in group_ids if group_id not in self.by_group]
+
+
+def exposed_endpoints(index: ENIExposureIndex, sg_risk_map: dict) -> list:
+    """
+    Junta as interfaces ao risco dos seus Security Groups (hash join com o sg_risk_map) e
+    devolve as linhas da aba de endpoints expostos, da mais grave para a menos grave:
+    por nível de risco e, dentro dele, primeiro as interfaces com IP público.
+
+    A ordenação é feita por baldes (nível x IP público), então o custo continua linear
+    no número de interfaces.
+    """
+    buckets = {(severity, has_public_ip): [] for severity in SEVERITY_ORDER for has_public_ip in (True, False)}
+    for eni in index.interfaces:
+        risky_groups = [group_id for group_id in eni.group_ids if sg_risk_map.get(group_id, "Seguro") in SEVERITY_ORDER]
+        if not risky_groups:
+            continue
+        severity = next(level for level in SEVERITY_ORDER if any(sg_risk_map[group_id] == level for group_id in risky_groups))
+        buckets[(severity, bool(eni.public_ips))].append({
+            "Risco": severity,
+            "Região": eni.region,
+            "VpcId": eni.vpc_id,
+            "ENI": eni.id,
+            "Tipo": eni.interface_type,
+            "Status": eni.status,
+            "Instância": eni.instance_id or "N/A",
+            "IP Privado": eni.private_ip,
+            "IPs Públicos": ", ".join(eni.public_ips) or "N/A",
+            "Security Groups de Risco": ", ".join(f"{group_id} ({sg_risk_map[group_id]})" for group_id in risky_groups),
+        })
+    return [row for rows in buckets.values() for row in rows]
@@ -1,23 +1,73 @@
 import pandas as pd  # Biblioteca para manipulação de dados tabulares (DataFrames)
-import boto3  # Biblioteca oficial AWS para interagir com serviços AWS via API
 import logging  # Biblioteca para registrar logs de eventos e erros
-import io  # Biblioteca para manipulação de streams em memória (usada para criar arquivo Excel em memória)
 import os  # Biblioteca para manipulação de arquivos e diretórios
-from openpyxl import load_workbook  # Biblioteca para manipular arquivos Excel (.xlsx)
-from openpyxl.styles import Alignment, PatternFill, Font  # Para formatar células Excel (alinhamento, cor, fonte)
-from openpyxl.utils import get_column_letter  # Para converter número de coluna em letra (ex: 1 -> 'A')
 from collections import defaultdict  # Estrutura de dados que cria dicionário com listas automaticamente
-from ..models import VPC, SecurityGroup  # Importa classes que modelam VPC e Security Group
+from datetime import datetime, timezone
+from ..models import VPC, SecurityGroup, NetworkInterface  # Importa classes que modelam VPC, Security Group e ENI
 from ..utils import formatters  # Importa utilitários para formatar regras de segurança
 from ..security_analyzer import analyze_sgs  # Importa função que analisa riscos dos Security Groups
+from ..utils.config import get_config  # Importa leitura de configurações do ambiente
+from ..utils.sinks import write_outputs  # Gravação das saídas (xlsx, parquet, jsonl, csv)
+from ..collection import ResourceSpec, collect, stream  # Motor de coleta declarativo (paralelo, paginado, com cache)
+from ..utils.memo import get_rule_set_memo  # Conjuntos de regras idênticos formatados uma única vez
+from .graph import SGReferenceGraph, exposure_findings  # Grafo de referências SG -> SG e exposição transitiva
+from .exposure import ENIExposureIndex, exposed_endpoints, ENDPOINT_COLUMNS, SEVERITY_ORDER  # Índice SG -> interfaces de rede (ENIs)
+from ..incremental import IncrementalState, analyze_incrementally, sg_fingerprint, save_inventory, load_inventory  # Reanálise só do que mudou
+from ..events import SECURITY_GROUP, group_by_kind  # Recursos afetados por eventos do CloudTrail/EventBridge
+
+# Número padrão de chamadas simultâneas (região x API) durante a coleta
+DEFAULT_MAX_WORKERS = 8
+
+# IDs por chamada ao rebuscar recursos específicos (limite de valores de um filtro)
+REFETCH_BATCH_SIZE = 200
+
+# Recursos coletados pelo relatório, em cada região escaneada
+VPC_SPEC = ResourceSpec('vpcs', 'ec2', 'describe_vpcs', 'Vpcs', model=VPC)
+SG_SPEC = ResourceSpec('security_groups', 'ec2', 'describe_security_groups', 'SecurityGroups', model=SecurityGroup)
+ENI_SPEC = ResourceSpec('network_interfaces', 'ec2', 'describe_network_interfaces', 'NetworkInterfaces', model=NetworkInterface)
+VPC_SPECS = [VPC_SPEC, SG_SPEC, ENI_SPEC]
+
+
+def _fetch_by_id(spec: ResourceSpec, filter_name: str, ids_by_region: dict, session=None):
+    """
+    Rebusca recursos específicos ({região: [IDs]}) com um filtro por ID, sem passar pelo
+    cache. Devolve ({ID: objeto}, IDs cuja busca falhou); IDs que a API não devolve não existem mais.
+    """
+    found, failed = {}, set()
+    for region, ids in ids_by_region.items():
+        ids = list(ids)
+        for start in range(0, len(ids), REFETCH_BATCH_SIZE):
+            batch = ids[start:start + REFETCH_BATCH_SIZE]
+            errors = []
+            batch_spec = spec._replace(filters=({'Name': filter_name, 'Values': batch},))
+            for _, items in stream(batch_spec, session=session, regions=[region], max_workers=1, errors=errors):
+                found.update((item.id, item) for item in items)
+            if errors:
+                logging.warning(f"Falha ao rebuscar {spec.name} em {region}: {errors[0].error}")
+                failed.update(batch)
+    return found, failed
+
 
 class VPCReport:
     """Fábrica autônoma para criar o relatório completo de VPC em memória."""
 
-    def __init__(self, regions_to_scan: list):
+    # Ordem das abas e colunas de risco usadas por todas as saídas (inclusive o consolidado multi-conta)
+    SHEET_ORDER = ['Security_Analysis', 'Exposed_Endpoints', 'VPCs', 'SecurityGroups', 'Delta', 'Tendencia']
+    RISK_COLUMNS = {'Security_Analysis': 'Risco', 'Exposed_Endpoints': 'Risco', 'SecurityGroups': 'Risco'}
+
+    def __init__(self, regions_to_scan: list, prefetched_vpcs: dict = None, max_workers: int = None, state_path: str = None, session=None, inventory_path: str = None):
         # Recebe a lista de regiões AWS que serão escaneadas
         self.regions_to_scan = regions_to_scan
         
+        # Sessão boto3 usada na coleta (ex.: sessão de uma role assumida em outra conta)
+        self.session = session
+        
+        # Payloads de describe_vpcs já obtidos na descoberta de regiões ({região: [vpcs]})
+        self.prefetched_vpcs = prefetched_vpcs or {}
+        
+        # Limite de chamadas simultâneas à API durante a coleta
+        self.max_workers = int(max_workers or get_config('COLLECT_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+        
         # Inicializa lista que armazenará objetos VPC carregados da AWS
         self.vpcs: list[VPC] = []
         
@@ -27,47 +77,51 @@ class VPCReport:
         # Inicializa dicionário que mapeará ID do Security Group para seu nível de risco
         self.sg_risk_map = {}
         
+        # Grafo de referências entre Security Groups, construído na coleta
+        self.sg_graph = None
+        
+        # Índice SG -> interfaces de rede, endpoints expostos e regiões sem a lista de ENIs
+        self.eni_index = None
+        self.endpoints_df = pd.DataFrame(columns=ENDPOINT_COLUMNS)
+        self.eni_failed_regions = set()
+        
+        # Arquivos gerados pela última chamada de generate_report
+        self.output_files = []
+        
+        # Modo incremental: caminho do estado da execução anterior e aba de diferenças
+        self.state_path = state_path
+        self.delta_df = None
+        
+        # Tendência de risco por região nas últimas execuções (montada a partir do histórico)
+        self.trend_df = None
+        
+        # Inventário persistido (atualizado por eventos) e início da última coleta completa
+        self.inventory_path = inventory_path
+        self.collected_at = None
+        
         # Registra no log o início da fábrica com o número de regiões a escanear
         logging.info(f"Fábrica de Relatório VPC iniciada para {len(self.regions_to_scan)} região(ões).")
 
     def collect_data(self):
         """ETAPA 1: Coleta dados brutos da AWS, cria e interliga os objetos em memória."""
-        logging.info("Iniciando coleta e construção do modelo de dados...")
-        
-        # Listas para armazenar dados brutos de Security Groups e VPCs de todas as regiões
-        all_sgs_raw = []
-        all_vpcs_raw = []
-        
-        # Cria uma sessão boto3 para interagir com AWS
-        session = boto3.Session()
-
-        # Para cada região definida para escanear
-        for region in self.regions_to_scan:
-            logging.info(f"Coletando dados da região: {region}...")
-            try:
-                # Cria cliente EC2 para a região atual
-                client = session.client('ec2', region_name=region)
-                
-                # Coleta dados brutos das VPCs e Security Groups da região via API AWS
-                vpcs_data = client.describe_vpcs().get('Vpcs', [])
-                sgs_data = client.describe_security_groups().get('SecurityGroups', [])
-                
-                # Adiciona a informação da região em cada item coletado para referência futura
-                for item in vpcs_data: item['Region'] = region
-                for item in sgs_data: item['Region'] = region
-                
-                # Extende as listas globais com os dados coletados da região atual
-                all_vpcs_raw.extend(vpcs_data)
-                all_sgs_raw.extend(sgs_data)
-            except Exception as e:
-                # Caso falhe a coleta em alguma região, registra aviso e continua
-                logging.warning(f"Falha ao coletar dados da região {region}: {e}")
-        
-        # Cria objetos VPC a partir dos dados brutos coletados
-        vpcs_obj = [VPC(data) for data in all_vpcs_raw]
-        
-        # Cria objetos Security Group a partir dos dados brutos coletados
-        sgs_obj = [SecurityGroup(data) for data in all_sgs_raw]
+        logging.info(f"Iniciando coleta paralela ({self.max_workers} workers) e construção do modelo de dados...")
+        
+        # Eventos a partir deste instante podem não estar refletidos na coleta
+        self.collected_at = datetime.now(timezone.utc)
+        
+        # VPCs e Security Groups de todas as regiões, em paralelo; VPCs já sondadas na descoberta não são buscadas de novo
+        result = collect(
+            VPC_SPECS, session=self.session, regions=self.regions_to_scan, max_workers=self.max_workers,
+            prefetched={'vpcs': self.prefetched_vpcs}
+        )
+        
+        # Objetos VPC e Security Group já construídos pelo motor de coleta, na ordem das regiões
+        vpcs_obj = result['vpcs']
+        sgs_obj = result['security_groups']
+        
+        # Onde cada SG está de fato em uso; sem a lista de ENIs de uma região, o uso dos seus SGs fica desconhecido
+        self.eni_index = ENIExposureIndex(result['network_interfaces'])
+        self.eni_failed_regions = {error.region for error in result.errors if error.spec == 'network_interfaces'}
         
         # Agrupa os Security Groups por ID da VPC a que pertencem
         sgs_by_vpc = defaultdict(list)
@@ -81,11 +135,100 @@ class VPCReport:
         # Armazena a lista completa de VPCs com seus Security Groups no atributo da classe
         self.vpcs = vpcs_obj
         
-        logging.info(f"Modelo de dados com {len(self.vpcs)} VPCs construído.")
+        # Indexa as referências SG -> SG para a análise de exposição transitiva
+        self.sg_graph = SGReferenceGraph(sgs_obj)
+        
+        logging.info(f"Modelo de dados com {len(self.vpcs)} VPCs e {len(sgs_obj)} Security Groups construído.")
+        
+        if self.inventory_path:
+            self.save_inventory()
         
         # Retorna self para permitir encadeamento de métodos (ex: factory.collect_data().analyze_security())
         return self
 
+    def save_inventory(self):
+        """Grava VPCs, Security Groups e o índice de ENIs para a próxima execução por eventos."""
+        save_inventory(self.inventory_path, 'vpc', {
+            'collected_at': self.collected_at,
+            'regions': self.regions_to_scan,
+            'vpcs': self.vpcs,
+            'eni_index': self.eni_index,
+            'eni_failed_regions': self.eni_failed_regions,
+        })
+
+    def load_inventory(self) -> bool:
+        """Carrega o inventário persistido no lugar da coleta; False se não há inventário utilizável."""
+        data = load_inventory(self.inventory_path, 'vpc')
+        if data is None:
+            return False
+        self.collected_at = data['collected_at']
+        self.regions_to_scan = data['regions']
+        self.vpcs = data['vpcs']
+        self.eni_index = data['eni_index']
+        self.eni_failed_regions = data['eni_failed_regions']
+        self.sg_graph = SGReferenceGraph([sg for vpc in self.vpcs for sg in vpc.security_groups])
+        logging.info(f"Inventário carregado: {len(self.vpcs)} VPCs coletadas em {self.collected_at:%Y-%m-%d %H:%M:%S} UTC.")
+        return True
+
+    def apply_events(self, events: list):
+        """
+        ETAPA 1 (por eventos): rebusca só os Security Groups afetados pelos eventos e os
+        substitui no inventário carregado; grupos que não existem mais são removidos.
+        As interfaces de rede continuam as da última coleta completa.
+        """
+        changed = group_by_kind(events).get(SECURITY_GROUP, {})
+        if not changed:
+            logging.info("Nenhum evento afeta Security Groups: o inventário carregado é usado sem alterações.")
+            return self
+
+        ids_by_region = defaultdict(list)
+        for group_id, region in changed.items():
+            ids_by_region[region].append(group_id)
+        fetched, failed = _fetch_by_id(SG_SPEC, 'group-id', ids_by_region, session=self.session)
+
+        # VPCs criadas depois da última coleta (grupo novo numa VPC nova)
+        vpcs_by_id = {vpc.id: vpc for vpc in self.vpcs}
+        missing_vpcs = defaultdict(set)
+        for sg in fetched.values():
+            if sg.vpc_id not in vpcs_by_id:
+                missing_vpcs[sg.region].add(sg.vpc_id)
+        if missing_vpcs:
+            new_vpcs, _ = _fetch_by_id(VPC_SPEC, 'vpc-id', missing_vpcs, session=self.session)
+            for vpc in new_vpcs.values():
+                self.vpcs.append(vpc)
+                vpcs_by_id[vpc.id] = vpc
+
+        # Substitui os grupos rebuscados no lugar, remove os que não existem mais e acrescenta os novos
+        updated = removed = 0
+        for vpc in self.vpcs:
+            kept = []
+            for sg in vpc.security_groups:
+                if sg.id in fetched:
+                    kept.append(fetched.pop(sg.id))
+                    updated += 1
+                elif sg.id in changed and sg.id not in failed:
+                    removed += 1
+                else:
+                    kept.append(sg)
+            vpc.security_groups = kept
+        added = 0
+        for sg in fetched.values():
+            vpc = vpcs_by_id.get(sg.vpc_id)
+            if vpc is None:
+                logging.warning(f"Security Group {sg.id} ignorado: VPC {sg.vpc_id} não encontrada.")
+                continue
+            vpc.security_groups.append(sg)
+            added += 1
+
+        self.sg_graph = SGReferenceGraph([sg for vpc in self.vpcs for sg in vpc.security_groups])
+        logging.info(
+            f"Eventos aplicados: {updated} Security Group(s) atualizados, {added} novo(s), {removed} removido(s)"
+            + (f", {len(failed)} sem resposta da API (mantidos como estavam)." if failed else ".")
+        )
+        if self.inventory_path:
+            self.save_inventory()
+        return self
+
     def analyze_security(self):
         """ETAPA 2: Analisa os SGs coletados e armazena os resultados internamente."""
         logging.info("Analisando riscos de segurança dos objetos...")
@@ -96,129 +239,126 @@ class VPCReport:
         # Chama função externa para analisar os Security Groups e obter:
         # - DataFrame com achados da análise
         # - Mapeamento do risco de cada Security Group
-        self.findings_df, self.sg_risk_map = analyze_sgs(all_sgs_objects)
+        # No modo incremental, só os SGs alterados desde a última execução são reanalisados.
+        # A exposição transitiva depende dos outros grupos: é recalculada a cada execução, antes do Delta.
+        if self.state_path:
+            state = IncrementalState(self.state_path)
+            self.findings_df, self.sg_risk_map, self.delta_df = analyze_incrementally(
+                all_sgs_objects, lambda sg: sg.id, sg_fingerprint, analyze_sgs, state, "ID do Security Group",
+                derive_fn=self._add_transitive_exposure
+            )
+            state.save()
+        else:
+            self.findings_df, self.sg_risk_map = self._add_transitive_exposure(*analyze_sgs(all_sgs_objects))
         
         # Atualiza o atributo risk_level de cada Security Group com o resultado da análise
         for sg in all_sgs_objects:
             sg.risk_level = self.sg_risk_map.get(sg.id, "Seguro")
         
+        # Cruza as interfaces de rede com o risco dos seus SGs: quais endpoints estão realmente expostos
+        if self.eni_index is not None:
+            self.endpoints_df = pd.DataFrame(exposed_endpoints(self.eni_index, self.sg_risk_map), columns=ENDPOINT_COLUMNS)
+            unused = self.eni_index.unused_groups(sg.id for sg in all_sgs_objects if sg.region not in self.eni_failed_regions)
+            logging.info(f"{len(self.endpoints_df)} interface(s) de rede expostas; {len(unused)} Security Group(s) sem uso.")
+        
         logging.info("Análise de segurança concluída.")
         
         # Retorna self para encadeamento
         return self
 
-    def generate_report(self, output_path: str):
-        """ETAPA 3 e 4: Gera a planilha final, formatada, com links e a salva no disco."""
+    def _add_transitive_exposure(self, findings_df, sg_risk_map):
+        """Propaga a exposição à internet pelas referências entre grupos (SG de risco -> SG que o referencia)."""
+        if self.sg_graph is None:
+            return findings_df, sg_risk_map
+        # Origens: só os grupos classificados como de risco pela análise de regras (não os abertos só em 80/443)
+        risky_ids = [sg_id for sg_id, risk in sg_risk_map.items() if risk in SEVERITY_ORDER]
+        transitive = exposure_findings(self.sg_graph, self.sg_graph.transitive_exposure(risky_ids))
+        if transitive:
+            # Grupos que só são expostos indiretamente deixam de ser "Seguro"
+            for finding in transitive:
+                if sg_risk_map.get(finding["ID do Security Group"], "Seguro") == "Seguro":
+                    sg_risk_map[finding["ID do Security Group"]] = "Médio"
+            direct = findings_df[findings_df["Risco"] != "Parabéns!"]
+            findings_df = pd.concat([direct, pd.DataFrame(transitive)], ignore_index=True)
+            logging.info(f"{len(transitive)} Security Group(s) expostos indiretamente via referências.")
+        return findings_df, sg_risk_map
+
+    def history_findings(self):
+        """(recurso, região, risco, detalhe) de cada achado, para o histórico de execuções."""
+        if "ID do Security Group" not in self.findings_df:
+            return
+        regions = {sg.id: sg.region for vpc in self.vpcs for sg in vpc.security_groups}
+        findings = self.findings_df
+        for sg_id, risk, rule in zip(findings["ID do Security Group"], findings["Risco"], findings["Regra Problemática"]):
+            if risk != "Parabéns!":
+                yield sg_id, regions.get(sg_id), risk, rule
+
+    def generate_report(self, output_path: str, formats: list = None):
+        """ETAPA 3 e 4: Gera as saídas finais (planilha e/ou formatos colunares) e as salva no disco."""
         logging.info("Gerando e formatando relatório final...")
         
-        # Constrói DataFrames para cada aba do Excel a partir dos objetos em memória
-        data_frames = self._build_dataframes()
+        # Constrói DataFrames para cada aba uma única vez; todos os formatos reutilizam o mesmo build
+        data_frames = self.build_tables()
         
-        # Cria um buffer em memória para salvar o arquivo Excel temporariamente
-        buffer = io.BytesIO()
-        
-        # Usa pandas ExcelWriter com engine openpyxl para escrever múltiplas abas
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            # Define ordem das abas no arquivo final
-            sheet_order = ['Security_Analysis', 'VPCs', 'SecurityGroups']
-            
-            # Para cada aba, se existir dados, escreve no Excel
-            for sheet_name in data_frames.keys():
-                if sheet_name in sheet_order and not data_frames[sheet_name].empty:
-                    data_frames[sheet_name].to_excel(writer, sheet_name=sheet_name, index=False)
-        
-        # Carrega o arquivo Excel do buffer para aplicar formatações avançadas
-        workbook = load_workbook(buffer)
-        workbook = self._apply_final_formatting(workbook)
-
-        # Garante que o diretório de saída exista
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Salva o arquivo Excel final no disco
-        workbook.save(output_path)
+        # Grava cada formato pedido (xlsx em streaming, parquet, jsonl, csv)
+        self.output_files = write_outputs(
+            output_path,
+            data_frames,
+            sheet_order=self.SHEET_ORDER,
+            formats=formats,
+            risk_columns=self.RISK_COLUMNS
+        )
         
         logging.info(f"Relatório final gerado com sucesso em: {os.path.basename(output_path)}")
 
-    def _build_dataframes(self):
-        """Método privado para converter os objetos em DataFrames prontos para o Excel."""
+    def build_tables(self):
+        """Converte os objetos em DataFrames prontos para as saídas (também usado pelo multi-conta e pelo modo serviço)."""
         
         # Prepara lista de dicionários com dados das VPCs para o DataFrame
         vpcs_for_df = [{'VpcId': v.id, 'VPC Name': v.name, 'Region': v.region} for v in self.vpcs]
         
-        # Prepara lista de dicionários com dados dos Security Groups, formatando regras para leitura
+        # Formata as regras para leitura; conjuntos repetidos (ex.: a saída padrão) são formatados uma vez
+        all_sgs = [sg for v in self.vpcs for sg in v.security_groups]
+        memo = get_rule_set_memo()
+        format_many = lambda rule_sets: [formatters.format_rules(rules) for rules in rule_sets]
+        inbound_texts = memo.get_many('format_rules', [sg.inbound for sg in all_sgs], format_many)
+        outbound_texts = memo.get_many('format_rules', [sg.outbound for sg in all_sgs], format_many)
+
+        # Prepara lista de dicionários com dados dos Security Groups
         sgs_for_df = [
             {
                 'GroupId': sg.id,
                 'GroupName': sg.name,
                 'VpcId': sg.vpc_id,
                 'Region': sg.region,
-                'Inbound Rules': formatters.format_rules(sg.raw_rules.get('IpPermissions', [])),
-                'Outbound Rules': formatters.format_rules(sg.raw_rules.get('IpPermissionsEgress', []))
+                'Risco': self.sg_risk_map.get(sg.id, "Seguro"),
+                'Inbound Rules': inbound_text,
+                'Outbound Rules': outbound_text,
+                'ENIs Associadas': self._attachment_count(sg),
+                'Em Uso': self._usage_label(sg)
             }
-            for v in self.vpcs for sg in v.security_groups
+            for sg, inbound_text, outbound_text in zip(all_sgs, inbound_texts, outbound_texts)
         ]
         
         # Retorna um dicionário com os DataFrames para cada aba do Excel
         return {
             'VPCs': pd.DataFrame(vpcs_for_df),
             'SecurityGroups': pd.DataFrame(sgs_for_df),
-            'Security_Analysis': self.findings_df
+            'Security_Analysis': self.findings_df,
+            'Exposed_Endpoints': self.endpoints_df,
+            'Delta': self.delta_df if self.delta_df is not None else pd.DataFrame(),
+            'Tendencia': self.trend_df if self.trend_df is not None else pd.DataFrame()
         }
 
-    def _apply_final_formatting(self, workbook):
-        """Método privado para aplicar cores de linha, hyperlinks e layout no Excel."""
-        
-        # Configurações para criar links entre abas (não implementado totalmente aqui)
-        LINKING_CONFIG = {
-            'SecurityGroups': {'VpcId': 'VPCs'},
-            'Security_Analysis': {'ID do Security Group': 'SecurityGroups'}
-        }
-        
-        # Define cores para os níveis de risco: alto (vermelho), médio (amarelo), seguro (verde)
-        RED_FILL = PatternFill(start_color='FFC7CE', fill_type='solid')
-        YELLOW_FILL = PatternFill(start_color='FFEB9C', fill_type='solid')
-        GREEN_FILL = PatternFill(start_color='C6EFCE', fill_type='solid')
-        
-        # Cria mapas de IDs para cada aba, associando valor da célula da coluna A para número da linha
-        id_maps = {
-            sheet.title: {str(cell.value): cell.row for cell in sheet['A'] if cell.value is not None}
-            for sheet in workbook
-        }
+    def _attachment_count(self, sg):
+        """Número de ENIs que usam o grupo (None se não foi possível listar as ENIs da região)."""
+        if self.eni_index is None or sg.region in self.eni_failed_regions:
+            return None
+        return self.eni_index.attachment_count(sg.id)
 
-        # Aplica cores nas linhas da aba SecurityGroups conforme o nível de risco de cada SG
-        if 'SecurityGroups' in workbook.sheetnames and self.sg_risk_map:
-            sheet = workbook['SecurityGroups']
-            try:
-                # Encontra índice da coluna GroupId na primeira linha (cabeçalho)
-                sg_id_col_idx = [c.value for c in sheet[1]].index('GroupId') + 1
-                
-                # Para cada linha (exceto cabeçalho), colore a linha conforme risco
-                for row_cells in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
-                    sg_id = str(row_cells[sg_id_col_idx - 1].value)
-                    risk_level = self.sg_risk_map.get(sg_id, "Seguro")
-                    fill = {"Alto": RED_FILL, "Médio": YELLOW_FILL, "Seguro": GREEN_FILL}.get(risk_level)
-                    if fill:
-                        for cell in row_cells:
-                            cell.fill = fill
-            except ValueError:
-                logging.warning("Coluna 'GroupId' não encontrada para colorir linhas.")
-        
-        # Ajusta largura das colunas e alinhamento do texto para todas as abas
-        for sheet in workbook:
-            for col in sheet.columns:
-                max_length = 0
-                column_letter = get_column_letter(col[0].column)
-                for cell in col:
-                    # Define alinhamento para texto quebrado, topo e esquerda
-                    cell.alignment = Alignment(wrap_text=True, vertical='top', horizontal='left')
-                    
-                    # Calcula comprimento máximo do conteúdo da célula para ajustar largura da coluna
-                    if cell.value:
-                        max_length = max(max_length, max(len(line) for line in str(cell.value).split('\n')))
-                
-                # Ajusta largura da coluna com limite máximo para não ficar muito larga
-                adjusted_width = (max_length + 2) * 1.2
-                sheet.column_dimensions[column_letter].width = min(adjusted_width, 70)
-
-        # Retorna o workbook formatado para salvar
-        return workbook
+    def _usage_label(self, sg):
+        """'Não' marca grupos sem nenhuma ENI associada, candidatos a remoção."""
+        count = self._attachment_count(sg)
+        if count is None:
+            return 'Desconhecido'
+        return 'Sim' if count else 'Não'
@@ -0,0 +1,113 @@
+import logging  # Biblioteca para registrar logs de eventos e erros
+from collections import deque  # Fila para a busca em largura (BFS)
+
+from ..security_analyzer import ANYWHERE_CIDR
+
+
+class SGReferenceGraph:
+    """
+    Grafo indexado de referências entre Security Groups.
+
+    Existe uma aresta A -> B quando uma regra de entrada de B libera tráfego vindo de A
+    (UserIdGroupPairs). Se A está aberto para a internet, quem comprometer uma instância
+    de A alcança B: a exposição se propaga pelas arestas.
+    """
+    def __init__(self, security_groups: list):
+        # Índice ID -> posição, para que o grafo trabalhe só com inteiros
+        self.ids = [sg.id for sg in security_groups]
+        self.names = [sg.name for sg in security_groups]
+        self.index = {sg_id: pos for pos, sg_id in enumerate(self.ids)}
+
+        # Lista de adjacência: para cada origem, (destino, descrição da regra)
+        self.adjacency: list[list[tuple[int, str]]] = [[] for _ in security_groups]
+        self.world_open: list[int] = []
+        self.edge_count = 0
+
+        for pos, sg in enumerate(security_groups):
+            is_world_open = False
+            for rule in sg.inbound:
+                if any(cidr == ANYWHERE_CIDR for cidr, _ in rule.ip_ranges):
+                    is_world_open = True
+                if not rule.group_pairs:
+                    continue
+                rule_label = _rule_label(rule)
+                for group_id, _ in rule.group_pairs:
+                    source = self.index.get(group_id)
+                    # Referências a SGs fora do inventário (outras contas/regiões) e a si mesmo são ignoradas
+                    if source is None or source == pos:
+                        continue
+                    self.adjacency[source].append((pos, rule_label))
+                    self.edge_count += 1
+            if is_world_open:
+                self.world_open.append(pos)
+
+        logging.info(
+            f"Grafo de referências entre SGs: {len(self.ids)} grupos, {self.edge_count} referências, "
+            f"{len(self.world_open)} abertos para a internet."
+        )
+
+    def transitive_exposure(self, seed_ids) -> dict:
+        """
+        Propaga a exposição à internet pelas referências com uma BFS multi-origem,
+        partindo de todos os SGs de risco ao mesmo tempo. Custo O(grupos + referências).
+
+        `seed_ids` são os SGs que a análise de regras classificou como de risco: um grupo
+        aberto para a internet só nas portas web (80/443) é "Seguro" e não expõe quem o
+        referencia, então não entra como origem (`world_open` fica só como estatística).
+
+        Retorna {ID do SG: (caminho de IDs desde o SG aberto, regra da última aresta)}
+        apenas para os SGs expostos indiretamente (os abertos diretamente já são
+        tratados pela análise de regras).
+        """
+        parent = [-1] * len(self.ids)
+        parent_rule = [None] * len(self.ids)
+        visited = [False] * len(self.ids)
+        seeds = [self.index[sg_id] for sg_id in seed_ids if sg_id in self.index]
+        queue = deque(seeds)
+        for pos in seeds:
+            visited[pos] = True
+
+        while queue:
+            current = queue.popleft()
+            for target, rule_label in self.adjacency[current]:
+                if visited[target]:
+                    continue
+                visited[target] = True
+                parent[target] = current
+                parent_rule[target] = rule_label
+                queue.append(target)
+
+        exposure = {}
+        for pos, origin in enumerate(parent):
+            if origin == -1:
+                continue
+            path = [pos]
+            while parent[path[-1]] != -1:
+                path.append(parent[path[-1]])
+            exposure[self.ids[pos]] = ([self.ids[p] for p in reversed(path)], parent_rule[pos])
+        return exposure
+
+
+def _rule_label(rule) -> str:
+    """Descrição curta de protocolo/portas de uma regra (PermissionRule), no mesmo formato da análise."""
+    protocol = rule.protocol.upper().replace('-1', 'All')
+    from_port, to_port = rule.from_port, rule.to_port
+    if protocol == 'All' or from_port is None:
+        return f"{protocol}:TODAS"
+    return f"{protocol}:{from_port}" if from_port == to_port else f"{protocol}:{from_port}-{to_port}"
+
+
+def exposure_findings(graph: SGReferenceGraph, exposure: dict) -> list:
+    """Converte o resultado de `transitive_exposure` em achados no formato de analyze_sgs."""
+    findings = []
+    for sg_id, (path, rule_label) in exposure.items():
+        findings.append({
+            "Risco": "Médio",
+            "ID do Security Group": sg_id,
+            "Nome do Grupo": graph.names[graph.index[sg_id]],
+            "Regra Problemática": f"Entrada {rule_label} de {path[-2]}",
+            "Portas Afetadas": rule_label.split(':', 1)[1],
+            "Caminho de Exposição": " -> ".join([ANYWHERE_CIDR] + path),
+            "Recomendação": "Grupo referenciado está aberto para a internet. Restrinja a origem ou isole o grupo de origem."
+        })
+    return findings
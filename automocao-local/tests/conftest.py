@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Os testes importam o projeto como o main.py faz (a partir da raiz: src.automacao...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import SyntheticAWS, SyntheticSize  # noqa: E402
+from src.automacao.utils.cache import configure_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache():
+    """Sem cache de respostas em disco: cada teste vê o estado atual da conta sintética."""
+    configure_cache(enabled=False)
+    yield
+    configure_cache(enabled=False)
+
+
+@pytest.fixture
+def aws():
+    """Conta sintética pequena, servida por clientes boto3 reais sem acesso à rede."""
+    return SyntheticAWS(SyntheticSize(regions=2, vpcs=2, sgs=10, rules=3, users=20, keys=2))
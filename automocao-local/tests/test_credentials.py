@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+from botocore.credentials import Credentials, RefreshableCredentials
+
+from src.automacao.utils.credentials import clone_session, session_with_credentials
+
+
+def test_resolved_credentials_take_precedence_over_environment(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'AMBIENTE')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'segredo')
+
+    session = session_with_credentials(Credentials('RESOLVIDA', 'segredo'), region_name='sa-east-1')
+    clone = clone_session(session)
+
+    assert session.get_credentials().access_key == 'RESOLVIDA'
+    assert clone.get_credentials().access_key == 'RESOLVIDA' and clone.region_name == 'sa-east-1'
+
+
+def test_refreshable_credentials_keep_refreshing():
+    calls = []
+
+    def refresh():
+        calls.append(True)
+        # Expira logo: toda leitura cai na janela de renovação
+        expiry = datetime.now(timezone.utc) + timedelta(seconds=5)
+        return {'access_key': f'ROLE{len(calls)}', 'secret_key': 's', 'token': 't', 'expiry_time': expiry.isoformat()}
+
+    credentials = RefreshableCredentials.create_from_metadata(refresh(), refresh, 'sts-assume-role')
+    session = session_with_credentials(credentials)
+
+    assert session.get_credentials().get_frozen_credentials().access_key == 'ROLE2'
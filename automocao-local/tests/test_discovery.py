@@ -0,0 +1,87 @@
+import time
+
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from benchmarks.synthetic import ALL_REGIONS
+from src.automacao.utils.discovery import find_active_vpc_regions
+
+
+def _failing_vpcs(aws, failures: dict):
+    """Substitui o DescribeVpcs sintético: as regiões em `failures` executam a falha indicada."""
+    original = aws._ec2_DescribeVpcs
+
+    def describe_vpcs(params, region):
+        if region in failures:
+            failures[region]()
+        return original(params, region)
+    aws._ec2_DescribeVpcs = describe_vpcs
+
+
+def _read_timeout():
+    raise ReadTimeoutError(endpoint_url='https://ec2.synthetic')
+
+
+def _access_denied():
+    raise ClientError({'Error': {'Code': 'UnauthorizedOperation', 'Message': 'negado'}}, 'DescribeVpcs')
+
+
+def test_discovery_finds_active_regions(aws):
+    result = find_active_vpc_regions(aws.session(), max_workers=4)
+
+    assert result.active_regions == sorted(aws.ec2, key=ALL_REGIONS.index)
+    assert result.timed_out_regions == [] and result.failed_regions == []
+    # Os payloads da sondagem ficam disponíveis para a fábrica, já com a região
+    assert all(vpc['Region'] == region for region in result.active_regions for vpc in result.vpcs_by_region[region])
+
+
+def test_discovery_reports_timeouts_and_failures(aws):
+    active, timed_out, denied = list(aws.ec2)[0], list(aws.ec2)[1], ALL_REGIONS[-1]
+    _failing_vpcs(aws, {timed_out: _read_timeout, denied: _access_denied})
+
+    result = find_active_vpc_regions(aws.session(), max_workers=4)
+
+    assert result.active_regions == [active]
+    assert result.timed_out_regions == [timed_out]
+    assert result.failed_regions == [denied]
+    assert timed_out not in result.vpcs_by_region and denied not in result.vpcs_by_region
+
+
+def test_discovery_abandons_regions_after_deadline(aws):
+    slow = list(aws.ec2)[1]
+    _failing_vpcs(aws, {slow: lambda: time.sleep(1.5)})
+
+    started = time.monotonic()
+    result = find_active_vpc_regions(aws.session(), max_workers=len(ALL_REGIONS), deadline=0.5)
+
+    # A varredura não espera pela região lenta: ela sai como timeout e as demais são mantidas
+    assert time.monotonic() - started < 1.5
+    assert result.timed_out_regions == [slow]
+    assert result.active_regions == [region for region in aws.ec2 if region != slow]
+
+
+def test_discovery_without_region_list_reports_error(aws):
+    def describe_regions(params, region):
+        _access_denied()
+    aws._ec2_DescribeRegions = describe_regions
+
+    result = find_active_vpc_regions(aws.session())
+
+    # Nada foi varrido: o resultado traz o erro em vez de parecer "nenhuma região ativa"
+    assert result.error is not None and 'UnauthorizedOperation' in result.error
+    assert result.active_regions == [] and result.vpcs_by_region == {}
+
+
+def test_run_report_fails_when_region_list_is_unavailable(aws, tmp_path, monkeypatch):
+    import main
+
+    def describe_regions(params, region):
+        _access_denied()
+    aws._ec2_DescribeRegions = describe_regions
+    monkeypatch.setattr(main, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setenv('HISTORY_DB', str(tmp_path / 'history.sqlite'))
+    vpc_key = next(key for key, config in main.REPORTS.items() if config.get('output_prefix') == 'RELATORIO_VPC')
+
+    summary = main.run_report(vpc_key, main.parse_args([]), {'enabled': False}, session=aws.session(), live_dashboard=False)
+
+    assert summary['status'] == 'failed'
+    assert 'descoberta de regiões' in summary['error']
@@ -0,0 +1,131 @@
+import copy
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+from src.automacao.events import IAM_GROUP, IAM_USER, SECURITY_GROUP, ChangeEvent, group_by_kind, read_events
+from src.automacao.iam.factory import IAMReport
+from src.automacao.vpc.factory import VPCReport
+
+NOW = datetime.now(timezone.utc)
+
+
+def _time(moment: datetime) -> str:
+    return moment.isoformat().replace('+00:00', 'Z')
+
+
+def _record(name, params, region='us-east-1', when=NOW, **extra):
+    return {'eventName': name, 'eventTime': _time(when), 'awsRegion': region, 'requestParameters': params, **extra}
+
+
+# --- Leitura dos eventos ---
+
+def test_read_events_from_cloudtrail_eventbridge_and_json_lines(tmp_path):
+    events_dir = tmp_path / 'events'
+    (events_dir / 'eb').mkdir(parents=True)
+    with gzip.open(events_dir / 'trail.json.gz', 'wt', encoding='utf-8') as handle:
+        json.dump({'Records': [
+            _record('AuthorizeSecurityGroupIngress', {'groupId': 'sg-1'}, region='sa-east-1'),
+            _record('ModifySecurityGroupRules', {'ModifySecurityGroupRulesRequest': {'GroupId': 'sg-2'}}, region='sa-east-1'),
+            _record('DescribeInstances', {}),
+        ]}, handle)
+    (events_dir / 'eb' / 'event.json').write_text(json.dumps({
+        'detail-type': 'AWS API Call via CloudTrail', 'source': 'aws.iam',
+        'detail': _record('AttachGroupPolicy', {'groupName': 'devs'}),
+    }))
+    (tmp_path / 'calls.jsonl').write_text('\n'.join(json.dumps(r) for r in [
+        _record('CreateSecurityGroup', {'groupName': 'novo'}, region='sa-east-1', responseElements={'groupId': 'sg-3'}),
+        _record('EnableMFADevice', {'userName': 'ana'}),
+    ]))
+
+    events = read_events([str(events_dir), str(tmp_path / 'calls.jsonl')])
+
+    assert group_by_kind(events) == {
+        SECURITY_GROUP: {'sg-1': 'sa-east-1', 'sg-2': 'sa-east-1', 'sg-3': 'sa-east-1'},
+        IAM_GROUP: {'devs': 'global'},
+        IAM_USER: {'ana': 'global'},
+    }
+
+
+def test_read_events_skips_failed_old_and_duplicate_events(tmp_path):
+    path = tmp_path / 'trail.json'
+    path.write_text(json.dumps({'Records': [
+        _record('CreateAccessKey', {'userName': 'negado'}, errorCode='AccessDenied'),
+        _record('DeleteAccessKey', {'userName': 'antigo'}, when=NOW - timedelta(days=2)),
+        _record('CreateAccessKey', {'userName': 'ana'}, when=NOW - timedelta(minutes=5)),
+        _record('DeleteAccessKey', {'userName': 'ana'}),
+        _record('UpdateAccessKey', {}),  # sem usuário identificável
+    ]}))
+    (tmp_path / 'broken.json').write_text('{not json')
+
+    events = read_events([str(path), str(tmp_path / 'broken.json')], since=NOW - timedelta(days=1))
+
+    # Um evento por recurso: o mais recente
+    assert [(e.resource_id, e.event_name) for e in events] == [('ana', 'DeleteAccessKey')]
+
+
+# --- Aplicação no inventário ---
+
+def test_vpc_events_match_full_collection(aws, tmp_path):
+    session, regions = aws.session(), sorted(aws.ec2)
+    inventory = str(tmp_path / 'vpc.pkl')
+    VPCReport(regions, session=session, inventory_path=inventory).collect_data()
+
+    region = regions[0]
+    groups = aws.ec2[region]['SecurityGroups']
+    changed = groups[0]
+    changed['IpPermissions'].append({'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]})
+    deleted = groups.pop(1)
+    created = copy.deepcopy(groups[2])
+    created.update(GroupId='sg-created', GroupName='criado')
+    groups.append(created)
+    events = [
+        ChangeEvent(SECURITY_GROUP, changed['GroupId'], region, 'AuthorizeSecurityGroupIngress', NOW),
+        ChangeEvent(SECURITY_GROUP, deleted['GroupId'], region, 'DeleteSecurityGroup', NOW),
+        ChangeEvent(SECURITY_GROUP, 'sg-created', region, 'CreateSecurityGroup', NOW),
+    ]
+
+    updated = VPCReport([], session=session, inventory_path=inventory)
+    assert updated.load_inventory()
+    calls = aws.calls
+    updated.apply_events(events).analyze_security()
+    event_calls = aws.calls - calls
+    full = VPCReport(regions, session=session).collect_data().analyze_security()
+
+    assert event_calls == 1  # só os grupos afetados, numa chamada filtrada
+    assert updated.sg_risk_map == full.sg_risk_map
+    assert updated.sg_risk_map[changed['GroupId']] == 'Alto'
+    assert deleted['GroupId'] not in updated.sg_risk_map
+
+
+def test_iam_refetch_failure_keeps_inventoried_user(aws, tmp_path):
+    session, inventory = aws.session(), str(tmp_path / 'iam.pkl')
+    IAMReport(session=session, inventory_path=inventory).collect_data()
+    name = aws.iam['users'][0]['UserName']
+
+    def throttled(params, region):
+        raise ClientError({'Error': {'Code': 'Throttling', 'Message': 'lento'}}, 'ListMFADevices')
+    aws._iam_ListMFADevices = throttled
+
+    report = IAMReport(session=session, inventory_path=inventory)
+    assert report.load_inventory()
+    before = next(user for user in report.users if user.name == name)
+    report.apply_events([ChangeEvent(IAM_USER, name, 'global', 'EnableMFADevice', NOW)])
+
+    assert next(user for user in report.users if user.name == name) is before
+
+
+def test_iam_deleted_user_is_removed(aws, tmp_path):
+    session, inventory = aws.session(), str(tmp_path / 'iam.pkl')
+    IAMReport(session=session, inventory_path=inventory).collect_data()
+    removed = aws.iam['users'].pop(0)
+    del aws._users_by_name[removed['UserName']]
+
+    report = IAMReport(session=session, inventory_path=inventory)
+    assert report.load_inventory()
+    report.apply_events([ChangeEvent(IAM_USER, removed['UserName'], 'global', 'DeleteUser', NOW)])
+
+    assert removed['UserName'] not in {user.name for user in report.users}
+    assert len(report.users) == len(aws.iam['users'])
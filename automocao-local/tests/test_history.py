@@ -0,0 +1,98 @@
+import pytest
+
+from src.automacao.history import OPEN_COLUMNS, TREND_COLUMNS, RunHistory, main
+
+REPORT = 'RELATORIO_VPC'
+
+
+@pytest.fixture
+def history(tmp_path):
+    return RunHistory(str(tmp_path / 'history.sqlite'))
+
+
+def _run(history, findings, status='success', report=REPORT):
+    """Uma execução completa com os achados (recurso, região, risco, detalhe)."""
+    run_id, run_number = history.begin_run(report)
+    history.record_findings(run_id, findings)
+    history.finish_run(run_id, status, account='000000000000', regions=['us-east-1'])
+    return run_id, run_number
+
+
+SSH = ('sg-a', 'us-east-1', 'Alto', 'Entrada TCP:22 de 0.0.0.0/0')
+ODD = ('sg-b', 'sa-east-1', 'Médio', 'Entrada TCP:8080 de 0.0.0.0/0')
+
+
+def test_run_numbers_continue_from_legacy_files(history):
+    legacy_calls = []
+
+    def legacy():
+        legacy_calls.append(True)
+        return 7
+
+    assert history.begin_run(REPORT, legacy_last_run=legacy)[1] == 8
+    assert history.begin_run(REPORT, legacy_last_run=legacy)[1] == 9
+    # A varredura legada só é consultada enquanto o relatório não tem execuções no banco
+    assert legacy_calls == [True]
+    assert history.begin_run('RELATORIO_IAM')[1] == 1
+
+
+def test_record_findings_counts_rows(history):
+    run_id, _ = history.begin_run(REPORT)
+
+    assert history.record_findings(run_id, iter([SSH, ODD] * 3)) == 6
+
+
+def test_open_findings_counts_only_the_current_streak(history):
+    _run(history, [SSH, ODD])          # 1
+    _run(history, [SSH])               # 2: ODD resolvido
+    _run(history, [SSH, ODD])          # 3: ODD reaberto
+    _run(history, [], status='failed')  # 4: execução com falha não interrompe a sequência
+    _run(history, [SSH, ODD, SSH])     # 5: achado repetido na mesma execução conta uma vez
+
+    open_df = history.open_findings(REPORT, min_runs=1)
+
+    assert list(open_df.columns) == OPEN_COLUMNS
+    rows = {row['Recurso']: (row['Execuções em aberto'], row['Aberto desde (execução)']) for _, row in open_df.iterrows()}
+    assert rows == {'sg-a': (4, 1), 'sg-b': (2, 3)}
+    assert history.open_findings(REPORT, min_runs=3)['Recurso'].tolist() == ['sg-a']
+
+
+def test_open_findings_ignores_resolved_findings(history):
+    _run(history, [SSH, ODD])
+    _run(history, [ODD])
+
+    assert history.open_findings(REPORT, min_runs=0)['Recurso'].tolist() == ['sg-b']
+
+
+def test_risk_trend_by_run_and_region(history):
+    _run(history, [SSH, ODD])
+    _run(history, [], status='failed')
+    current_id, current_number = history.begin_run(REPORT)
+    history.record_findings(current_id, [SSH, SSH])
+
+    trend = history.risk_trend(REPORT, current_run_id=current_id)
+
+    assert list(trend.columns) == TREND_COLUMNS
+    rows = {(row['Execução'], row['Região']): (row['Alto'], row['Médio'], row['Total']) for _, row in trend.iterrows()}
+    # A execução com falha fica de fora; a execução em andamento entra quando informada
+    assert rows == {(1, 'sa-east-1'): (0, 1, 1), (1, 'us-east-1'): (1, 0, 1), (current_number, 'us-east-1'): (2, 0, 2)}
+    assert history.risk_trend(REPORT)['Execução'].unique().tolist() == [1]
+    assert history.risk_trend(REPORT, last_runs=1, current_run_id=current_id)['Execução'].unique().tolist() == [current_number]
+
+
+def test_risk_trend_keeps_runs_without_findings(history):
+    _run(history, [])
+
+    trend = history.risk_trend(REPORT)
+
+    assert trend[['Execução', 'Região', 'Total']].values.tolist() == [[1, '-', 0]]
+
+
+def test_command_line_queries(history, capsys):
+    _run(history, [SSH])
+    _run(history, [SSH])
+
+    main(['open', '--report', REPORT, '--runs', '1', '--db', history.path])
+    assert 'sg-a' in capsys.readouterr().out
+    main(['trend', '--report', 'OUTRO', '--db', history.path])
+    assert 'Nenhum resultado.' in capsys.readouterr().out
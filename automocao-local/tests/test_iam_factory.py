@@ -0,0 +1,58 @@
+from botocore.exceptions import ClientError
+
+from src.automacao.iam.factory import NOT_EVALUATED, IAMReport
+
+
+def _error(code, operation):
+    def handler(params, region):
+        raise ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+    return handler
+
+
+def _fail_for(aws, user_name, operation='ListMFADevices'):
+    """Faz uma chamada por usuário falhar só para `user_name`."""
+    attribute = f'_iam_{operation}'
+    original = getattr(aws, attribute)
+
+    def handler(params, region):
+        if params.get('UserName') == user_name:
+            _error('Throttling', operation)(params, region)
+        return original(params, region)
+    setattr(aws, attribute, handler)
+
+
+def test_bulk_collection_names_real_keys_in_rotation_findings(aws):
+    report = IAMReport(session=aws.session(), collection_mode='bulk').collect_data().analyze_security()
+
+    recommendations = report.findings_df['Recomendação'].dropna()
+    rotations = recommendations[recommendations.str.startswith('Rotacione')]
+    assert not rotations.empty
+    assert not rotations.str.contains('access_key_').any()
+
+
+def test_per_user_failures_are_not_evaluated(aws):
+    aws._iam_GetAccountAuthorizationDetails = _error('AccessDenied', 'GetAccountAuthorizationDetails')
+    broken = aws.iam['users'][0]['UserName']
+    _fail_for(aws, broken)
+
+    report = IAMReport(session=aws.session()).collect_data().analyze_security()
+
+    assert report.unevaluated_users == {broken}
+    assert report.user_risk_map[broken] == NOT_EVALUATED
+    # Nenhum achado (ex.: "MFA não está ativado") para um usuário que não foi verificado
+    assert broken not in set(report.findings_df['Usuário'])
+    assert report.build_tables()['IAM_Users'].set_index('Usuário').loc[broken, 'Risco'] == NOT_EVALUATED
+
+
+def test_users_missing_from_credential_report_are_not_evaluated_on_failure(aws):
+    # Usuário criado depois da geração do Credential Report (fora do CSV)
+    broken = aws.iam['users'][1]['UserName']
+    lines = aws.iam['credential_report'].splitlines()
+    aws.iam['credential_report'] = b'\n'.join(line for line in lines if not line.startswith(f'{broken},'.encode()))
+    _fail_for(aws, broken, 'ListAccessKeys')
+
+    report = IAMReport(session=aws.session(), collection_mode='bulk').collect_data().analyze_security()
+
+    assert report.unevaluated_users == {broken}
+    assert report.user_risk_map[broken] == NOT_EVALUATED
+    assert broken not in set(report.findings_df['Usuário'])
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+
+from src.automacao import incremental, rules_engine
+from src.automacao.iam.factory import _KEY_AGE
+from src.automacao.incremental import (
+    IncrementalState, analyze_incrementally, load_inventory, save_inventory, sg_fingerprint, user_fingerprint
+)
+from src.automacao.models import VPC, AccessKey, IAMUser, SecurityGroup
+from src.automacao.security_analyzer import KEY_MAX_AGE_DAYS, analyze_iam_users, analyze_sgs
+from src.automacao.vpc.factory import VPCReport
+from src.automacao.vpc.graph import SGReferenceGraph
+
+
+def _sg(group_id, port):
+    return SecurityGroup({
+        'GroupId': group_id, 'GroupName': group_id, 'VpcId': 'vpc-1', 'IpPermissionsEgress': [],
+        'IpPermissions': [{'IpProtocol': 'tcp', 'FromPort': port, 'ToPort': port, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]}],
+    })
+
+
+class _Spy:
+    """analyze_sgs que guarda quais grupos foram reanalisados em cada chamada."""
+
+    def __init__(self):
+        self.analyzed = []
+
+    def __call__(self, groups):
+        if groups:
+            self.analyzed.append(sorted(sg.id for sg in groups))
+        return analyze_sgs(groups)
+
+
+def _run(groups, path, spy):
+    state = IncrementalState(path)
+    result = analyze_incrementally(groups, lambda sg: sg.id, sg_fingerprint, spy, state, "ID do Security Group")
+    state.save()
+    return result
+
+
+def test_first_run_analyzes_everything_and_records_baseline(tmp_path):
+    spy = _Spy()
+    findings, risks, delta = _run([_sg('sg-a', 22), _sg('sg-b', 443)], str(tmp_path / 'state.pkl'), spy)
+
+    assert spy.analyzed == [['sg-a', 'sg-b']]
+    assert risks == {'sg-a': 'Alto', 'sg-b': 'Seguro'}
+    assert findings['ID do Security Group'].tolist() == ['sg-a']
+    assert delta['Tipo'].tolist() == ['Linha de base']
+
+
+def test_unchanged_run_reuses_previous_results(tmp_path):
+    path, spy = str(tmp_path / 'state.pkl'), _Spy()
+    _run([_sg('sg-a', 22), _sg('sg-b', 443)], path, spy)
+
+    findings, risks, delta = _run([_sg('sg-a', 22), _sg('sg-b', 443)], path, spy)
+
+    assert spy.analyzed == [['sg-a', 'sg-b']]  # nenhuma reanálise na segunda execução
+    assert risks == {'sg-a': 'Alto', 'sg-b': 'Seguro'}
+    assert findings['ID do Security Group'].tolist() == ['sg-a']
+    assert delta['Tipo'].tolist() == ['Sem mudanças']
+
+
+def test_changes_are_reanalyzed_and_reported_in_delta(tmp_path):
+    path, spy = str(tmp_path / 'state.pkl'), _Spy()
+    _run([_sg('sg-a', 22), _sg('sg-b', 443), _sg('sg-c', 3389)], path, spy)
+
+    # sg-a fechado, sg-b aberto em SSH, sg-c removido, sg-d novo
+    findings, risks, delta = _run([_sg('sg-a', 443), _sg('sg-b', 22), _sg('sg-d', 8080)], path, spy)
+
+    assert spy.analyzed[-1] == ['sg-a', 'sg-b', 'sg-d']
+    assert risks == {'sg-a': 'Seguro', 'sg-b': 'Alto', 'sg-d': 'Médio'}
+    assert sorted(findings['ID do Security Group']) == ['sg-b', 'sg-d']
+    changes = set(zip(delta['Tipo'], delta['Recurso']))
+    assert {
+        ('Recurso alterado', 'sg-a'), ('Recurso alterado', 'sg-b'), ('Recurso removido', 'sg-c'), ('Recurso adicionado', 'sg-d'),
+        ('Achado resolvido', 'sg-a'), ('Achado novo', 'sg-b'), ('Achado resolvido', 'sg-c'), ('Achado novo', 'sg-d'),
+    } == changes
+
+
+def test_unreadable_state_falls_back_to_full_analysis(tmp_path):
+    path = tmp_path / 'state.pkl'
+    path.write_bytes(b'not a pickle')
+
+    state = IncrementalState(str(path))
+
+    assert not state.loaded and state.fingerprints == {}
+
+
+def test_inventory_round_trip_checks_kind(tmp_path):
+    path = str(tmp_path / 'inventory.pkl')
+    save_inventory(path, 'vpc', {'vpcs': [1, 2]})
+
+    assert load_inventory(path, 'vpc') == {'vpcs': [1, 2]}
+    assert load_inventory(path, 'iam') is None
+    assert load_inventory(str(tmp_path / 'missing.pkl'), 'vpc') is None
+
+
+
+class _Tomorrow(datetime):
+    """Relógio adiantado em um dia, para simular a execução do dia seguinte."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=1)
+
+
+def _stale_user(created, mfa=True):
+    user = IAMUser({'UserName': 'dev', 'UserId': 'DEV', 'Arn': 'arn:aws:iam::000000000000:user/dev'})
+    user.mfa_enabled = mfa
+    user.access_keys = [AccessKey({'AccessKeyId': 'AKIADEV', 'Status': 'Active', 'CreateDate': created})]
+    return user
+
+
+def _run_iam(user, path, spy):
+    state = IncrementalState(path)
+    result = analyze_incrementally(
+        [user], lambda u: u.name, lambda u: user_fingerprint(u, KEY_MAX_AGE_DAYS), spy, state, "Usuário", volatile=_KEY_AGE
+    )
+    state.save()
+    return result
+
+
+def test_stale_key_age_does_not_change_between_runs(tmp_path, monkeypatch):
+    path, analyzed = str(tmp_path / 'state.pkl'), []
+    created = datetime.now(timezone.utc) - timedelta(days=120)
+
+    def spy(users):
+        analyzed.extend(u.name for u in users)
+        return analyze_iam_users(users)
+    _run_iam(_stale_user(created), path, spy)
+
+    # No dia seguinte a chave continua vencida, só a idade em dias mudou
+    monkeypatch.setattr(incremental, 'datetime', _Tomorrow)
+    monkeypatch.setattr(rules_engine, 'datetime', _Tomorrow)
+    _, _, delta = _run_iam(_stale_user(created), path, spy)
+    assert analyzed == ['dev']
+    assert delta['Tipo'].tolist() == ['Sem mudanças']
+
+    # Uma mudança real reanalisa o usuário (texto com a nova idade), mas o achado de idade não vira novo/resolvido
+    findings, _, delta = _run_iam(_stale_user(created, mfa=False), path, spy)
+    assert analyzed == ['dev', 'dev']
+    assert 'Chave de Acesso ativa com 121 dias' in findings['Achado'].tolist()
+    assert 'Achado resolvido' not in delta['Tipo'].tolist()
+    new = delta.loc[delta['Tipo'] == 'Achado novo', 'Detalhe'].tolist()
+    assert len(new) == 1 and 'MFA' in new[0]
+
+
+def _vpc_run(groups, path):
+    report = VPCReport([], state_path=path)
+    vpc = VPC({'VpcId': 'vpc-1'})
+    vpc.security_groups = groups
+    report.vpcs, report.sg_graph = [vpc], SGReferenceGraph(groups)
+    return report.analyze_security()
+
+
+def test_transitive_exposure_changes_appear_in_delta(tmp_path):
+    path = str(tmp_path / 'state.pkl')
+    app = SecurityGroup({
+        'GroupId': 'sg-app', 'GroupName': 'sg-app', 'VpcId': 'vpc-1', 'IpPermissionsEgress': [],
+        'IpPermissions': [{'IpProtocol': 'tcp', 'FromPort': 8443, 'ToPort': 8443, 'UserIdGroupPairs': [{'GroupId': 'sg-web'}]}],
+    })
+    _vpc_run([_sg('sg-web', 443), app], path)
+
+    # sg-web passa a aceitar SSH da internet: sg-app, que o referencia, fica exposto sem ter mudado
+    report = _vpc_run([_sg('sg-web', 22), app], path)
+
+    assert report.sg_risk_map['sg-app'] == 'Médio'
+    new = set(report.delta_df.loc[report.delta_df['Tipo'] == 'Achado novo', 'Recurso'])
+    assert new == {'sg-web', 'sg-app'}
+
+    # sg-web fechado de novo: a exposição indireta aparece como resolvida
+    report = _vpc_run([_sg('sg-web', 443), app], path)
+    resolved = set(report.delta_df.loc[report.delta_df['Tipo'] == 'Achado resolvido', 'Recurso'])
+    assert resolved == {'sg-web', 'sg-app'}
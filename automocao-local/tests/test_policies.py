@@ -0,0 +1,63 @@
+from src.automacao.iam.policies import PolicyEvaluator, evaluate_document
+from src.automacao.models import IAMUser
+from src.automacao.security_analyzer import ADMIN_POLICY_ARN
+
+POWER_USER_ARN = 'arn:aws:iam::aws:policy/PowerUserAccess'
+# Documento da política gerenciada PowerUserAccess, como publicado pela AWS
+POWER_USER_DOCUMENT = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {"Effect": "Allow", "NotAction": ["iam:*", "organizations:*", "account:*"], "Resource": "*"},
+        {
+            "Effect": "Allow",
+            "Action": [
+                "iam:CreateServiceLinkedRole", "iam:DeleteServiceLinkedRole", "iam:ListRoles",
+                "organizations:DescribeOrganization", "account:ListRegions", "account:GetAccountInformation",
+            ],
+            "Resource": "*",
+        },
+    ],
+}
+
+
+def _managed(arn, document):
+    return {arn: {'Arn': arn, 'DefaultVersionId': 'v1', 'PolicyVersionList': [{'VersionId': 'v1', 'IsDefaultVersion': True, 'Document': document}]}}
+
+
+def _user(*policies):
+    user = IAMUser({'UserName': 'dev', 'UserId': 'DEV', 'Arn': 'arn:aws:iam::000000000000:user/dev'})
+    user.attached_policies = list(policies)
+    return user
+
+
+def test_power_user_is_not_admin_equivalent():
+    verdict = evaluate_document(POWER_USER_DOCUMENT)
+
+    assert '*' not in verdict.allows and 'iam:*' not in verdict.allows
+    assert 'iam:PassRole' not in verdict.allows and 'ec2:RunInstances' in verdict.allows
+
+    result = PolicyEvaluator(_managed(POWER_USER_ARN, POWER_USER_DOCUMENT)).evaluate_user(_user(POWER_USER_ARN))
+    assert result.admin_via == ()
+    # Sem IAM, sobra o caminho que não depende de iam:PassRole
+    assert result.escalation_paths == ('lambda:UpdateFunctionCode (via PowerUserAccess)',)
+
+
+def test_not_action_on_other_service_still_grants_full_service_probes():
+    document = {"Statement": [{"Effect": "Allow", "NotAction": "s3:*", "Resource": "*"}]}
+
+    verdict = evaluate_document(document)
+
+    assert '*' not in verdict.allows
+    assert {'iam:*', 'sts:AssumeRole'} <= verdict.allows
+    result = PolicyEvaluator(_managed('arn:aws:iam::000000000000:policy/quase-admin', document)).evaluate_user(
+        _user('arn:aws:iam::000000000000:policy/quase-admin')
+    )
+    assert result.admin_via == ('quase-admin',)
+
+
+def test_action_wildcards_grant_only_what_they_cover():
+    assert '*' in evaluate_document({"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]}).allows
+    partial = evaluate_document({"Statement": [{"Effect": "Allow", "Action": "iam:Get*", "Resource": "*"}]})
+    assert not partial.allows
+    # A AdministratorAccess direta já é reportada pela regra IAM_ADMIN_POLICY, não como acesso efetivo
+    assert PolicyEvaluator().evaluate_user(_user(ADMIN_POLICY_ARN)).admin_via == ()
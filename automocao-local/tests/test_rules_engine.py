@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from src.automacao.models import AccessKey, IAMUser, SecurityGroup
+from src.automacao.rules_engine import (
+    flatten_iam_users, flatten_security_groups, format_port_intervals, port_gaps, risk_map, run_rules, render_findings
+)
+from src.automacao.security_analyzer import (
+    ADMIN_POLICY_ARN, IAM_FINDING_COLUMNS, KEY_MAX_AGE_DAYS, SG_FINDING_COLUMNS, SG_RULES, analyze_iam_users, analyze_sgs
+)
+
+
+def _sg(group_id, *permissions):
+    return SecurityGroup({'GroupId': group_id, 'GroupName': group_id, 'VpcId': 'vpc-1', 'IpPermissions': list(permissions), 'IpPermissionsEgress': []})
+
+
+def _ingress(from_port, to_port, *cidrs, protocol='tcp'):
+    rule = {'IpProtocol': protocol, 'IpRanges': [{'CidrIp': cidr} for cidr in cidrs]}
+    if from_port is not None:
+        rule.update(FromPort=from_port, ToPort=to_port)
+    return rule
+
+
+def _user(name, mfa=True, keys=(), policies=()):
+    user = IAMUser({'UserName': name, 'UserId': name.upper(), 'Arn': f'arn:aws:iam::000000000000:user/{name}'})
+    user.mfa_enabled = mfa
+    user.access_keys = [AccessKey(key) for key in keys]
+    user.attached_policies = list(policies)
+    return user
+
+
+def _key(key_id, age_days, status='Active'):
+    return {'AccessKeyId': key_id, 'Status': status, 'CreateDate': datetime.now(timezone.utc) - timedelta(days=age_days)}
+
+
+# --- Security Groups ---
+
+def test_sg_rules_classify_ports_exposed_to_internet():
+    groups = [
+        _sg('sg-ssh', _ingress(22, 22, '0.0.0.0/0')),
+        _sg('sg-web', _ingress(443, 443, '0.0.0.0/0'), _ingress(80, 80, '0.0.0.0/0')),
+        _sg('sg-all', _ingress(None, None, '0.0.0.0/0', protocol='-1')),
+        _sg('sg-private', _ingress(22, 22, '10.0.0.0/8')),
+        _sg('sg-odd', _ingress(8080, 8080, '0.0.0.0/0')),
+    ]
+
+    findings, risks = analyze_sgs(groups)
+
+    assert risks == {'sg-ssh': 'Alto', 'sg-web': 'Seguro', 'sg-all': 'Médio', 'sg-private': 'Seguro', 'sg-odd': 'Médio'}
+    by_group = findings.set_index('ID do Security Group')
+    assert by_group.loc['sg-ssh', 'Regra Problemática'] == 'Entrada TCP:22 de 0.0.0.0/0'
+    assert by_group.loc['sg-all', 'Portas Afetadas'] == 'TODAS'
+    assert by_group.loc['sg-odd', 'Portas Afetadas'] == '8080'
+
+
+def test_sg_wide_range_reports_critical_ports_and_gaps_once_per_rule():
+    # Dois CIDRs na mesma regra: o escopo (grupo, regra) gera um achado por regra, não por CIDR
+    findings, risks = analyze_sgs([_sg('sg-wide', _ingress(0, 1000, '0.0.0.0/0', '10.0.0.0/8'))])
+
+    assert risks == {'sg-wide': 'Alto'}
+    assert findings['Risco'].tolist() == ['Alto', 'Médio']
+    assert findings['Portas Afetadas'].tolist() == ['22', '0-21, 23-79, 81-442, 444-1000']
+
+
+def test_sg_without_findings_returns_placeholder():
+    findings, risks = analyze_sgs([_sg('sg-web', _ingress(443, 443, '0.0.0.0/0'))])
+
+    assert risks == {'sg-web': 'Seguro'}
+    assert findings['Risco'].tolist() == ['Parabéns!']
+
+
+def test_new_rule_is_a_declaration():
+    # Uma verificação nova entra só como item da lista, sem código novo
+    telnet = {
+        "id": "SG_TELNET", "tipo": "port_set", "ports": {23}, "cidrs": {'10.0.0.0/8'}, "scope": ["sg_pos", "rule_idx"],
+        "severity": "Médio", "regra": "Telnet {protocol}:{port_label} de {cidr}", "recomendacao": "Desative o telnet.",
+    }
+    groups = [_sg('sg-telnet', _ingress(23, 23, '10.0.0.0/8'))]
+    table = flatten_security_groups(groups)
+    matches = run_rules(table, SG_RULES + [telnet], order_by=["sg_pos", "rule_idx", "rule_order"])
+    findings = render_findings(matches, SG_RULES + [telnet], SG_FINDING_COLUMNS)
+
+    assert findings['Regra Problemática'].tolist() == ['Telnet TCP:23 de 10.0.0.0/8']
+    assert risk_map(matches, ['sg-telnet'], 'sg_pos') == {'sg-telnet': 'Médio'}
+
+
+def test_port_helpers():
+    assert port_gaps(0, 100, {22, 80, 5000}) == [(0, 21), (23, 79), (81, 100)]
+    assert port_gaps(22, 22, {22}) == []
+    assert format_port_intervals([(22, 22), (1000, 2000)]) == '22, 1000-2000'
+
+
+# --- IAM ---
+
+def test_iam_rules_flag_mfa_old_active_keys_and_admin():
+    users = [
+        _user('ok', keys=[_key('AKIAOK', 10)]),
+        _user('no-mfa', mfa=False),
+        _user('old-key', keys=[_key('AKIAOLD', KEY_MAX_AGE_DAYS + 5), _key('AKIAOFF', 400, status='Inactive')]),
+        _user('admin', policies=[ADMIN_POLICY_ARN]),
+    ]
+
+    findings, risks = analyze_iam_users(users)
+
+    assert risks == {'ok': 'Seguro', 'no-mfa': 'Alto', 'old-key': 'Alto', 'admin': 'Alto'}
+    old = findings[findings['Usuário'] == 'old-key']
+    # Só a chave ativa acima do limite gera achado, com o identificador na recomendação
+    assert old['Achado'].tolist() == [f'Chave de Acesso ativa com {KEY_MAX_AGE_DAYS + 5} dias']
+    assert old['Recomendação'].tolist() == ['Rotacione a chave de acesso AKIAOLD.']
+
+
+def test_iam_table_has_one_row_per_key():
+    table = flatten_iam_users([_user('two', keys=[_key('A', 1), _key('B', 2)]), _user('none')])
+
+    assert table['user_pos'].tolist() == [0, 0, 1]
+    assert table['key_id'].tolist()[:2] == ['A', 'B'] and pd.isna(table['key_id'].tolist()[2])
+    assert list(IAM_FINDING_COLUMNS) == ['Risco', 'Usuário', 'Achado', 'Recomendação']